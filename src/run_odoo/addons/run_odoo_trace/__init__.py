@@ -0,0 +1,15 @@
+import logging
+
+from . import tracing
+
+_logger = logging.getLogger(__name__)
+
+
+def post_load():
+    import odoo.http
+
+    tracer = tracing.tracer_from_environ()
+    tracing.install(type(odoo.http.root), tracer)
+    _logger.info(
+        "Tracing requests, last %d served on %s", tracer.records.maxlen, tracing.TRACE_PATH
+    )
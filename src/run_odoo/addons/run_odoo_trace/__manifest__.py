@@ -0,0 +1,11 @@
+{
+    "name": "run-odoo request tracing",
+    "summary": "Per-request wall time, SQL count and SQL time, loaded with --load",
+    "version": "1.0.0",
+    "category": "Hidden",
+    "license": "LGPL-3",
+    "depends": ["base"],
+    "installable": True,
+    "auto_install": False,
+    "post_load": "post_load",
+}
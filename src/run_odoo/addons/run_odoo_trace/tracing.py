@@ -0,0 +1,203 @@
+"""WSGI middleware recording per-request latency and SQL usage
+
+Kept free of Odoo imports so the recording logic can be tested on its own.
+"""
+
+import hashlib
+import hmac
+import io
+import json
+import os
+import re
+import threading
+import time
+from collections import deque
+from http.cookies import CookieError, SimpleCookie
+from urllib.parse import parse_qs
+
+TRACE_PATH = "/run_odoo/trace"
+CALL_KW_RE = re.compile(r"^/web/dataset/call_(?:kw|button)(?:/(?P<model>[\w.]+)/(?P<method>\w+))?")
+JSONRPC_PATH = "/jsonrpc"
+# Bodies of larger requests are not inspected for the model and method
+MAX_INSPECTED_BODY = 1024 * 1024
+LOCAL_ADDRESSES = ("127.0.0.1", "::1")
+# Set by reverse proxies: behind one on the same host every client looks local
+PROXY_HEADERS = ("HTTP_X_FORWARDED_FOR", "HTTP_FORWARDED", "HTTP_X_REAL_IP")
+
+
+def _read_body(environ):
+    """Read the request body and put it back for Odoo to read again"""
+    try:
+        length = int(environ.get("CONTENT_LENGTH") or 0)
+    except ValueError:
+        return None
+    if not 0 < length <= MAX_INSPECTED_BODY:
+        return None
+    body = environ["wsgi.input"].read(length)
+    environ["wsgi.input"] = io.BytesIO(body)
+    return body
+
+
+def rpc_call(environ):
+    """Model, method and arguments of a JSON-RPC call, None for other requests"""
+    path = environ.get("PATH_INFO", "")
+    match = CALL_KW_RE.match(path)
+    if not match and path != JSONRPC_PATH:
+        return None
+
+    body = _read_body(environ)
+    try:
+        params = json.loads(body)["params"]
+    except (TypeError, ValueError, KeyError):
+        params = None
+    if not isinstance(params, dict):
+        params = {}
+
+    if match:
+        if "model" in params:
+            return {
+                "model": params["model"],
+                "method": params.get("method"),
+                "args": params.get("args") or [],
+                "kwargs": params.get("kwargs") or {},
+            }
+        if match["model"]:
+            # Body too large to inspect, the route still names the call
+            return {"model": match["model"], "method": match["method"]}
+        return None
+
+    # External API: execute_kw(db, uid, password, model, method, args, kwargs)
+    args = params.get("args") or []
+    if params.get("service") == "object" and len(args) >= 5:
+        return {
+            "model": args[3],
+            "method": args[4],
+            "args": args[5] if len(args) > 5 else [],
+            "kwargs": args[6] if len(args) > 6 else {},
+        }
+    return None
+
+
+def trace_allowed(environ, token=None):
+    """Whether a request may read the records: local, not proxied, with the run's token"""
+    if environ.get("REMOTE_ADDR") not in LOCAL_ADDRESSES:
+        return False
+    if any(environ.get(header) for header in PROXY_HEADERS):
+        return False
+    if not token:
+        return True
+    given = parse_qs(environ.get("QUERY_STRING", "")).get("token", [""])[0]
+    given = environ.get("HTTP_X_RUN_ODOO_TOKEN") or given
+    return hmac.compare_digest(given.encode(), token.encode())
+
+
+def session_key(environ):
+    """Short stable identifier of the browser session, to replay calls in their sessions"""
+    cookie = SimpleCookie()
+    try:
+        cookie.load(environ.get("HTTP_COOKIE", ""))
+    except CookieError:
+        return None
+    if "session_id" not in cookie:
+        return None
+    return hashlib.sha1(cookie["session_id"].value.encode()).hexdigest()[:12]
+
+
+class Tracer:
+    def __init__(self, size=1000, log_path=None, calls_path=None, token=None):
+        self.records = deque(maxlen=size)
+        # Records hold SQL timings and call arguments, only served with it
+        self.token = token
+        self.log_path = log_path
+        # Compact log of JSON-RPC calls with their arguments, for replaying them
+        self.calls_path = calls_path
+        self._log_lock = threading.Lock()
+
+    def _serve_records(self, environ, start_response):
+        if not trace_allowed(environ, self.token):
+            start_response("403 Forbidden", [("Content-Type", "text/plain")])
+            return [b"Forbidden"]
+        body = json.dumps(list(self.records)).encode()
+        start_response(
+            "200 OK", [("Content-Type", "application/json"), ("Content-Length", str(len(body)))]
+        )
+        return [body]
+
+    def _append(self, path, record):
+        with self._log_lock, open(path, "a") as f:
+            f.write(json.dumps(record, separators=(",", ":"), default=str) + "\n")
+
+    def record(self, record):
+        self.records.append(record)
+        if self.log_path:
+            self._append(self.log_path, record)
+
+    def record_call(self, started, environ, call):
+        if "args" not in call:
+            return
+        self._append(
+            self.calls_path, dict(call, time=round(started, 3), session=session_key(environ))
+        )
+
+    def __call__(self, app, environ, start_response):
+        if environ.get("PATH_INFO") == TRACE_PATH:
+            return self._serve_records(environ, start_response)
+
+        # Odoo's cursor adds to these when they exist on the current thread
+        thread = threading.current_thread()
+        thread.query_count = 0
+        thread.query_time = 0
+        call = rpc_call(environ) or {}
+        status = []
+
+        def traced_start_response(status_line, headers, *args):
+            status.append(status_line)
+            return start_response(status_line, headers, *args)
+
+        started = time.time()
+        start = time.perf_counter()
+        try:
+            return app(environ, traced_start_response)
+        finally:
+            if self.calls_path and call:
+                self.record_call(started, environ, call)
+            self.record(
+                {
+                    "time": started,
+                    "pid": os.getpid(),
+                    "method": environ.get("REQUEST_METHOD"),
+                    "path": environ.get("PATH_INFO"),
+                    "status": int(status[0].split()[0]) if status else None,
+                    "duration_ms": (time.perf_counter() - start) * 1000,
+                    "sql_count": getattr(thread, "query_count", 0),
+                    "sql_ms": getattr(thread, "query_time", 0) * 1000,
+                    "model": call.get("model"),
+                    "rpc_method": call.get("method"),
+                }
+            )
+
+
+def install(app_class, tracer):
+    """Route every call of the WSGI application class through the tracer"""
+    if getattr(app_class, "_run_odoo_traced", False):
+        return
+    original_call = app_class.__call__
+
+    def __call__(self, environ, start_response):
+        return tracer(
+            lambda environ, start_response: original_call(self, environ, start_response),
+            environ,
+            start_response,
+        )
+
+    app_class.__call__ = __call__
+    app_class._run_odoo_traced = True
+
+
+def tracer_from_environ():
+    return Tracer(
+        size=int(os.environ.get("RUN_ODOO_TRACE_SIZE") or 1000),
+        log_path=os.environ.get("RUN_ODOO_TRACE_LOG") or None,
+        calls_path=os.environ.get("RUN_ODOO_RECORD_CALLS") or None,
+        token=os.environ.get("RUN_ODOO_TRACE_TOKEN") or None,
+    )
@@ -0,0 +1,154 @@
+import os
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Optional
+
+from run_odoo import db as pg
+from run_odoo.runner import Runner
+
+MB = 1024 * 1024
+# Odoo's default limits: the soft one is checked against each worker's virtual
+# size and the hard one is its RLIMIT_AS, lower values make workers fail
+DEFAULT_LIMIT_MEMORY_SOFT = 2048 * MB
+DEFAULT_LIMIT_MEMORY_HARD = 2560 * MB
+DEFAULT_DB_MAXCONN = 64
+# Below this many connections per process, requests and crons wait on the pool
+MIN_DB_MAXCONN = 8
+DEFAULT_MAX_CONNECTIONS = 100
+# PostgreSQL connections kept free for psql, backups and superuser access
+RESERVED_CONNECTIONS = 10
+
+
+@dataclass
+class Resources:
+    cpus: float
+    memory: int
+    # What the numbers came from, e.g. "cgroup v2"
+    source: str = "host"
+
+
+@dataclass
+class Tuning:
+    workers: int
+    max_cron_threads: int
+    limit_memory_soft: int
+    limit_memory_hard: int
+    limit_request: int
+    db_maxconn: int
+
+
+def _read(path: Path) -> Optional[str]:
+    try:
+        return path.read_text().strip()
+    except OSError:
+        return None
+
+
+def cgroup_limits(
+    root: Path = Path("/sys/fs/cgroup"),
+) -> tuple[Optional[float], Optional[int], str]:
+    """CPU quota (in cores) and memory limit (in bytes) of the current cgroup, if any"""
+    # cgroup v2: "max 100000" or "200000 100000"
+    if (cpu_max := _read(root / "cpu.max")) is not None or (root / "memory.max").exists():
+        cpus = None
+        if cpu_max:
+            quota, _, period = cpu_max.partition(" ")
+            if quota != "max":
+                cpus = int(quota) / int(period or 100000)
+        memory = _read(root / "memory.max")
+        return cpus, int(memory) if memory and memory != "max" else None, "cgroup v2"
+
+    # cgroup v1, -1 quota and huge memory limits mean unlimited
+    cpus = None
+    quota = _read(root / "cpu" / "cpu.cfs_quota_us")
+    period = _read(root / "cpu" / "cpu.cfs_period_us")
+    if quota and period and int(quota) > 0:
+        cpus = int(quota) / int(period)
+    memory = None
+    limit = _read(root / "memory" / "memory.limit_in_bytes")
+    if limit and int(limit) < 2**60:
+        memory = int(limit)
+    return cpus, memory, "cgroup v1" if cpus or memory else "host"
+
+
+def total_memory(meminfo: Path = Path("/proc/meminfo")) -> int:
+    for line in (_read(meminfo) or "").splitlines():
+        if line.startswith("MemTotal:"):
+            return int(line.split()[1]) * 1024
+    raise RuntimeError("Could not read total memory from /proc/meminfo")
+
+
+def detect_resources() -> Resources:
+    cpus: float = len(os.sched_getaffinity(0))
+    memory = total_memory()
+    cgroup_cpus, cgroup_memory, source = cgroup_limits()
+    if cgroup_cpus is None and cgroup_memory is None:
+        source = "host"
+    if cgroup_cpus is not None:
+        cpus = min(cpus, cgroup_cpus)
+    if cgroup_memory is not None:
+        memory = min(memory, cgroup_memory)
+    return Resources(cpus=cpus, memory=memory, source=source)
+
+
+def compute_tuning(
+    resources: Resources, max_connections: int = DEFAULT_MAX_CONNECTIONS
+) -> Tuning:
+    """Apply Odoo's sizing rules to the available CPUs, memory and connections
+
+    The per-worker memory limits stay at Odoo's defaults, the number of
+    processes is what adapts to the machine.
+    """
+    cpus = max(1, int(resources.cpus))
+    # Workers and cron threads each get the hard limit, at least one of each
+    memory_processes = max(2, resources.memory // DEFAULT_LIMIT_MEMORY_HARD)
+    # Cron threads give way first when memory is short
+    max_cron_threads = 1 if cpus < 4 or memory_processes <= 3 else 2
+    # (CPUs * 2) + 1 is the theoretical maximum
+    workers = max(1, min(cpus * 2 + 1, memory_processes - max_cron_threads))
+
+    # Every process has its own pool, plus the gevent process serving
+    # websockets: fewer workers rather than pools too small to be useful
+    budget = max_connections - RESERVED_CONNECTIONS
+    while workers > 1 and budget // (workers + max_cron_threads + 1) < MIN_DB_MAXCONN:
+        workers -= 1
+    if budget // (workers + max_cron_threads + 1) < MIN_DB_MAXCONN:
+        max_cron_threads = 1
+    db_maxconn = max(1, min(DEFAULT_DB_MAXCONN, budget // (workers + max_cron_threads + 1)))
+
+    return Tuning(
+        workers=workers,
+        max_cron_threads=max_cron_threads,
+        limit_memory_soft=DEFAULT_LIMIT_MEMORY_SOFT,
+        limit_memory_hard=DEFAULT_LIMIT_MEMORY_HARD,
+        limit_request=8192,
+        db_maxconn=db_maxconn,
+    )
+
+
+def auto_tune(runner: Runner, overrides: dict) -> dict[str, str]:
+    """Set the derived values on the runner, except those the profile sets itself
+
+    Returns where each value came from.
+    """
+    resources = detect_resources()
+    max_connections = pg.show_setting("max_connections", runner._get_pg_env())
+    tuning = compute_tuning(resources, int(max_connections or DEFAULT_MAX_CONNECTIONS))
+
+    sources = {}
+    for name, value in asdict(tuning).items():
+        if overrides.get(name) is not None:
+            sources[name] = "profile"
+        else:
+            setattr(runner, name, value)
+            sources[name] = "auto"
+
+    print(
+        f"Auto-tuning for {resources.cpus:g} CPUs and {resources.memory / MB / 1024:.1f}GB "
+        f"({resources.source}), PostgreSQL max_connections={max_connections or '?'}"
+    )
+    for name, source in sources.items():
+        value = getattr(runner, name)
+        shown = f"{value / MB:.0f}MB" if name.startswith("limit_memory") else value
+        print(f"  {name:<20}{shown!s:>10}  ({source})")
+    return sources
@@ -0,0 +1,101 @@
+import json
+import subprocess
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+from run_odoo import stats, utils
+from run_odoo.runner import PYTHON_VERSIONS, Runner
+
+
+@dataclass
+class StartupRun:
+    wall_time: float
+    peak_rss_kb: int
+
+
+def drop_os_caches() -> None:
+    """Flush dirty pages and drop the page cache, dentries and inodes (needs sudo)"""
+    subprocess.run(["sync"], check=True)
+    subprocess.run(
+        ["sudo", "sh", "-c", "echo 3 > /proc/sys/vm/drop_caches"], check=True
+    )
+
+
+def startup_command(runner: Runner) -> list[str]:
+    """odoo-bin command loading the registry and exiting, without HTTP"""
+    runner._set_default_db()
+    options = runner._prepare_params()
+    options.append("--no-http")
+    if "--stop-after-init" not in options:
+        options.append("--stop-after-init")
+    return runner._build_command(options)
+
+
+def bench_startup(
+    runner: Runner, runs: int = 10, warmup: int = 1, drop_caches: bool = False
+) -> list[StartupRun]:
+    cmd = startup_command(runner)
+    env = runner._get_venv_env()
+    print(f"Command: {' '.join(cmd)}")
+
+    results = []
+    for index in range(warmup + runs):
+        if drop_caches:
+            drop_os_caches()
+        returncode, wall_time, peak_rss_kb = utils.run_with_rusage(
+            cmd, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        if returncode != 0:
+            raise RuntimeError(
+                f"Odoo exited with code {returncode}, run it without bench-startup to see why"
+            )
+        if index < warmup:
+            print(f"warmup {index + 1}/{warmup}: {wall_time:.2f}s")
+            continue
+        print(f"run {index - warmup + 1}/{runs}: {wall_time:.2f}s, {peak_rss_kb / 1024:.0f}MB")
+        results.append(StartupRun(wall_time, peak_rss_kb))
+    return results
+
+
+def describe_setup(runner: Runner, drop_caches: bool) -> dict:
+    """What the numbers depend on, to compare runs across configurations"""
+    return {
+        "version": runner.version,
+        "python": PYTHON_VERSIONS[runner.version],
+        "workers": runner.workers,
+        "addons_paths": runner._get_addons_paths(),
+        "extra_params": runner.extra_params,
+        "cold_cache": drop_caches,
+    }
+
+
+def print_startup_report(results: list[StartupRun], setup: dict) -> None:
+    wall = stats.summarize([run.wall_time for run in results])
+    rss = stats.summarize([run.peak_rss_kb / 1024 for run in results])
+    print()
+    print(
+        f"Odoo {setup['version']} on Python {setup['python']}, workers={setup['workers']}, "
+        f"{len(setup['addons_paths'])} addons paths, "
+        f"{'cold' if setup['cold_cache'] else 'warm'} cache"
+    )
+    print(f"{'':<14}{'min':>10}{'median':>10}{'p95':>10}{'max':>10}")
+    print(
+        f"{'startup (s)':<14}{wall['min']:>10.2f}{wall['median']:>10.2f}"
+        f"{wall['p95']:>10.2f}{wall['max']:>10.2f}"
+    )
+    print(
+        f"{'peak RSS (MB)':<14}{rss['min']:>10.0f}{rss['median']:>10.0f}"
+        f"{rss['p95']:>10.0f}{rss['max']:>10.0f}"
+    )
+
+
+def write_startup_report(results: list[StartupRun], setup: dict, output: Path) -> None:
+    report = {
+        "setup": setup,
+        "wall_time": stats.summarize([run.wall_time for run in results]),
+        "peak_rss_kb": stats.summarize([run.peak_rss_kb for run in results]),
+        "runs": [asdict(run) for run in results],
+    }
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Report written to {output}")
@@ -1,9 +1,34 @@
+import subprocess
+import sys
 import typer
+import time
+from concurrent.futures import ThreadPoolExecutor
 
 from typing_extensions import Annotated
 from typing import Optional
-from run_odoo.runner import Runner
+from run_odoo.runner import LOG_PROFILES, Runner
 from run_odoo.config import get_config_for_profile, _search_cwd, load_config
+from run_odoo import db as pg
+from run_odoo import (
+    autotune,
+    bench,
+    dbstats,
+    explain,
+    indexadvisor,
+    loadtest,
+    matrix,
+    replay,
+    sampling,
+    shelld,
+    smoke,
+    sqlexport,
+    supervisor,
+    utils,
+)
+from run_odoo.importtime import ImportTimeProfiler
+from run_odoo.install_profile import InstallProfiler
+from run_odoo.procstat import ProcessSampler
+from run_odoo.sqlstats import SqlReport
 from typing import List
 from pathlib import Path
 
@@ -11,6 +36,70 @@ from pathlib import Path
 app = typer.Typer()
 
 
+# Server limits a profile may set, all left to Odoo's defaults otherwise
+SERVER_LIMITS = ("limit_memory_soft", "limit_memory_hard", "limit_request", "db_maxconn")
+
+# Shared by every command starting Odoo from a single runner
+TimingsOption = Annotated[
+    bool, typer.Option(help="Print how long each setup and startup phase took")
+]
+
+
+def _profile_runner(profile: str, auto_tune: bool = False, **kwargs) -> Runner:
+    """Build a Runner from a profile of the configuration file"""
+    config = get_config_for_profile(config_path=None, profile_name=profile)
+    if not config:
+        raise typer.BadParameter(f"No configuration found for profile '{profile}'")
+    path = config.get("path", None)
+    options = dict(
+        addons=config.get("addons", None),
+        version=config.get("version", None),
+        path=Path(path) if path else None,
+        db=config.get("db", None),
+        enterprise=config.get("enterprise", False),
+        themes=config.get("themes", False),
+        extra_params=config.get("extra_params", None),
+        http_port=config.get("http_port", 8069),
+        log_level=config.get("log_level", "warn"),
+        log_profile=config.get("log_profile", None),
+        workers=config.get("workers", 0),
+        max_cron_threads=config.get("max_cron_threads", 0),
+        vacuum_analyze=config.get("vacuum_analyze", False),
+        **{name: config.get(name) for name in SERVER_LIMITS},
+    )
+    options.update(kwargs)
+    runner = Runner(**options)
+    if auto_tune:
+        autotune.auto_tune(runner, overrides={**config, **kwargs})
+    return runner
+
+
+def _observers(
+    install_report: bool = False,
+    sql_report: Optional[Path] = None,
+    proc_stats: Optional[Path] = None,
+    proc_interval: float = 1.0,
+) -> list:
+    observers = []
+    if install_report:
+        observers.append(InstallProfiler())
+    if sql_report:
+        observers.append(SqlReport(output=sql_report))
+    if proc_stats:
+        observers.append(ProcessSampler(output=proc_stats, interval=proc_interval))
+    return observers
+
+
+def _stop_shell_daemon(runner: Runner) -> None:
+    """Stop the database's shell daemon before modules are installed or updated
+
+    Its registry would keep the code from before, and its connection blocks
+    copying, dropping or renaming the database.
+    """
+    if shelld.stop_daemon(runner.shell_socket()):
+        print(f"Stopped the shell daemon of '{runner.db}', it restarts on next use")
+
+
 @app.command()
 def try_module(
     module: Annotated[str, typer.Argument(help="Module name to try")],
@@ -21,7 +110,32 @@ def try_module(
     themes: Annotated[bool, typer.Option(help="Include theme modules")] = False,
     port: Annotated[int, typer.Option(help="HTTP port")] = 8069,
     log_level: Annotated[str, typer.Option(help="Log level")] = "warn",
-    workers: Annotated[int, typer.Option(help="Number of workers")] = 0,
+    log_profile: Annotated[
+        Optional[str], typer.Option(help="Logging profile: quiet, dev, debug-sql or bench")
+    ] = None,
+    workers: Annotated[
+        Optional[int], typer.Option(help="Number of workers, 0 unless set or auto-tuned")
+    ] = None,
+    install_report: Annotated[
+        bool, typer.Option(help="Report time and SQL queries spent per module")
+    ] = False,
+    sql_report: Annotated[
+        Optional[Path],
+        typer.Option(help="Aggregate SQL queries by shape and write a JSON report on exit"),
+    ] = None,
+    timings: TimingsOption = False,
+    trace: Annotated[
+        bool, typer.Option(help="Record wall time and SQL usage of every HTTP request")
+    ] = False,
+    proc_stats: Annotated[
+        Optional[Path],
+        typer.Option(help="Sample RSS, USS, CPU and threads of Odoo processes to a CSV file"),
+    ] = None,
+    proc_interval: Annotated[float, typer.Option(help="Seconds between process samples")] = 1.0,
+    auto_tune: Annotated[
+        bool,
+        typer.Option(help="Size workers, cron threads and limits for this machine"),
+    ] = False,
 ):
     if profile:
         config = get_config_for_profile(config_path=None, profile_name=profile)
@@ -38,7 +152,7 @@ def try_module(
                 "db": db,
             }
 
-    Runner(
+    runner = Runner(
         addons=config.get("addons", [module]),
         version=config.get("version", version),
         path=config.get("path", None),
@@ -48,8 +162,20 @@ def try_module(
         themes=config.get("themes", themes),
         http_port=config.get("http_port", port),
         log_level=config.get("log_level", log_level),
-        workers=config.get("workers", workers),
-    ).run()
+        log_profile=config.get("log_profile", log_profile),
+        workers=workers if workers is not None else config.get("workers", 0),
+        max_cron_threads=config.get("max_cron_threads", 0),
+        observers=_observers(install_report, sql_report, proc_stats, proc_interval),
+        timings=timings,
+        trace=trace,
+        **{name: config.get(name) for name in SERVER_LIMITS},
+    )
+    if auto_tune:
+        # Values given on the command line win over the tuning, like profile ones
+        autotune.auto_tune(runner, overrides={**config, "workers": workers})
+    if runner.install_modules:
+        _stop_shell_daemon(runner)
+    runner.run()
 
 
 @app.command()
@@ -59,6 +185,30 @@ def test_module(
     profile: Annotated[str, typer.Option()] = "",
     db: Annotated[str, typer.Option(help="Database name")] = None,
     enterprise: Annotated[bool, typer.Option(help="Use Enterprise version")] = False,
+    reuse_db: Annotated[
+        bool,
+        typer.Option(help="Test a copy of a template database instead of reinstalling"),
+    ] = False,
+    update: Annotated[
+        str, typer.Option(help="Comma-separated changed modules to update with --reuse-db")
+    ] = "",
+    rebuild_template: Annotated[
+        bool, typer.Option(help="Recreate the template database used by --reuse-db")
+    ] = False,
+    vacuum_analyze: Annotated[
+        bool, typer.Option(help="VACUUM (ANALYZE) the template database once installed")
+    ] = False,
+    coverage: Annotated[
+        bool, typer.Option(help="Measure coverage of the tested modules' source")
+    ] = False,
+    coverage_erase: Annotated[
+        bool, typer.Option(help="Discard coverage data collected by previous runs")
+    ] = False,
+    sql_report: Annotated[
+        Optional[Path],
+        typer.Option(help="Aggregate SQL queries by shape and write a JSON report on exit"),
+    ] = None,
+    timings: TimingsOption = False,
 ):
     """Run tests for a specific module"""
     if profile:
@@ -76,14 +226,114 @@ def test_module(
                 "db": db,
             }
 
-    Runner(
+    runner = Runner(
         addons=config.get("addons", [module]),
         version=config.get("version", version),
         path=config.get("path", None),
         db=config.get("db", db),
         enterprise=config.get("enterprise", enterprise),
         extra_params=config.get("extra_params", None),
-    ).run_tests()
+        log_profile=config.get("log_profile", None),
+        coverage=coverage,
+        observers=_observers(sql_report=sql_report),
+        timings=timings,
+        vacuum_analyze=vacuum_analyze or config.get("vacuum_analyze", False),
+    )
+    _stop_shell_daemon(runner)
+    runner.run_tests(
+        reuse_db=reuse_db,
+        update_modules=[m for m in update.split(",") if m],
+        rebuild_template=rebuild_template,
+        erase_coverage=coverage_erase,
+    )
+
+
+@app.command()
+def test_matrix(
+    module: Annotated[str, typer.Argument(help="Module name to test")],
+    versions: Annotated[
+        str, typer.Option(help="Comma-separated Odoo versions")
+    ] = "16.0,17.0,18.0",
+    profile: Annotated[str, typer.Option()] = "",
+    enterprise: Annotated[bool, typer.Option(help="Use Enterprise version")] = False,
+):
+    """Run tests for a module on several Odoo versions in parallel"""
+    if profile:
+        config = get_config_for_profile(config_path=None, profile_name=profile)
+    else:
+        # Check for local config file
+        if path := _search_cwd():
+            config = load_config(path)
+        else:
+            config = {"addons": [module], "enterprise": enterprise}
+
+    try:
+        version_list = matrix.parse_versions(versions)
+    except ValueError as e:
+        raise typer.BadParameter(str(e))
+
+    results = matrix.run_test_matrix(
+        addons=config.get("addons", [module]),
+        versions=version_list,
+        enterprise=config.get("enterprise", enterprise),
+        path=config.get("path", None),
+        extra_params=config.get("extra_params", None),
+    )
+    matrix.print_matrix_report(results)
+    if not all(result.success for result in results):
+        raise typer.Exit(1)
+
+
+@app.command()
+def smoke_install(
+    version: Annotated[float, typer.Argument(help="Odoo version (e.g. 16.0)")] = 18.0,
+    profile: Annotated[str, typer.Option()] = "",
+    enterprise: Annotated[bool, typer.Option(help="Use Enterprise version")] = False,
+    batch_size: Annotated[int, typer.Option(help="Modules installed per database")] = 10,
+    jobs: Annotated[int, typer.Option(help="Batches installed in parallel")] = 4,
+    exclude: Annotated[
+        str, typer.Option(help="Comma-separated module name patterns to skip")
+    ] = ",".join(smoke.DEFAULT_EXCLUDES),
+    without_demo: Annotated[bool, typer.Option(help="Install without demo data")] = False,
+    keep_dbs: Annotated[bool, typer.Option(help="Keep batch databases afterwards")] = False,
+    rebuild_template: Annotated[
+        bool, typer.Option(help="Recreate the template database with base installed")
+    ] = False,
+    output: Annotated[Optional[Path], typer.Option(help="Write a JSON report")] = None,
+):
+    """Install every installable module in batches and report failures"""
+    if profile:
+        config = get_config_for_profile(config_path=None, profile_name=profile)
+    else:
+        # Check for local config file
+        if path := _search_cwd():
+            config = load_config(path)
+        else:
+            config = {"version": version, "enterprise": enterprise}
+
+    runner = Runner(
+        version=config.get("version", version),
+        path=config.get("path", None),
+        enterprise=config.get("enterprise", enterprise),
+        extra_params=config.get("extra_params", None),
+        log_profile=config.get("log_profile", None),
+        install_modules=False,
+    )
+    smoke_test = smoke.SmokeInstall(
+        runner,
+        work_dir=runner.app_dir / "smoke" / str(runner.version),
+        batch_size=batch_size,
+        jobs=jobs,
+        excludes=[pattern for pattern in exclude.split(",") if pattern],
+        without_demo=without_demo,
+        keep_dbs=keep_dbs,
+    )
+    results = smoke_test.run(rebuild_template=rebuild_template)
+    smoke.print_report(results)
+    if output:
+        smoke.write_report(results, output)
+    if not all(result.success for result in results):
+        raise typer.Exit(1)
 
 
 @app.command()
@@ -93,6 +343,29 @@ def upgrade_module(
     profile: Annotated[str, typer.Option()] = "",
     db: Annotated[str, typer.Option(help="Database name")] = None,
     enterprise: Annotated[bool, typer.Option(help="Use Enterprise version")] = False,
+    install_report: Annotated[
+        bool, typer.Option(help="Report time and SQL queries spent per module")
+    ] = False,
+    sql_report: Annotated[
+        Optional[Path],
+        typer.Option(help="Aggregate SQL queries by shape and write a JSON report on exit"),
+    ] = None,
+    timings: TimingsOption = False,
+    vacuum_analyze: Annotated[
+        bool, typer.Option(help="VACUUM (ANALYZE) the database after the upgrade")
+    ] = False,
+    snapshot: Annotated[
+        bool,
+        typer.Option(help="Copy the database first and put the copy back if the upgrade fails"),
+    ] = False,
+    rehearse: Annotated[
+        bool,
+        typer.Option(help="Upgrade from a snapshot and put it back even when the upgrade succeeds"),
+    ] = False,
+    force: Annotated[
+        bool,
+        typer.Option(help="Replace a <db>_snapshot database that no previous snapshot created"),
+    ] = False,
 ):
     """Upgrade a specific module in existing database"""
     if profile:
@@ -110,14 +383,25 @@ def upgrade_module(
                 "db": db,
             }
 
-    Runner(
+    runner = Runner(
         addons=config.get("addons", [module]),
         version=config.get("version", version),
         path=config.get("path", None),
         db=config.get("db", db),
         enterprise=config.get("enterprise", enterprise),
         extra_params=config.get("extra_params", None),
-    ).upgrade_modules()
+        log_profile=config.get("log_profile", None),
+        # Snapshots exist to rehearse upgrades, which is when time per module matters
+        observers=_observers(install_report or snapshot or rehearse, sql_report),
+        timings=timings,
+        vacuum_analyze=vacuum_analyze or config.get("vacuum_analyze", False),
+    )
+    _stop_shell_daemon(runner)
+    try:
+        runner.upgrade_modules(snapshot=snapshot, rehearse=rehearse, force=force)
+    except (subprocess.CalledProcessError, RuntimeError) as e:
+        print(f"Error: {e}")
+        raise typer.Exit(1)
 
 
 @app.command()
@@ -127,6 +411,16 @@ def shell(
     profile: Annotated[str, typer.Option()] = "",
     db: Annotated[str, typer.Option(help="Database name")] = None,
     enterprise: Annotated[bool, typer.Option(help="Use Enterprise version")] = False,
+    timings: TimingsOption = False,
+    daemon: Annotated[
+        bool,
+        typer.Option(
+            help="Run in the database's shell daemon, keeping the registry loaded between shells"
+        ),
+    ] = False,
+    stop_daemon: Annotated[
+        bool, typer.Option(help="Stop the database's shell daemon and exit")
+    ] = False,
 ):
     """Start Odoo shell for a database"""
     if profile:
@@ -144,15 +438,443 @@ def shell(
                 "db": db,
             }
 
-    Runner(
+    runner = Runner(
         addons=config.get("addons", [module]),
         version=config.get("version", version),
         path=config.get("path", None),
         db=config.get("db", db),
         enterprise=config.get("enterprise", enterprise),
         extra_params=config.get("extra_params", None),
+        log_profile=config.get("log_profile", None),
         install_modules=False,  # Don't install modules for shell
-    ).run_shell()
+        timings=timings,
+    )
+    if stop_daemon:
+        if not shelld.stop_daemon(runner.shell_socket()):
+            print(f"No shell daemon is running for '{runner.db}'")
+        return
+    if daemon:
+        try:
+            path = shelld.ensure_daemon(runner)
+        except RuntimeError as e:
+            print(f"Error: {e}")
+            raise typer.Exit(1)
+        shelld.interact(path, runner.db)
+        return
+    runner.run_shell()
+
+
+@app.command("exec")
+def exec_scripts(
+    db: Annotated[str, typer.Argument(help="Database name")],
+    scripts: Annotated[
+        List[Path],
+        typer.Argument(
+            help="Python scripts to run in order, with env defined", exists=True, dir_okay=False
+        ),
+    ],
+    version: Annotated[float, typer.Option(help="Odoo version (e.g. 16.0)")] = 18.0,
+    profile: Annotated[str, typer.Option()] = "",
+    enterprise: Annotated[bool, typer.Option(help="Use Enterprise version")] = False,
+    commit: Annotated[
+        bool, typer.Option(help="Commit the batch, unless a script failed without --keep-going")
+    ] = False,
+    keep_going: Annotated[
+        bool,
+        typer.Option(help="Run the next scripts when one fails, only its changes are undone"),
+    ] = False,
+    daemon: Annotated[
+        bool,
+        typer.Option(
+            help="Run in the database's shell daemon, starting it if needed, "
+            "instead of a one-off Odoo shell"
+        ),
+    ] = False,
+    timings: TimingsOption = False,
+):
+    """Run scripts one after the other in one transaction, each in its own savepoint"""
+    if profile:
+        config = get_config_for_profile(config_path=None, profile_name=profile)
+    elif config_path := _search_cwd():
+        config = load_config(config_path)
+    else:
+        config = {"version": version, "enterprise": enterprise}
+
+    runner = Runner(
+        addons=config.get("addons", None),
+        version=config.get("version", version),
+        path=config.get("path", None),
+        db=db,
+        enterprise=config.get("enterprise", enterprise),
+        extra_params=config.get("extra_params", None),
+        log_profile=config.get("log_profile", None),
+        install_modules=False,
+        timings=timings,
+    )
+    if not daemon:
+        if not runner.exec_scripts(scripts, commit=commit, keep_going=keep_going):
+            raise typer.Exit(1)
+        return
+    try:
+        path = shelld.ensure_daemon(runner)
+    except RuntimeError as e:
+        print(f"Error: {e}")
+        raise typer.Exit(1)
+    if not shelld.run_scripts(path, scripts, commit=commit, keep_going=keep_going):
+        raise typer.Exit(1)
+
+
+@app.command("explain")
+def explain_domain(
+    db: Annotated[str, typer.Argument(help="Database name")],
+    model: Annotated[str, typer.Argument(help="Model name, e.g. account.move.line")],
+    domain: Annotated[str, typer.Argument(help="Search domain as a Python literal")] = "[]",
+    order: Annotated[
+        Optional[str], typer.Option(help="Order clause, the model's _order otherwise")
+    ] = None,
+    limit: Annotated[Optional[int], typer.Option(help="Limit, as list views use")] = None,
+    user: Annotated[
+        Optional[str], typer.Option(help="Login whose record rules apply, superuser otherwise")
+    ] = None,
+    version: Annotated[float, typer.Option(help="Odoo version (e.g. 16.0)")] = 18.0,
+    profile: Annotated[str, typer.Option()] = "",
+    enterprise: Annotated[bool, typer.Option(help="Use Enterprise version")] = False,
+    timings: TimingsOption = False,
+):
+    """EXPLAIN ANALYZE the query the ORM runs for a search domain"""
+    if profile:
+        config = get_config_for_profile(config_path=None, profile_name=profile)
+    elif config_path := _search_cwd():
+        config = load_config(config_path)
+    else:
+        config = {"version": version, "enterprise": enterprise}
+
+    runner = Runner(
+        addons=config.get("addons", None),
+        version=config.get("version", version),
+        path=config.get("path", None),
+        db=db,
+        enterprise=config.get("enterprise", enterprise),
+        extra_params=config.get("extra_params", None),
+        log_profile="quiet",
+        install_modules=False,
+        timings=timings,
+    )
+    try:
+        result = explain.explain_domain(runner, model, domain, order, limit, user)
+    except RuntimeError as e:
+        print(f"Error: {e}")
+        raise typer.Exit(1)
+    explain.print_report(result)
+
+
+@app.command()
+def up(
+    profiles: Annotated[List[str], typer.Argument(help="Profile names from config")],
+    interval: Annotated[float, typer.Option(help="Seconds between health checks")] = 2.0,
+    max_restarts: Annotated[
+        int, typer.Option(help="Give up on an instance after this many crashes")
+    ] = 5,
+):
+    """Run several profiles side by side, on free ports, restarting crashed instances"""
+    if len(set(profiles)) != len(profiles):
+        raise typer.BadParameter("Each profile can only be started once")
+
+    # Environments are prepared concurrently, like test-matrix does
+    with ThreadPoolExecutor(max_workers=len(profiles)) as executor:
+        runners = dict(zip(profiles, executor.map(_profile_runner, profiles)))
+    for runner in runners.values():
+        if runner.install_modules:
+            _stop_shell_daemon(runner)
+    try:
+        instances = supervisor.prepare_instances(runners)
+    except ValueError as e:
+        raise typer.BadParameter(str(e))
+    supervisor.Supervisor(instances, interval=interval, max_restarts=max_restarts).run()
+
+
+@app.command()
+def bench_startup(
+    profile: Annotated[str, typer.Argument(help="Profile name from config")],
+    runs: Annotated[int, typer.Option(help="Number of measured runs")] = 10,
+    warmup: Annotated[int, typer.Option(help="Runs discarded before measuring")] = 1,
+    drop_caches: Annotated[
+        bool, typer.Option(help="Drop OS caches before each run (uses sudo)")
+    ] = False,
+    output: Annotated[Optional[Path], typer.Option(help="Write a JSON report")] = None,
+):
+    """Measure Odoo startup time and peak memory over repeated runs"""
+    runner = _profile_runner(profile, install_modules=False, stop_after_init=True)
+    results = bench.bench_startup(runner, runs=runs, warmup=warmup, drop_caches=drop_caches)
+    setup = bench.describe_setup(runner, drop_caches)
+    bench.print_startup_report(results, setup)
+    if output:
+        bench.write_startup_report(results, setup, output)
+
+
+@app.command()
+def bench_http(
+    profile: Annotated[str, typer.Argument(help="Profile name from config")],
+    mix: Annotated[
+        str, typer.Option(help="Request mix: web, rpc, static, mixed or a JSON file")
+    ] = "mixed",
+    concurrency: Annotated[int, typer.Option(help="Concurrent sessions")] = 10,
+    duration: Annotated[float, typer.Option(help="Seconds to measure")] = 30,
+    requests: Annotated[
+        int, typer.Option(help="Measure this many requests instead of a duration")
+    ] = 0,
+    warmup: Annotated[float, typer.Option(help="Seconds of load discarded before measuring")] = 5,
+    login: Annotated[str, typer.Option(help="User for JSON-RPC calls")] = "admin",
+    password: Annotated[str, typer.Option(help="Password for JSON-RPC calls")] = "admin",
+    attach: Annotated[
+        bool, typer.Option(help="Load an Odoo already running on the profile's port")
+    ] = False,
+    auto_tune: Annotated[
+        bool,
+        typer.Option(help="Size workers, cron threads and limits for this machine"),
+    ] = False,
+    timings: TimingsOption = False,
+    output: Annotated[Optional[Path], typer.Option(help="Write a JSON report")] = None,
+):
+    """Measure HTTP throughput and latency per endpoint under concurrent load"""
+    try:
+        endpoints = loadtest.load_mix(mix)
+    except ValueError as e:
+        raise typer.BadParameter(str(e))
+
+    runner = _profile_runner(
+        profile, auto_tune=auto_tune, install_modules=False, timings=timings
+    )
+    try:
+        result = loadtest.bench_http(
+            runner,
+            {
+                "endpoints": endpoints,
+                "concurrency": concurrency,
+                "login": login,
+                "password": password,
+            },
+            duration=duration,
+            requests=requests or None,
+            warmup=warmup,
+            attach=attach,
+        )
+    except (RuntimeError, loadtest.HttpError) as e:
+        print(e)
+        raise typer.Exit(1)
+
+    summary = loadtest.summarize(result)
+    loadtest.print_report(summary)
+    if output:
+        setup = bench.describe_setup(runner, drop_caches=False)
+        setup.update({"mix": mix, "concurrency": concurrency})
+        loadtest.write_report(summary, setup, output)
+
+
+@app.command()
+def bench_logging(
+    profile: Annotated[str, typer.Argument(help="Profile name from config")],
+    log_profiles: Annotated[
+        str, typer.Option(help="Comma-separated log profiles to compare")
+    ] = ",".join(LOG_PROFILES),
+    mix: Annotated[
+        str, typer.Option(help="Request mix: web, rpc, static, mixed or a JSON file")
+    ] = "mixed",
+    concurrency: Annotated[int, typer.Option(help="Concurrent sessions")] = 10,
+    duration: Annotated[float, typer.Option(help="Seconds to measure per log profile")] = 30,
+    warmup: Annotated[float, typer.Option(help="Seconds of load discarded before measuring")] = 5,
+    login: Annotated[str, typer.Option(help="User for JSON-RPC calls")] = "admin",
+    password: Annotated[str, typer.Option(help="Password for JSON-RPC calls")] = "admin",
+):
+    """Measure request throughput under each logging profile"""
+    selected = [name.strip() for name in log_profiles.split(",") if name.strip()]
+    unknown = [name for name in selected if name not in LOG_PROFILES]
+    if unknown:
+        raise typer.BadParameter(f"Unknown log profiles: {', '.join(unknown)}")
+    try:
+        endpoints = loadtest.load_mix(mix)
+    except ValueError as e:
+        raise typer.BadParameter(str(e))
+
+    runner = _profile_runner(profile, install_modules=False)
+    try:
+        summaries = loadtest.bench_log_profiles(
+            runner,
+            {
+                "endpoints": endpoints,
+                "concurrency": concurrency,
+                "login": login,
+                "password": password,
+            },
+            selected,
+            duration=duration,
+            warmup=warmup,
+        )
+    except (RuntimeError, loadtest.HttpError) as e:
+        print(e)
+        raise typer.Exit(1)
+    loadtest.print_log_profiles_report(summaries)
+
+
+@app.command()
+def record(
+    profile: Annotated[str, typer.Argument(help="Profile name from config")],
+    output: Annotated[
+        Path, typer.Option(help="JSON lines file the calls are appended to")
+    ] = Path("calls.jsonl"),
+    timings: TimingsOption = False,
+):
+    """Run Odoo and record every JSON-RPC call made to it, for replay"""
+    print(f"Recording JSON-RPC calls to {output}, stop Odoo with Ctrl+C when done")
+    _profile_runner(
+        profile, install_modules=False, record_calls=output, timings=timings
+    ).run()
+
+
+@app.command("replay")
+def replay_calls(
+    profile: Annotated[str, typer.Argument(help="Profile name from config")],
+    calls: Annotated[Path, typer.Argument(help="Calls recorded with the record command")],
+    sessions: Annotated[int, typer.Option(help="Concurrent sessions")] = 10,
+    speed: Annotated[
+        float, typer.Option(help="Replay speed relative to the recording, 0 for no pauses")
+    ] = 1.0,
+    login: Annotated[str, typer.Option(help="User the calls are made as")] = "admin",
+    password: Annotated[str, typer.Option(help="Password of that user")] = "admin",
+    attach: Annotated[
+        bool, typer.Option(help="Replay against an Odoo already running on the profile's port")
+    ] = False,
+    timings: TimingsOption = False,
+    output: Annotated[Optional[Path], typer.Option(help="Write a JSON report")] = None,
+):
+    """Replay recorded JSON-RPC calls and report latency per model method"""
+    if not calls.exists():
+        raise typer.BadParameter(f"{calls} does not exist")
+    with open(calls) as f:
+        recorded = replay.read_calls(f)
+
+    runner = _profile_runner(profile, install_modules=False, timings=timings)
+    try:
+        result = replay.replay(
+            runner,
+            recorded,
+            {"sessions": sessions, "speed": speed, "login": login, "password": password},
+            attach=attach,
+        )
+    except (RuntimeError, loadtest.HttpError) as e:
+        print(e)
+        raise typer.Exit(1)
+
+    summary = loadtest.summarize(result)
+    loadtest.print_report(summary)
+    if output:
+        setup = bench.describe_setup(runner, drop_caches=False)
+        setup.update({"calls": str(calls), "sessions": sessions, "speed": speed})
+        loadtest.write_report(summary, setup, output)
+
+
+@app.command()
+def compare_runs(
+    baseline: Annotated[Path, typer.Argument(help="Report of the reference run")],
+    candidate: Annotated[Path, typer.Argument(help="Report of the run to check")],
+    tolerance: Annotated[
+        float, typer.Option(help="Allowed p95 slowdown per endpoint, in percent")
+    ] = 10,
+):
+    """Compare latency distributions of two bench-http or replay reports"""
+    baseline_report = replay.load_report(baseline)
+    candidate_report = replay.load_report(candidate)
+    comparisons = replay.compare(baseline_report, candidate_report)
+    regressions = replay.print_comparison(
+        comparisons, baseline_report, candidate_report, tolerance
+    )
+    if regressions:
+        print(f"\n{len(regressions)} endpoints are more than {tolerance:.0f}% slower at p95")
+        raise typer.Exit(1)
+
+
+@app.command()
+def profile_imports(
+    profile: Annotated[str, typer.Argument(help="Profile name from config")],
+    top: Annotated[int, typer.Option(help="Number of entries per ranking")] = 20,
+    timings: TimingsOption = False,
+):
+    """Profile Python import time of the Odoo server and its addons"""
+    config = get_config_for_profile(config_path=None, profile_name=profile)
+    runner = _profile_runner(
+        profile,
+        install_modules=False,
+        stop_after_init=True,
+        extra_params=f"{config.get('extra_params') or ''} --no-http".strip(),
+        observers=[ImportTimeProfiler(top=top)],
+        timings=timings,
+    )
+    runner.run()
+
+
+@app.command("profile")
+def profile_cpu(
+    profile: Annotated[str, typer.Argument(help="Profile name from config")],
+    duration: Annotated[int, typer.Option(min=1, help="Seconds to sample")] = 60,
+    pid: Annotated[
+        Optional[int], typer.Option(help="Attach to a running Odoo instead of starting one")
+    ] = None,
+    rate: Annotated[int, typer.Option(help="Samples per second")] = 100,
+    output_dir: Annotated[Optional[Path], typer.Option(help="Where to write the profiles")] = None,
+    sudo: Annotated[bool, typer.Option(help="Run py-spy with sudo")] = False,
+    top: Annotated[int, typer.Option(help="Number of functions per process")] = 15,
+    timings: TimingsOption = False,
+):
+    """Sample Python stacks of Odoo and its workers with py-spy"""
+    runner = _profile_runner(profile, install_modules=False, timings=timings)
+    if output_dir is None:
+        output_dir = runner.app_dir / "profiles" / time.strftime("%Y%m%d-%H%M%S")
+    try:
+        results = sampling.profile_odoo(
+            runner, duration, output_dir, pid=pid, rate=rate, sudo=sudo
+        )
+    except RuntimeError as e:
+        print(e)
+        raise typer.Exit(1)
+    sampling.print_report(results, top)
+
+
+@app.command()
+def wait_ready(
+    port: Annotated[int, typer.Option(help="HTTP port")] = 8069,
+    host: Annotated[str, typer.Option(help="HTTP host")] = "127.0.0.1",
+    timeout: Annotated[float, typer.Option(help="Seconds to wait")] = 120,
+):
+    """Wait until an Odoo HTTP port accepts connections, for use in scripts"""
+    if not utils.wait_for_port(host, port, timeout=timeout):
+        print(f"Odoo is not accepting connections on {host}:{port} after {timeout}s")
+        raise typer.Exit(1)
+    print(f"Odoo is ready on {host}:{port}")
+
+
+def _db_connection(
+    db: Optional[str], profile: str, host: str, port: int, user: str, password: str
+) -> pg.ConnectionParams:
+    """Connection parameters from the options, overridden by the profile or local config file"""
+    # Load profile configuration if specified, or check for local config file
+    config = None
+    if profile:
+        config = get_config_for_profile(config_path=None, profile_name=profile)
+    elif path := _search_cwd():
+        config = load_config(path)
+    if config:
+        # Use config database connection parameters if available
+        host = config.get("db_host", host)
+        user = config.get("db_user", user)
+        password = config.get("db_password", password)
+        # Use config database name if not specified as argument
+        if not db:
+            db = config.get("db", db)
+
+    # Validate that we have a database name
+    if not db:
+        raise typer.BadParameter("Database name is required. Either specify it as an argument or include it in the profile configuration.")
+    return pg.ConnectionParams(dbname=db, host=host, port=port, user=user, password=password)
 
 
 @app.command()
@@ -168,38 +890,11 @@ def harlequin(
     try:
         import subprocess
 
-        # Load profile configuration if specified
-        if profile:
-            config = get_config_for_profile(config_path=None, profile_name=profile)
-            # Use profile database connection parameters if available
-            host = config.get("db_host", host)
-            user = config.get("db_user", user)
-            password = config.get("db_password", password)
-            # Use profile database name if not specified as argument
-            if not db:
-                db = config.get("db", db)
-        else:
-            # Check for local config file
-            if path := _search_cwd():
-                config = load_config(path)
-                # Use config database connection parameters if available
-                host = config.get("db_host", host)
-                user = config.get("db_user", user)
-                password = config.get("db_password", password)
-                # Use config database name if not specified as argument
-                if not db:
-                    db = config.get("db", db)
-
-        # Validate that we have a database name
-        if not db:
-            raise typer.BadParameter("Database name is required. Either specify it as an argument or include it in the profile configuration.")
-
-        # Build connection string
-        conn_str = f"postgresql://{user}:{password}@{host}:{port}/{db}"
+        connection = _db_connection(db, profile, host, port, user, password)
 
         # Try to run harlequin
-        cmd = ["harlequin", conn_str]
-        print(f"Starting Harlequin for database '{db}'...")
+        cmd = ["harlequin", connection.url]
+        print(f"Starting Harlequin for database '{connection.dbname}'...")
         subprocess.run(cmd, check=True)
 
     except FileNotFoundError:
@@ -212,5 +907,176 @@ def harlequin(
         raise typer.Exit(1)
 
 
+@app.command()
+def sql(
+    db: Annotated[Optional[str], typer.Argument(help="Database name")],
+    query: Annotated[str, typer.Argument(help="SELECT query, or @FILE to read it from a file")],
+    output: Annotated[
+        Optional[Path],
+        typer.Option("--output", "-o", help="File to write, CSV on stdout otherwise"),
+    ] = None,
+    fmt: Annotated[
+        Optional[str],
+        typer.Option(
+            "--format", help="csv, jsonl or parquet, guessed from the output file otherwise"
+        ),
+    ] = None,
+    batch_size: Annotated[
+        int, typer.Option(help="Rows fetched from the server-side cursor at a time")
+    ] = 10000,
+    profile: Annotated[str, typer.Option(help="Profile name from config")] = "",
+    host: Annotated[str, typer.Option(help="Database host")] = "localhost",
+    port: Annotated[int, typer.Option(help="Database port")] = 5432,
+    user: Annotated[str, typer.Option(help="Database user")] = "openerp",
+    password: Annotated[str, typer.Option(help="Database password")] = "openerp",
+):
+    """Run a query and stream its rows to CSV, JSON Lines or Parquet"""
+    if query.startswith("@"):
+        query = Path(query[1:]).read_text()
+    try:
+        fmt = sqlexport.output_format(output, fmt)
+    except ValueError as e:
+        raise typer.BadParameter(str(e))
+    connection_params = _db_connection(db, profile, host, port, user, password)
+
+    started = time.perf_counter()
+    try:
+        with connection_params.connect() as connection:
+            connection.read_only = True
+            count = sqlexport.export_query(connection, query, output, fmt, batch_size)
+    except Exception as e:
+        # psycopg's errors included, it is only imported when connecting
+        print(f"Error: {e}", file=sys.stderr)
+        raise typer.Exit(1)
+    # Keep stdout clean when the rows go there
+    print(
+        f"{count} rows exported in {time.perf_counter() - started:.1f}s"
+        + (f" to {output}" if output else ""),
+        file=sys.stderr,
+    )
+
+
+db_app = typer.Typer(help="Inspect and maintain Odoo databases")
+app.add_typer(db_app, name="db")
+
+
+@db_app.command("stats")
+def db_stats(
+    db: Annotated[Optional[str], typer.Argument(help="Database name")] = None,
+    top: Annotated[int, typer.Option(help="Rows shown per section")] = 10,
+    data_dir: Annotated[
+        Optional[Path], typer.Option(help="Odoo data_dir holding the filestore")
+    ] = None,
+    profile: Annotated[str, typer.Option(help="Profile name from config")] = "",
+    host: Annotated[str, typer.Option(help="Database host")] = "localhost",
+    port: Annotated[int, typer.Option(help="Database port")] = 5432,
+    user: Annotated[str, typer.Option(help="Database user")] = "openerp",
+    password: Annotated[str, typer.Option(help="Database password")] = "openerp",
+):
+    """Report table and index sizes, dead tuples, sequential scans and unused indexes"""
+    connection_params = _db_connection(db, profile, host, port, user, password)
+    try:
+        with connection_params.connect() as connection:
+            stats = dbstats.collect(connection, data_dir)
+    except Exception as e:
+        # psycopg's errors included, it is only imported when connecting
+        print(f"Error: {e}")
+        raise typer.Exit(1)
+    dbstats.print_report(stats, top)
+
+
+@db_app.command("advise-indexes")
+def db_advise_indexes(
+    db: Annotated[Optional[str], typer.Argument(help="Database name")] = None,
+    sql_log: Annotated[
+        Optional[Path],
+        typer.Option(
+            help="--sql-report JSON or Odoo log with SQL debug logging, "
+            "instead of pg_stat_statements",
+            exists=True,
+            dir_okay=False,
+        ),
+    ] = None,
+    top: Annotated[int, typer.Option(help="Candidates shown")] = 20,
+    profile: Annotated[str, typer.Option(help="Profile name from config")] = "",
+    host: Annotated[str, typer.Option(help="Database host")] = "localhost",
+    port: Annotated[int, typer.Option(help="Database port")] = 5432,
+    user: Annotated[str, typer.Option(help="Database user")] = "openerp",
+    password: Annotated[str, typer.Option(help="Database password")] = "openerp",
+):
+    """Rank filtered and sorted columns without index by the query time they cost"""
+    connection_params = _db_connection(db, profile, host, port, user, password)
+    try:
+        with connection_params.connect() as connection:
+            if sql_log:
+                statements = indexadvisor.from_sql_log(sql_log)
+            else:
+                statements = indexadvisor.from_pg_stat_statements(connection)
+            indexes, rows, fields = indexadvisor.read_catalog(connection)
+    except Exception as e:
+        # psycopg's errors included, it is only imported when connecting
+        print(f"Error: {e}")
+        raise typer.Exit(1)
+    print(f"Analyzing {len(statements)} statements from {sql_log or 'pg_stat_statements'}")
+    indexadvisor.print_report(indexadvisor.advise(statements, indexes, rows, fields), top)
+
+
+@db_app.command("maintain")
+def db_maintain(
+    db: Annotated[Optional[str], typer.Argument(help="Database name")] = None,
+    jobs: Annotated[
+        Optional[int], typer.Option(help="Parallel connections, half the CPUs up to 4 by default")
+    ] = None,
+    reindex: Annotated[bool, typer.Option(help="Rebuild bloated B-tree indexes")] = True,
+    min_index_size: Annotated[
+        int, typer.Option(help="Only consider indexes from this size, in MB")
+    ] = 10,
+    max_leaf_density: Annotated[
+        float, typer.Option(help="Rebuild indexes whose leaf pages are less full, in percent")
+    ] = 50,
+    install_pgstattuple: Annotated[
+        bool, typer.Option(help="Create the pgstattuple extension to measure index bloat")
+    ] = False,
+    profile: Annotated[str, typer.Option(help="Profile name from config")] = "",
+    host: Annotated[str, typer.Option(help="Database host")] = "localhost",
+    port: Annotated[int, typer.Option(help="Database port")] = 5432,
+    user: Annotated[str, typer.Option(help="Database user")] = "openerp",
+    password: Annotated[str, typer.Option(help="Database password")] = "openerp",
+):
+    """VACUUM (ANALYZE) every table in parallel and rebuild bloated indexes"""
+    connection = _db_connection(db, profile, host, port, user, password)
+    env = connection.env()
+    started = time.perf_counter()
+    try:
+        pg.vacuum_analyze(connection.dbname, env, jobs)
+        if reindex:
+            indexes = pg.bloated_indexes(
+                connection.dbname,
+                env,
+                min_index_size * 1024 * 1024,
+                max_leaf_density,
+                install=install_pgstattuple,
+            )
+            if indexes is None and install_pgstattuple:
+                print("pgstattuple could not be created, bloated indexes can't be measured")
+            elif indexes is None:
+                print(
+                    "pgstattuple is not installed in this database, bloated indexes can't be "
+                    "measured: use --install-pgstattuple to create it"
+                )
+            elif not indexes:
+                print("No bloated index found")
+            else:
+                print(f"Bloated indexes: {', '.join(indexes)}")
+                pg.reindex(connection.dbname, indexes, env, jobs)
+    except FileNotFoundError:
+        print("PostgreSQL client tools (psql, vacuumdb, reindexdb) are required")
+        raise typer.Exit(1)
+    except subprocess.CalledProcessError as e:
+        print(f"Error: {e}")
+        raise typer.Exit(1)
+    print(f"Maintenance of '{connection.dbname}' done in {time.perf_counter() - started:.1f}s")
+
+
 if __name__ == "__main__":
     app()
@@ -21,7 +21,14 @@ class Profile(TypedDict, total=False):
     extra_params: str
     http_port: int
     log_level: str
+    log_profile: str
     workers: int
+    max_cron_threads: int
+    limit_memory_soft: int
+    limit_memory_hard: int
+    limit_request: int
+    db_maxconn: int
+    vacuum_analyze: bool
     db_host: str
     db_user: str
     db_password: str
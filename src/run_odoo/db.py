@@ -0,0 +1,321 @@
+import os
+import shutil
+import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+
+# Odoo's default data_dir on Linux (appdirs.user_data_dir("Odoo"))
+DEFAULT_DATA_DIR = Path.home() / ".local" / "share" / "Odoo"
+
+
+@dataclass
+class ConnectionParams:
+    """Where to reach a database, as resolved from CLI options and profiles"""
+
+    dbname: str
+    host: str = "localhost"
+    port: int = 5432
+    user: str = "openerp"
+    password: str = "openerp"
+
+    @property
+    def url(self) -> str:
+        return f"postgresql://{self.user}:{self.password}@{self.host}:{self.port}/{self.dbname}"
+
+    def env(self) -> dict:
+        """Environment for PostgreSQL client tools connecting to the database's server"""
+        env = os.environ.copy()
+        env.update(
+            PGHOST=self.host, PGPORT=str(self.port), PGUSER=self.user, PGPASSWORD=self.password
+        )
+        return env
+
+    def connect(self, **kwargs):
+        """Open a psycopg connection, psycopg is installed along with harlequin[postgres]"""
+        try:
+            import psycopg
+        except ImportError:
+            raise RuntimeError(
+                "psycopg is not installed. Install it with: pip install 'psycopg[binary]'"
+            )
+        return psycopg.connect(self.url, **kwargs)
+
+
+def filestore_path(db_name: str, data_dir: Optional[Path] = None) -> Path:
+    """Return the filestore directory Odoo uses for a database"""
+    return (data_dir or DEFAULT_DATA_DIR) / "filestore" / db_name
+
+
+def list_databases(env: dict) -> list[str]:
+    """List database names on the server described by the PG* variables in env"""
+    result = subprocess.run(
+        ["psql", "-d", "postgres", "-tA", "-c", "SELECT datname FROM pg_database"],
+        capture_output=True,
+        text=True,
+        check=True,
+        env=env,
+    )
+    return [line.strip() for line in result.stdout.splitlines() if line.strip()]
+
+
+def show_setting(name: str, env: dict) -> Optional[str]:
+    """Value of a server setting such as max_connections, None if the server can't be reached"""
+    try:
+        result = subprocess.run(
+            ["psql", "-d", "postgres", "-tA", "-c", f"SHOW {name}"],
+            capture_output=True,
+            text=True,
+            env=env,
+        )
+    except FileNotFoundError:
+        return None
+    if result.returncode != 0:
+        return None
+    return result.stdout.strip()
+
+
+def _psql(sql: str, env: dict, single_transaction: bool = False, **variables: str):
+    """Run SQL on the maintenance database, names passed as psql variables
+
+    The script refers to them as :"name" for identifiers and :'name' for
+    literals, psql quotes them.
+    """
+    cmd = ["psql", "-d", "postgres", "-tA", "-v", "ON_ERROR_STOP=1"]
+    if single_transaction:
+        cmd.append("--single-transaction")
+    for name, value in variables.items():
+        cmd.extend(["-v", f"{name}={value}"])
+    return subprocess.run(cmd, input=sql, capture_output=True, text=True, env=env)
+
+
+def database_exists(db_name: str, env: dict) -> bool:
+    """Check whether a database exists"""
+    return db_name in list_databases(env)
+
+
+def drop_database(db_name: str, env: dict, data_dir: Optional[Path] = None) -> None:
+    """Drop a database and its filestore if they exist"""
+    subprocess.run(["dropdb", "--if-exists", db_name], check=True, env=env)
+    filestore = filestore_path(db_name, data_dir)
+    if filestore.exists():
+        shutil.rmtree(filestore)
+
+
+def rename_database(
+    db_name: str, new_name: str, env: dict, data_dir: Optional[Path] = None
+) -> None:
+    """Rename a database and its filestore"""
+    result = _psql('ALTER DATABASE :"old" RENAME TO :"new";', env, old=db_name, new=new_name)
+    if result.returncode != 0:
+        raise RuntimeError(f"Could not rename '{db_name}' to '{new_name}': {result.stderr.strip()}")
+    filestore = filestore_path(db_name, data_dir)
+    if filestore.exists():
+        filestore.rename(filestore_path(new_name, data_dir))
+
+
+def clone_database(
+    template: str, db_name: str, env: dict, data_dir: Optional[Path] = None
+) -> None:
+    """Replace db_name with a fresh copy of template, filestore included"""
+    drop_database(db_name, env, data_dir)
+    subprocess.run(["createdb", "-T", template, db_name], check=True, env=env)
+
+    template_filestore = filestore_path(template, data_dir)
+    if template_filestore.exists():
+        copy_filestore(template_filestore, filestore_path(db_name, data_dir))
+
+
+def copy_filestore(source: Path, target: Path) -> str:
+    """Copy a filestore sharing its data when possible, returns reflink, hardlink or copy
+
+    Odoo never rewrites attachment files, it writes new ones and garbage
+    collects the old ones, so hardlinked copies stay independent.
+    """
+    try:
+        subprocess.run(
+            ["cp", "-a", "--reflink=always", str(source), str(target)],
+            check=True,
+            capture_output=True,
+        )
+        return "reflink"
+    except (FileNotFoundError, subprocess.CalledProcessError):
+        # No GNU cp, or a file system without copy-on-write
+        shutil.rmtree(target, ignore_errors=True)
+    try:
+        shutil.copytree(source, target, copy_function=os.link)
+        return "hardlink"
+    except OSError:
+        # Another file system
+        shutil.rmtree(target, ignore_errors=True)
+    shutil.copytree(source, target)
+    return "copy"
+
+
+# Marks the databases snapshot_database may replace
+SNAPSHOT_COMMENT = "run-odoo snapshot of {}"
+
+
+def database_comment(db_name: str, env: dict) -> Optional[str]:
+    result = _psql(
+        "SELECT shobj_description(oid, 'pg_database') FROM pg_database WHERE datname = :'name';",
+        env,
+        name=db_name,
+    )
+    if result.returncode != 0:
+        return None
+    return result.stdout.strip() or None
+
+
+def snapshot_database(
+    db_name: str, snapshot: str, env: dict, data_dir: Optional[Path] = None, force: bool = False
+) -> Optional[str]:
+    """Replace snapshot with a copy of db_name, returns how the filestore was copied
+
+    CREATE DATABASE ... TEMPLATE copies files, far faster than a dump and
+    restore, but needs db_name to have no other connection. An existing
+    snapshot database is only replaced if a previous snapshot created it.
+    """
+    comment = SNAPSHOT_COMMENT.format(db_name)
+    if (
+        not force
+        and database_exists(snapshot, env)
+        and database_comment(snapshot, env) != comment
+    ):
+        raise RuntimeError(
+            f"Database '{snapshot}' exists and is not a snapshot of '{db_name}', "
+            "drop it or use --force to replace it"
+        )
+    drop_database(snapshot, env, data_dir)
+    subprocess.run(["createdb", "-T", db_name, snapshot], check=True, env=env)
+    _psql("COMMENT ON DATABASE :\"name\" IS :'comment';", env, name=snapshot, comment=comment)
+    filestore = filestore_path(db_name, data_dir)
+    if not filestore.exists():
+        return None
+    return copy_filestore(filestore, filestore_path(snapshot, data_dir))
+
+
+def swap_databases(
+    first: str, second: str, env: dict, data_dir: Optional[Path] = None, attempts: int = 10
+) -> None:
+    """Exchange the names of two databases in one transaction, then their filestores
+
+    Sessions still connected to either database, e.g. the backend of an
+    interrupted Odoo, are terminated first since renaming needs none.
+    """
+    swap = f"{first}_swap"
+    names = dict(first=first, second=second, swap=swap)
+    terminate = (
+        "SELECT pg_terminate_backend(pid) FROM pg_stat_activity "
+        "WHERE datname IN (:'first', :'second') AND pid <> pg_backend_pid();"
+    )
+    rename = (
+        'ALTER DATABASE :"first" RENAME TO :"swap";\n'
+        'ALTER DATABASE :"second" RENAME TO :"first";\n'
+        'ALTER DATABASE :"swap" RENAME TO :"second";\n'
+    )
+    for attempt in range(attempts):
+        _psql(terminate, env, **names)
+        result = _psql(rename, env, single_transaction=True, **names)
+        if result.returncode == 0:
+            break
+        # Terminated backends take a moment to go away
+        time.sleep(1)
+    else:
+        raise RuntimeError(f"Could not swap '{first}' and '{second}': {result.stderr.strip()}")
+
+    first_filestore = filestore_path(first, data_dir)
+    second_filestore = filestore_path(second, data_dir)
+    swap_filestore = filestore_path(swap, data_dir)
+    if first_filestore.exists():
+        first_filestore.rename(swap_filestore)
+    if second_filestore.exists():
+        second_filestore.rename(first_filestore)
+    if swap_filestore.exists():
+        swap_filestore.rename(second_filestore)
+
+
+def restore_snapshot(
+    db_name: str, snapshot: str, env: dict, data_dir: Optional[Path] = None
+) -> None:
+    """Put the snapshot back in place of db_name, dropping what db_name had become"""
+    swap_databases(db_name, snapshot, env, data_dir)
+    drop_database(snapshot, env, data_dir)
+    _psql('COMMENT ON DATABASE :"name" IS NULL;', env, name=db_name)
+
+
+def default_jobs() -> int:
+    """Parallel maintenance connections, bounded to leave the server usable"""
+    return max(1, min(4, (os.cpu_count() or 2) // 2))
+
+
+def vacuum_analyze(db_name: str, env: dict, jobs: Optional[int] = None) -> None:
+    """VACUUM (ANALYZE) every table, several at a time over a bounded number of connections"""
+    jobs = jobs or default_jobs()
+    print(f"Running VACUUM (ANALYZE) on '{db_name}' with {jobs} connections...")
+    subprocess.run(
+        ["vacuumdb", "--analyze", "--jobs", str(jobs), "--dbname", db_name], check=True, env=env
+    )
+
+
+BLOATED_INDEXES_QUERY = """
+SELECT c.relname
+FROM pg_index i
+JOIN pg_class c ON c.oid = i.indexrelid
+JOIN pg_am am ON am.oid = c.relam
+WHERE am.amname = 'btree'
+  AND c.relnamespace = 'public'::regnamespace
+  AND pg_relation_size(i.indexrelid) >= {min_size}
+  AND (pgstatindex(i.indexrelid::regclass)).avg_leaf_density < {max_density}
+ORDER BY pg_relation_size(i.indexrelid) DESC
+"""
+
+
+def bloated_indexes(
+    db_name: str,
+    env: dict,
+    min_size: int = 10 * 1024 * 1024,
+    max_density: float = 50,
+    install: bool = False,
+) -> Optional[list[str]]:
+    """B-tree indexes whose leaf pages are less than max_density percent full
+
+    Measured with pgstattuple, only created when install is set. None when
+    it is not installed, or can't be, e.g. without the contrib package or
+    superuser rights.
+    """
+    psql = ["psql", "-d", db_name, "-tA", "-v", "ON_ERROR_STOP=1"]
+    if install:
+        check = "CREATE EXTENSION IF NOT EXISTS pgstattuple"
+    else:
+        check = "SELECT 1 FROM pg_extension WHERE extname = 'pgstattuple'"
+    setup = subprocess.run(psql + ["-c", check], capture_output=True, text=True, env=env)
+    if setup.returncode != 0 or not (install or setup.stdout.strip()):
+        return None
+    query = BLOATED_INDEXES_QUERY.format(min_size=int(min_size), max_density=float(max_density))
+    result = subprocess.run(psql + ["-c", query], capture_output=True, text=True, check=True, env=env)
+    return [line.strip() for line in result.stdout.splitlines() if line.strip()]
+
+
+def reindex(db_name: str, indexes: list[str], env: dict, jobs: Optional[int] = None) -> None:
+    """Rebuild indexes, several at a time over a bounded number of connections
+
+    Concurrently (PostgreSQL 12+), writes to the tables go on meanwhile.
+    """
+    if not indexes:
+        return
+
+    def rebuild(index: str) -> None:
+        subprocess.run(
+            ["reindexdb", "--concurrently", "--dbname", db_name, "--index", index],
+            check=True,
+            env=env,
+        )
+
+    print(f"Reindexing {len(indexes)} indexes in '{db_name}'...")
+    with ThreadPoolExecutor(max_workers=jobs or default_jobs()) as executor:
+        # list() re-raises the first failure
+        list(executor.map(rebuild, indexes))
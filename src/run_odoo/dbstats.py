@@ -0,0 +1,199 @@
+import os
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+from run_odoo import db as pg
+
+# Tables smaller than this are read sequentially whatever their indexes
+MIN_ROWS = 10000
+# Share of dead tuples from which a table counts as bloated
+DEAD_RATIO = 0.2
+
+TABLES_QUERY = """
+SELECT t.relname, t.n_live_tup, t.n_dead_tup, t.seq_scan, t.seq_tup_read,
+       coalesce(t.idx_scan, 0), pg_relation_size(t.relid), pg_total_relation_size(t.relid),
+       coalesce(io.heap_blks_read, 0), coalesce(io.heap_blks_hit, 0),
+       greatest(t.last_vacuum, t.last_autovacuum), greatest(t.last_analyze, t.last_autoanalyze)
+FROM pg_stat_user_tables t
+JOIN pg_statio_user_tables io ON io.relid = t.relid
+"""
+
+INDEXES_QUERY = """
+SELECT s.relname, s.indexrelname, s.idx_scan, pg_relation_size(s.indexrelid),
+       i.indisunique OR i.indisprimary
+FROM pg_stat_user_indexes s
+JOIN pg_index i ON i.indexrelid = s.indexrelid
+"""
+
+
+@dataclass
+class TableStats:
+    name: str
+    live_tuples: int
+    dead_tuples: int
+    seq_scans: int
+    seq_tuples_read: int
+    index_scans: int
+    table_size: int
+    total_size: int
+    blocks_read: int = 0
+    blocks_hit: int = 0
+    last_vacuum: Optional[datetime] = None
+    last_analyze: Optional[datetime] = None
+
+    @property
+    def dead_ratio(self) -> float:
+        total = self.live_tuples + self.dead_tuples
+        return self.dead_tuples / total if total else 0.0
+
+    @property
+    def cache_hit_ratio(self) -> Optional[float]:
+        total = self.blocks_read + self.blocks_hit
+        return self.blocks_hit / total if total else None
+
+
+@dataclass
+class IndexStats:
+    table: str
+    name: str
+    scans: int
+    size: int
+    # Unique and primary key indexes enforce constraints even when never scanned
+    unique: bool = False
+
+
+@dataclass
+class DatabaseStats:
+    name: str
+    size: int
+    filestore_size: Optional[int] = None
+    tables: list[TableStats] = field(default_factory=list)
+    indexes: list[IndexStats] = field(default_factory=list)
+
+
+def directory_size(path: Path) -> Optional[int]:
+    """Bytes used by the files under path, None if it does not exist"""
+    if not path.is_dir():
+        return None
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.lstat(os.path.join(root, name)).st_size
+            except OSError:
+                pass
+    return total
+
+
+def collect(connection, data_dir: Optional[Path] = None) -> DatabaseStats:
+    """Statistics and sizes of a database's tables and indexes, from a psycopg connection"""
+    with connection.cursor() as cr:
+        cr.execute("SELECT current_database(), pg_database_size(current_database())")
+        name, size = cr.fetchone()
+        cr.execute(TABLES_QUERY)
+        tables = [TableStats(*row) for row in cr.fetchall()]
+        cr.execute(INDEXES_QUERY)
+        indexes = [IndexStats(*row) for row in cr.fetchall()]
+    return DatabaseStats(
+        name=name,
+        size=size,
+        filestore_size=directory_size(pg.filestore_path(name, data_dir)),
+        tables=tables,
+        indexes=indexes,
+    )
+
+
+def biggest_tables(tables: list[TableStats], limit: int = 10) -> list[TableStats]:
+    return sorted(tables, key=lambda table: table.total_size, reverse=True)[:limit]
+
+
+def biggest_indexes(indexes: list[IndexStats], limit: int = 10) -> list[IndexStats]:
+    return sorted(indexes, key=lambda index: index.size, reverse=True)[:limit]
+
+
+def bloated_tables(tables: list[TableStats], limit: int = 10) -> list[TableStats]:
+    """Tables with a large share of dead tuples, that (auto)vacuum did not catch up with"""
+    bloated = [
+        table
+        for table in tables
+        if table.dead_tuples >= MIN_ROWS and table.dead_ratio >= DEAD_RATIO
+    ]
+    return sorted(bloated, key=lambda table: table.dead_tuples, reverse=True)[:limit]
+
+
+def seq_scan_heavy(tables: list[TableStats], limit: int = 10) -> list[TableStats]:
+    """Big tables read sequentially more often than through an index
+
+    Typically a search domain or an order on a column without index.
+    """
+    heavy = [
+        table
+        for table in tables
+        if table.live_tuples >= MIN_ROWS and table.seq_scans > table.index_scans
+    ]
+    return sorted(heavy, key=lambda table: table.seq_tuples_read, reverse=True)[:limit]
+
+
+def unused_indexes(indexes: list[IndexStats], limit: int = 10) -> list[IndexStats]:
+    """Indexes never scanned since statistics were reset, they only slow down writes"""
+    unused = [index for index in indexes if index.scans == 0 and not index.unique]
+    return sorted(unused, key=lambda index: index.size, reverse=True)[:limit]
+
+
+def _size(size: Optional[int]) -> str:
+    if size is None:
+        return "-"
+    for unit in ("B", "kB", "MB", "GB"):
+        if size < 1024:
+            return f"{size:.0f}{unit}"
+        size /= 1024
+    return f"{size:.1f}TB"
+
+
+def print_report(stats: DatabaseStats, limit: int = 10) -> None:
+    print(
+        f"Database '{stats.name}': {_size(stats.size)}, "
+        f"filestore {_size(stats.filestore_size)}, "
+        f"{len(stats.tables)} tables, {len(stats.indexes)} indexes"
+    )
+
+    print(f"\nBiggest tables\n{'Table':<40}{'Total':>10}{'Heap':>10}{'Rows':>12}{'Cache hit':>11}")
+    for table in biggest_tables(stats.tables, limit):
+        hit = table.cache_hit_ratio
+        print(
+            f"{table.name:<40}{_size(table.total_size):>10}{_size(table.table_size):>10}"
+            f"{table.live_tuples:>12}{f'{hit:.0%}' if hit is not None else '-':>11}"
+        )
+
+    print(f"\nBiggest indexes\n{'Index':<56}{'Size':>10}{'Scans':>12}")
+    for index in biggest_indexes(stats.indexes, limit):
+        print(f"{index.name:<56}{_size(index.size):>10}{index.scans:>12}")
+
+    bloated = bloated_tables(stats.tables, limit)
+    if bloated:
+        print(f"\nDead tuples\n{'Table':<40}{'Dead':>12}{'Share':>8}  Last vacuum")
+        for table in bloated:
+            print(
+                f"{table.name:<40}{table.dead_tuples:>12}{table.dead_ratio:>8.0%}"
+                f"  {table.last_vacuum or 'never'}"
+            )
+
+    heavy = seq_scan_heavy(stats.tables, limit)
+    if heavy:
+        print(
+            f"\nSequential scans on big tables\n"
+            f"{'Table':<40}{'Seq scans':>11}{'Rows read':>14}{'Idx scans':>11}"
+        )
+        for table in heavy:
+            print(
+                f"{table.name:<40}{table.seq_scans:>11}{table.seq_tuples_read:>14}"
+                f"{table.index_scans:>11}"
+            )
+
+    unused = unused_indexes(stats.indexes, limit)
+    if unused:
+        print(f"\nUnused indexes\n{'Index':<56}{'Table':<32}{'Size':>10}")
+        for index in unused:
+            print(f"{index.name:<56}{index.table:<32}{_size(index.size):>10}")
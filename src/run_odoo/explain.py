@@ -0,0 +1,194 @@
+import json
+import re
+import tempfile
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional
+
+from run_odoo.runner import Runner
+
+# Piped into odoo-bin shell to compile and explain the domain
+EXPLAIN_SCRIPT = Path(__file__).parent / "odoo" / "explain_domain.py"
+# Operators only a trigram index can serve, the pattern may start with a wildcard
+LIKE_OPERATORS = ("like", "ilike", "not like", "not ilike", "=like", "=ilike")
+# Plan node details worth showing under the node
+DETAILS = ("Index Cond", "Recheck Cond", "Filter", "Join Filter", "Hash Cond", "Sort Key")
+
+
+@dataclass
+class PlanNode:
+    node_type: str
+    depth: int
+    relation: Optional[str] = None
+    index: Optional[str] = None
+    # Milliseconds over all loops, with and without the child nodes
+    total_time: float = 0.0
+    self_time: float = 0.0
+    rows: int = 0
+    loops: int = 1
+    details: list[str] = field(default_factory=list)
+
+
+def flatten(plan: dict, depth: int = 0) -> list[PlanNode]:
+    """Nodes of an EXPLAIN (ANALYZE, FORMAT JSON) plan, parents before children"""
+    loops = plan.get("Actual Loops", 1)
+    node = PlanNode(
+        node_type=plan["Node Type"],
+        depth=depth,
+        relation=plan.get("Relation Name"),
+        index=plan.get("Index Name"),
+        total_time=plan.get("Actual Total Time", 0.0) * loops,
+        rows=plan.get("Actual Rows", 0),
+        loops=loops,
+    )
+    for name in DETAILS:
+        if name in plan:
+            value = plan[name]
+            if isinstance(value, list):
+                value = ", ".join(value)
+            node.details.append(f"{name}: {value}")
+    if plan.get("Rows Removed by Filter"):
+        node.details.append(f"Rows Removed by Filter: {plan['Rows Removed by Filter']}")
+    if "Shared Hit Blocks" in plan:
+        hit, read = plan["Shared Hit Blocks"], plan.get("Shared Read Blocks", 0)
+        node.details.append(f"Buffers: shared hit={hit} read={read}")
+
+    nodes = [node]
+    children_time = 0.0
+    for child in plan.get("Plans", []):
+        child_nodes = flatten(child, depth + 1)
+        children_time += child_nodes[0].total_time
+        nodes.extend(child_nodes)
+    node.self_time = max(0.0, node.total_time - children_time)
+    return nodes
+
+
+def index_columns(indexdefs: list[str]) -> set[tuple[str, str]]:
+    """Leading column and kind (btree or trigram) of each index definition"""
+    columns = set()
+    for indexdef in indexdefs:
+        # Partial indexes end with a WHERE clause
+        match = re.search(r"USING \w+ \((.*)\)$", indexdef.split(" WHERE ")[0])
+        if not match:
+            continue
+        leading = match.group(1).split(",")[0].split()
+        column = leading[0].strip('"')
+        kind = "trigram" if any(word.endswith("_trgm_ops") for word in leading) else "btree"
+        columns.add((column, kind))
+    return columns
+
+
+@dataclass
+class IndexSuggestion:
+    table: str
+    column: str
+    model: str
+    field: str
+    kind: str
+
+    @property
+    def statement(self) -> str:
+        if self.kind == "trigram":
+            return (
+                f"CREATE INDEX {self.table}__{self.column}_trgm ON {self.table} "
+                f"USING gin ({self.column} gin_trgm_ops)"
+            )
+        return f"CREATE INDEX {self.table}__{self.column}_index ON {self.table} ({self.column})"
+
+    @property
+    def field_option(self) -> str:
+        return "index='trigram'" if self.kind == "trigram" else "index=True"
+
+
+def suggest_indexes(result: dict, nodes: list[PlanNode]) -> list[IndexSuggestion]:
+    """Columns the domain filters (or the order sorts) on that no index serves
+
+    Only tables the plan read sequentially are considered, otherwise PostgreSQL
+    found an index or chose not to use one.
+    """
+    seq_scanned = {node.relation for node in nodes if node.node_type == "Seq Scan"}
+    sorted_in_memory = any(node.node_type in ("Sort", "Incremental Sort") for node in nodes)
+    suggestions = []
+    seen = set()
+    for column in result.get("columns", []):
+        table = column["table"]
+        if column["operator"] == "order":
+            if not sorted_in_memory or table not in seq_scanned:
+                continue
+        elif table not in seq_scanned:
+            continue
+        kind = "trigram" if column["operator"] in LIKE_OPERATORS else "btree"
+        key = (table, column["column"], kind)
+        indexed = index_columns(result["indexes"].get(table, []))
+        if key in seen or (column["column"], kind) in indexed:
+            continue
+        seen.add(key)
+        suggestions.append(
+            IndexSuggestion(table, column["column"], column["model"], column["field"], kind)
+        )
+    return suggestions
+
+
+def explain_domain(
+    runner: Runner,
+    model: str,
+    domain: str,
+    order: Optional[str] = None,
+    limit: Optional[int] = None,
+    user: Optional[str] = None,
+) -> dict:
+    """Plan of the query the ORM runs for a search, from a one-off Odoo shell"""
+    with tempfile.TemporaryDirectory() as tmp:
+        output = Path(tmp) / "explain.json"
+        env_vars = {
+            "RUN_ODOO_EXPLAIN_OUTPUT": str(output),
+            "RUN_ODOO_EXPLAIN_MODEL": model,
+            "RUN_ODOO_EXPLAIN_DOMAIN": domain,
+            "RUN_ODOO_EXPLAIN_ORDER": order or "",
+            "RUN_ODOO_EXPLAIN_LIMIT": str(limit or ""),
+            "RUN_ODOO_EXPLAIN_USER": user or "",
+        }
+        returncode = runner.run_shell(script=EXPLAIN_SCRIPT.read_bytes(), env_vars=env_vars)
+        if returncode or not output.exists():
+            raise RuntimeError(f"Explaining the domain failed, the shell exited with {returncode}")
+        return json.loads(output.read_text())
+
+
+def print_report(result: dict, highlight: int = 3) -> list[IndexSuggestion]:
+    """Print the SQL, the plan with its slowest nodes marked, and index suggestions"""
+    if "error" in result:
+        print(result["error"])
+        return []
+    print(f"{result['model']} {result['domain']}\n\n{result['sql']}\n")
+
+    plan = result["plan"]
+    nodes = flatten(plan["Plan"])
+    by_self_time = sorted(nodes, key=lambda node: node.self_time, reverse=True)
+    slowest = {id(node) for node in by_self_time[:highlight]}
+    total = plan.get("Execution Time") or nodes[0].total_time or 1.0
+    for node in nodes:
+        indent = "  " * node.depth
+        target = f" on {node.relation}" if node.relation else ""
+        target += f" using {node.index}" if node.index else ""
+        marker = ">>" if id(node) in slowest and node.self_time > 0 else "  "
+        print(
+            f"{marker}{indent}{node.node_type}{target}  (time={node.total_time:.2f}ms "
+            f"self={node.self_time:.2f}ms {100 * node.self_time / total:.0f}% "
+            f"rows={node.rows} loops={node.loops})"
+        )
+        for detail in node.details:
+            print(f"  {indent}    {detail}")
+    print(
+        f"\nPlanning {plan.get('Planning Time', 0):.2f}ms, execution "
+        f"{plan.get('Execution Time', 0):.2f}ms, >> marks the slowest nodes"
+    )
+
+    suggestions = suggest_indexes(result, nodes)
+    if suggestions:
+        print("\nSequentially scanned columns without index:")
+        for suggestion in suggestions:
+            print(
+                f"  {suggestion.model}.{suggestion.field}: {suggestion.field_option}"
+                f"  ->  {suggestion.statement}"
+            )
+    return suggestions
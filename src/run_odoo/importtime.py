@@ -0,0 +1,126 @@
+import re
+import sys
+from dataclasses import dataclass, field
+from typing import Iterable, Optional
+
+from run_odoo.observers import RunObserver
+
+IMPORT_TIME_RE = re.compile(r"^import time:\s+(?P<self>\d+) \|\s+(?P<cumulative>\d+) \| (?P<name>.*)$")
+ADDON_PREFIX = "odoo.addons."
+
+
+@dataclass
+class ImportEntry:
+    name: str
+    self_us: int
+    cumulative_us: int
+    level: int
+    children: list["ImportEntry"] = field(default_factory=list)
+
+    @property
+    def package(self) -> str:
+        return self.name.split(".", 1)[0]
+
+    @property
+    def addon(self) -> Optional[str]:
+        if self.name.startswith(ADDON_PREFIX):
+            return self.name[len(ADDON_PREFIX) :].split(".", 1)[0]
+        return None
+
+
+def parse_line(line: str) -> Optional[ImportEntry]:
+    match = IMPORT_TIME_RE.match(line.rstrip("\n"))
+    if not match:
+        return None
+    raw_name = match["name"]
+    name = raw_name.lstrip(" ")
+    return ImportEntry(
+        name=name,
+        self_us=int(match["self"]),
+        cumulative_us=int(match["cumulative"]),
+        level=(len(raw_name) - len(name)) // 2,
+    )
+
+
+def build_tree(entries: Iterable[ImportEntry]) -> list[ImportEntry]:
+    """Rebuild the import tree, Python prints children before their parent"""
+    pending: list[ImportEntry] = []
+    for entry in entries:
+        while pending and pending[-1].level > entry.level:
+            entry.children.insert(0, pending.pop())
+        pending.append(entry)
+    return pending
+
+
+def is_third_party(package: str) -> bool:
+    return package not in ("odoo", "__main__") and package not in sys.stdlib_module_names
+
+
+@dataclass
+class ImportReport:
+    # Self time of the addon's own modules
+    addon_self_us: dict[str, int] = field(default_factory=dict)
+    # Own time plus everything first imported beneath it, other addons excluded
+    addon_inclusive_us: dict[str, int] = field(default_factory=dict)
+    package_self_us: dict[str, int] = field(default_factory=dict)
+    modules: list[ImportEntry] = field(default_factory=list)
+    total_us: int = 0
+
+
+def aggregate(roots: list[ImportEntry]) -> ImportReport:
+    report = ImportReport()
+
+    def visit(entry: ImportEntry, owner: Optional[str]) -> None:
+        owner = entry.addon or owner
+        report.total_us += entry.self_us
+        report.modules.append(entry)
+        if entry.addon:
+            report.addon_self_us[entry.addon] = report.addon_self_us.get(entry.addon, 0) + entry.self_us
+        if owner:
+            report.addon_inclusive_us[owner] = report.addon_inclusive_us.get(owner, 0) + entry.self_us
+        if is_third_party(entry.package):
+            report.package_self_us[entry.package] = (
+                report.package_self_us.get(entry.package, 0) + entry.self_us
+            )
+        for child in entry.children:
+            visit(child, owner)
+
+    for root in roots:
+        visit(root, None)
+    return report
+
+
+def _print_ranking(title: str, values: dict[str, int], top: int) -> None:
+    print(f"\n{title:<50}{'ms':>10}")
+    for name, us in sorted(values.items(), key=lambda item: item[1], reverse=True)[:top]:
+        print(f"{name:<50}{us / 1000:>10.1f}")
+
+
+def print_report(report: ImportReport, top: int = 20) -> None:
+    print(f"\nTotal import time: {report.total_us / 1e6:.2f}s")
+    _print_ranking("Addon (own modules + what they import)", report.addon_inclusive_us, top)
+    _print_ranking("Addon (own modules only)", report.addon_self_us, top)
+    _print_ranking("Third-party package", report.package_self_us, top)
+    _print_ranking(
+        "Module (self time)", {entry.name: entry.self_us for entry in report.modules}, top
+    )
+
+
+class ImportTimeProfiler(RunObserver):
+    """Collect `python -X importtime` output from odoo-bin"""
+
+    python_options = ("-X", "importtime")
+
+    def __init__(self, top: int = 20) -> None:
+        self.top = top
+        self.entries: list[ImportEntry] = []
+
+    def line(self, line: str) -> bool:
+        if entry := parse_line(line):
+            self.entries.append(entry)
+            return True
+        # Hide the header line too
+        return line.startswith("import time:")
+
+    def finished(self, returncode: int | None) -> None:
+        print_report(aggregate(build_tree(self.entries)), self.top)
@@ -0,0 +1,193 @@
+import json
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional
+
+from run_odoo.dbstats import MIN_ROWS
+from run_odoo.explain import index_columns
+from run_odoo.sqlstats import SqlReport
+
+# "res_partner"."name", optionally cast, followed by the comparison using it
+COLUMN_RE = re.compile(
+    r'"?(?P<alias>\w+)"?\."?(?P<column>\w+)"?(?:\)|::\w+)*\s*'
+    r"(?P<op>NOT\s+I?LIKE|I?LIKE|NOT\s+IN|IN|IS|=|<>|!=|<=|>=|<|>|@>)",
+    re.IGNORECASE,
+)
+ORDER_COLUMN_RE = re.compile(r'"?(?P<alias>\w+)"?\."?(?P<column>\w+)"?')
+TABLE_RE = re.compile(
+    r'\b(?:FROM|JOIN)\s+"?(?P<table>\w+)"?(?:\s+(?:AS\s+)?"?(?P<alias>\w+)"?)?', re.IGNORECASE
+)
+# Words that can follow a table name without being its alias
+KEYWORDS = {
+    "where", "on", "left", "right", "inner", "join", "order", "group", "limit", "offset",
+    "for", "using", "natural", "cross", "full", "union", "as", "set", "returning",
+}
+WHERE_RE = re.compile(
+    r"\bWHERE\b(?P<where>.*?)(?=\bGROUP BY\b|\bORDER BY\b|\bLIMIT\b|\bOFFSET\b|\bFOR UPDATE\b|$)",
+    re.IGNORECASE | re.DOTALL,
+)
+ORDER_RE = re.compile(
+    r"\bORDER BY\b(?P<order>.*?)(?=\bLIMIT\b|\bOFFSET\b|\bFOR UPDATE\b|$)",
+    re.IGNORECASE | re.DOTALL,
+)
+
+PG_STAT_STATEMENTS_QUERY = """
+SELECT query, calls, {total_time}
+FROM pg_stat_statements
+WHERE dbid = (SELECT oid FROM pg_database WHERE datname = current_database())
+"""
+
+
+@dataclass
+class Statement:
+    """A query shape and how much time the workload spent on it"""
+
+    query: str
+    calls: int
+    total_ms: float
+
+
+@dataclass(frozen=True)
+class ColumnUse:
+    table: str
+    column: str
+    # btree, or trigram for LIKE patterns
+    kind: str
+    clause: str
+
+
+@dataclass
+class Candidate:
+    table: str
+    column: str
+    kind: str
+    model: Optional[str] = None
+    field_name: Optional[str] = None
+    statements: int = 0
+    calls: int = 0
+    # Time of the statements using the column, shared between the unindexed
+    # columns of each: an upper bound of what the index could save
+    saved_ms: float = 0.0
+    clauses: set[str] = field(default_factory=set)
+
+
+def extract_columns(sql: str) -> list[ColumnUse]:
+    """Columns a query filters on (WHERE) and sorts on (ORDER BY), resolved to their table"""
+    aliases = {}
+    for match in TABLE_RE.finditer(sql):
+        alias = match["alias"]
+        if alias is None or alias.lower() in KEYWORDS:
+            alias = match["table"]
+        aliases[alias] = match["table"]
+
+    uses = []
+    if where := WHERE_RE.search(sql):
+        for match in COLUMN_RE.finditer(where["where"]):
+            if match["alias"] in aliases:
+                kind = "trigram" if "LIKE" in match["op"].upper() else "btree"
+                uses.append(ColumnUse(aliases[match["alias"]], match["column"], kind, "where"))
+    if order := ORDER_RE.search(sql):
+        for match in ORDER_COLUMN_RE.finditer(order["order"]):
+            if match["alias"] in aliases:
+                uses.append(ColumnUse(aliases[match["alias"]], match["column"], "btree", "order"))
+    return list(dict.fromkeys(uses))
+
+
+def from_pg_stat_statements(connection) -> list[Statement]:
+    with connection.cursor() as cr:
+        cr.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_stat_statements'")
+        if cr.fetchone() is None:
+            raise RuntimeError(
+                "pg_stat_statements is not installed in this database: add it to "
+                "shared_preload_libraries and run CREATE EXTENSION pg_stat_statements, "
+                "or pass a SQL log with --sql-log"
+            )
+        cr.execute("SELECT current_setting('server_version_num')::int")
+        # Renamed in PostgreSQL 13 when planning time got its own column
+        total_time = "total_exec_time" if cr.fetchone()[0] >= 130000 else "total_time"
+        cr.execute(PG_STAT_STATEMENTS_QUERY.format(total_time=total_time))
+        return [Statement(query, calls, total_ms) for query, calls, total_ms in cr.fetchall()]
+
+
+def from_sql_log(path: Path) -> list[Statement]:
+    """Statements from a --sql-report JSON file or an Odoo log with SQL debug logging"""
+    if path.suffix == ".json":
+        data = json.loads(path.read_text())
+        return [
+            Statement(shape["shape"], shape["count"], shape["total_ms"]) for shape in data["shapes"]
+        ]
+    report = SqlReport()
+    with open(path, errors="replace") as f:
+        report.read_log(f)
+    return [Statement(shape.shape, shape.count, shape.total_ms) for shape in report.results()]
+
+
+def read_catalog(connection) -> tuple[dict, dict, dict]:
+    """Index definitions and row counts per table, and the model field of each column"""
+    with connection.cursor() as cr:
+        cr.execute("SELECT tablename, indexdef FROM pg_indexes WHERE schemaname = 'public'")
+        indexes: dict[str, list[str]] = {}
+        for table, indexdef in cr.fetchall():
+            indexes.setdefault(table, []).append(indexdef)
+        cr.execute("SELECT relname, n_live_tup FROM pg_stat_user_tables")
+        rows = dict(cr.fetchall())
+        cr.execute("SELECT model, name FROM ir_model_fields WHERE store")
+        # Tables are named after their model unless _table says otherwise
+        fields = {(model.replace(".", "_"), name): (model, name) for model, name in cr.fetchall()}
+    return indexes, rows, fields
+
+
+def advise(
+    statements: list[Statement],
+    indexes: dict[str, list[str]],
+    rows: dict[str, int],
+    fields: dict[tuple[str, str], tuple[str, str]],
+    min_rows: int = MIN_ROWS,
+) -> list[Candidate]:
+    """Columns without a usable index, ranked by the time of the statements using them"""
+    indexed = {table: index_columns(defs) for table, defs in indexes.items()}
+    candidates: dict[tuple[str, str, str], Candidate] = {}
+    for statement in statements:
+        missing = [
+            use
+            for use in extract_columns(statement.query)
+            if rows.get(use.table, 0) >= min_rows
+            and (use.column, use.kind) not in indexed.get(use.table, set())
+        ]
+        for use in missing:
+            key = (use.table, use.column, use.kind)
+            if key not in candidates:
+                model, field_name = fields.get((use.table, use.column), (None, None))
+                candidates[key] = Candidate(use.table, use.column, use.kind, model, field_name)
+            candidate = candidates[key]
+            candidate.statements += 1
+            candidate.calls += statement.calls
+            candidate.saved_ms += statement.total_ms / len(missing)
+            candidate.clauses.add(use.clause)
+    return sorted(candidates.values(), key=lambda candidate: candidate.saved_ms, reverse=True)
+
+
+def print_report(candidates: list[Candidate], limit: int = 20) -> None:
+    if not candidates:
+        print("No missing index found for the statements' filtered and sorted columns")
+        return
+    print(
+        f"{'Saved up to':>12}{'Calls':>10}{'Stmts':>7}  {'Used in':<12}"
+        f"{'Table.column':<48}Model field"
+    )
+    for candidate in candidates[:limit]:
+        target = f"{candidate.table}.{candidate.column}"
+        if candidate.model:
+            option = "index='trigram'" if candidate.kind == "trigram" else "index=True"
+            field_hint = f"{candidate.model}.{candidate.field_name}: {option}"
+        else:
+            field_hint = "- (not a model field)"
+        print(
+            f"{candidate.saved_ms / 1000:>11.1f}s{candidate.calls:>10}{candidate.statements:>7}"
+            f"  {'+'.join(sorted(candidate.clauses)):<12}{target:<48}{field_hint}"
+        )
+    print(
+        "\nSaved time is the statements' total time shared between their unindexed "
+        "columns, an upper bound: check with run-odoo explain before adding indexes"
+    )
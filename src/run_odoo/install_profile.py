@@ -0,0 +1,154 @@
+import heapq
+import re
+from dataclasses import dataclass, field
+from typing import Optional
+
+from run_odoo import odoo_log
+from run_odoo.observers import RunObserver
+
+# Odoo >= 16 logs "[1.234 ms] query: ...", older versions only "query: ..."
+SQL_QUERY_RE = re.compile(r"^(?:\[(?P<ms>[\d.]+) ms\] )?query: (?P<query>.*)$", re.DOTALL)
+SQL_LOGGER = "odoo.sql_db"
+STARTUP = "(startup)"
+AFTER_LOAD = "(after loading)"
+
+
+@dataclass(order=True)
+class Query:
+    duration_ms: float
+    sql: str = field(compare=False)
+
+
+@dataclass
+class ModuleProfile:
+    module: str
+    wall_time: float = 0.0
+    query_count: int = 0
+    sql_time_ms: float = 0.0
+    heaviest: list[Query] = field(default_factory=list)
+
+    def add_query(self, query: Query, keep: int) -> None:
+        self.query_count += 1
+        self.sql_time_ms += query.duration_ms
+        if len(self.heaviest) < keep:
+            heapq.heappush(self.heaviest, query)
+        elif query > self.heaviest[0]:
+            heapq.heapreplace(self.heaviest, query)
+
+
+class SqlLogObserver(RunObserver):
+    """Observer collecting the queries Odoo logs on odoo.sql_db at DEBUG level"""
+
+    show_sql = False
+
+    def __init__(self) -> None:
+        # SQL lines may span several lines, collect them until the next record
+        self._pending_sql: Optional[list[str]] = None
+        self._pending_context = None
+
+    def sql_context(self, record: odoo_log.LogRecord):
+        """Called when a query record starts, the value is passed along with the query"""
+        return None
+
+    def add_logged_query(self, context, sql: str, duration_ms: float) -> None:
+        """Called once the query's lines are complete"""
+
+    def log_record(self, record: odoo_log.LogRecord) -> None:
+        """Called for every log record, before it is handled as a query"""
+
+    def _flush_sql(self) -> None:
+        if self._pending_sql is None:
+            return
+        text = "".join(self._pending_sql).rstrip()
+        self._pending_sql = None
+        if match := SQL_QUERY_RE.match(text):
+            self.add_logged_query(
+                self._pending_context, match["query"], float(match["ms"] or 0.0)
+            )
+
+    def line(self, line: str) -> bool:
+        record = odoo_log.parse_line(line)
+        if record is None:
+            if self._pending_sql is not None:
+                self._pending_sql.append(line)
+                return not self.show_sql
+            return False
+
+        self._flush_sql()
+        self.log_record(record)
+        if record.logger == SQL_LOGGER and record.level == "DEBUG":
+            self._pending_sql = [record.message + "\n"]
+            self._pending_context = self.sql_context(record)
+            return not self.show_sql
+        return False
+
+
+class InstallProfiler(SqlLogObserver):
+    """Attribute wall time, query count and SQL time to each module Odoo loads"""
+
+    log_handlers = (odoo_log.MODULE_LOADING_HANDLER, f"{SQL_LOGGER}:DEBUG")
+
+    def __init__(self, top_queries: int = 3, show_sql: bool = False) -> None:
+        super().__init__()
+        self.top_queries = top_queries
+        self.show_sql = show_sql
+        self.tracker = odoo_log.ModuleLoadTracker()
+        self.profiles: dict[str, ModuleProfile] = {}
+        self.reported = False
+
+    def _profile(self, module: str) -> ModuleProfile:
+        return self.profiles.setdefault(module, ModuleProfile(module))
+
+    def _current_module(self) -> str:
+        if self.tracker.current:
+            return self.tracker.current.module
+        return AFTER_LOAD if self.tracker.loaded else STARTUP
+
+    def sql_context(self, record: odoo_log.LogRecord) -> str:
+        return self._current_module()
+
+    def add_logged_query(self, context: str, sql: str, duration_ms: float) -> None:
+        self._profile(context).add_query(Query(duration_ms, sql), self.top_queries)
+
+    def log_record(self, record: odoo_log.LogRecord) -> None:
+        self.tracker.feed(record)
+        if self.tracker.loaded and not self.reported:
+            # The server keeps running after installing, report right away
+            self.report()
+
+    def finished(self, returncode: int | None) -> None:
+        self._flush_sql()
+        if not self.reported:
+            self.report()
+
+    def results(self) -> list[ModuleProfile]:
+        for module, load in self.tracker.close().items():
+            self._profile(module).wall_time = load.duration
+        return sorted(self.profiles.values(), key=lambda p: p.wall_time, reverse=True)
+
+    def report(self, limit: int = 20) -> None:
+        self.reported = True
+        results = self.results()
+        if not results:
+            print("No module loading was logged")
+            return
+
+        print()
+        print(f"{'Module':<40}{'Wall':>10}{'Queries':>10}{'SQL':>12}{'SQL %':>8}")
+        for profile in results[:limit]:
+            sql_share = (
+                100 * profile.sql_time_ms / 1000 / profile.wall_time if profile.wall_time else 0
+            )
+            print(
+                f"{profile.module:<40}{profile.wall_time:>9.2f}s{profile.query_count:>10}"
+                f"{profile.sql_time_ms / 1000:>11.2f}s{sql_share:>7.0f}%"
+            )
+
+        print()
+        for profile in results[:5]:
+            if not profile.heaviest:
+                continue
+            print(f"Heaviest queries of {profile.module}:")
+            for query in sorted(profile.heaviest, reverse=True):
+                sql = " ".join(query.sql.split())
+                print(f"  {query.duration_ms:>10.1f} ms  {sql[:160]}")
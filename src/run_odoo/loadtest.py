@@ -0,0 +1,369 @@
+import asyncio
+import json
+import random
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional
+
+from run_odoo import stats
+from run_odoo.runner import Runner
+
+
+@dataclass
+class Endpoint:
+    name: str
+    path: str
+    method: str = "GET"
+    # JSON-RPC params, sent as a POST body
+    params: Optional[dict] = None
+    weight: int = 1
+
+    @property
+    def body(self) -> Optional[bytes]:
+        if self.params is None:
+            return None
+        return json.dumps(
+            {"jsonrpc": "2.0", "method": "call", "params": self.params, "id": None}
+        ).encode()
+
+
+def call_kw(model: str, method: str, args=None, kwargs=None, weight: int = 1) -> Endpoint:
+    return Endpoint(
+        name=f"{model}.{method}",
+        path=f"/web/dataset/call_kw/{model}/{method}",
+        method="POST",
+        params={"model": model, "method": method, "args": args or [], "kwargs": kwargs or {}},
+        weight=weight,
+    )
+
+
+MIXES = {
+    "web": [
+        Endpoint("login page", "/web/login"),
+        Endpoint("version_info", "/web/webclient/version_info", "POST", params={}),
+    ],
+    "rpc": [
+        call_kw(
+            "res.partner",
+            "search_read",
+            kwargs={"domain": [], "fields": ["name", "email"], "limit": 80},
+            weight=3,
+        ),
+        call_kw("res.partner", "search_count", args=[[]]),
+        call_kw("res.users", "read", args=[[2], ["name", "login"]]),
+    ],
+    "static": [
+        Endpoint("logo", "/web/static/img/logo.png"),
+        Endpoint("favicon", "/web/static/img/favicon.ico"),
+    ],
+}
+MIXES["mixed"] = MIXES["web"] + MIXES["rpc"] + MIXES["static"]
+
+
+def load_mix(mix: str) -> list[Endpoint]:
+    """A built-in mix name, or a JSON file with a list of endpoint definitions"""
+    if mix in MIXES:
+        return MIXES[mix]
+    path = Path(mix)
+    if not path.exists():
+        raise ValueError(
+            f"Unknown request mix '{mix}', use one of {', '.join(MIXES)} or a JSON file"
+        )
+    with open(path) as f:
+        return [Endpoint(**endpoint) for endpoint in json.load(f)]
+
+
+class HttpError(Exception):
+    pass
+
+
+class HttpClient:
+    """Minimal HTTP/1.1 client keeping one connection and the session cookie"""
+
+    def __init__(self, host: str, port: int) -> None:
+        self.host = host
+        self.port = port
+        self.cookies: dict[str, str] = {}
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+
+    async def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+            try:
+                await self._writer.wait_closed()
+            except OSError:
+                pass
+        self._reader = self._writer = None
+
+    async def _read_body(self, headers: dict[str, str]) -> bytes:
+        if headers.get("transfer-encoding", "").lower() == "chunked":
+            chunks = []
+            while True:
+                size = int((await self._reader.readline()).split(b";")[0], 16)
+                if size == 0:
+                    await self._reader.readline()
+                    return b"".join(chunks)
+                chunks.append(await self._reader.readexactly(size))
+                await self._reader.readline()
+        if "content-length" in headers:
+            return await self._reader.readexactly(int(headers["content-length"]))
+        return await self._reader.read()
+
+    async def request(
+        self, method: str, path: str, body: Optional[bytes] = None
+    ) -> tuple[int, bytes]:
+        if self._writer is None:
+            self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+
+        lines = [f"{method} {path} HTTP/1.1", f"Host: {self.host}:{self.port}"]
+        if self.cookies:
+            lines.append("Cookie: " + "; ".join(f"{k}={v}" for k, v in self.cookies.items()))
+        if body is not None:
+            lines.append("Content-Type: application/json")
+            lines.append(f"Content-Length: {len(body)}")
+        self._writer.write(("\r\n".join(lines) + "\r\n\r\n").encode() + (body or b""))
+        await self._writer.drain()
+
+        status_line = await self._reader.readline()
+        if not status_line:
+            await self.close()
+            raise HttpError("Connection closed by server")
+        version, status = status_line.decode("latin-1").split()[:2]
+        headers = {}
+        while (line := await self._reader.readline()) not in (b"\r\n", b"\n", b""):
+            name, _, value = line.decode("latin-1").partition(":")
+            name, value = name.strip().lower(), value.strip()
+            if name == "set-cookie":
+                cookie_name, _, cookie_value = value.split(";")[0].partition("=")
+                self.cookies[cookie_name] = cookie_value
+            headers[name] = value
+
+        response = await self._read_body(headers)
+        connection = headers.get("connection", "").lower()
+        if connection == "close" or (version == "HTTP/1.0" and connection != "keep-alive"):
+            await self.close()
+        return int(status), response
+
+    async def authenticate(self, db: str, login: str, password: str) -> None:
+        body = Endpoint(
+            "authenticate",
+            "/web/session/authenticate",
+            "POST",
+            params={"db": db, "login": login, "password": password},
+        ).body
+        status, response = await self.request("POST", "/web/session/authenticate", body)
+        if status != 200 or "error" in json.loads(response):
+            raise HttpError(f"Could not log in as '{login}' on database '{db}'")
+
+
+@dataclass
+class EndpointResult:
+    latencies: list[float] = field(default_factory=list)
+    errors: int = 0
+
+
+@dataclass
+class LoadResult:
+    duration: float
+    endpoints: dict[str, EndpointResult]
+
+    @property
+    def requests(self) -> int:
+        return sum(len(result.latencies) + result.errors for result in self.endpoints.values())
+
+
+def is_error(status: int, response: bytes, endpoint: Endpoint) -> bool:
+    if status >= 400:
+        return True
+    if endpoint.params is None:
+        return False
+    # JSON-RPC failures come back with a 200 status
+    try:
+        return "error" in json.loads(response)
+    except ValueError:
+        return True
+
+
+class LoadGenerator:
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        endpoints: list[Endpoint],
+        concurrency: int = 10,
+        db: Optional[str] = None,
+        login: str = "admin",
+        password: str = "admin",
+        seed: int = 0,
+    ) -> None:
+        self.host = host
+        self.port = port
+        self.endpoints = endpoints
+        self.concurrency = concurrency
+        self.db = db
+        self.login = login
+        self.password = password
+        # Same seed, same sequence of requests for every run being compared
+        self.random = random.Random(seed)
+
+    async def _session(self) -> HttpClient:
+        client = HttpClient(self.host, self.port)
+        if self.db and any(endpoint.params is not None for endpoint in self.endpoints):
+            await client.authenticate(self.db, self.login, self.password)
+        return client
+
+    async def _user(self, client, deadline, budget, result: LoadResult) -> None:
+        weights = [endpoint.weight for endpoint in self.endpoints]
+        while time.monotonic() < deadline:
+            if budget is not None:
+                if budget[0] <= 0:
+                    return
+                budget[0] -= 1
+            endpoint = self.random.choices(self.endpoints, weights)[0]
+            endpoint_result = result.endpoints.setdefault(endpoint.name, EndpointResult())
+            start = time.perf_counter()
+            try:
+                status, response = await client.request(
+                    endpoint.method, endpoint.path, endpoint.body
+                )
+            except (OSError, HttpError, asyncio.IncompleteReadError, ValueError):
+                endpoint_result.errors += 1
+                await client.close()
+                continue
+            if is_error(status, response, endpoint):
+                endpoint_result.errors += 1
+            else:
+                endpoint_result.latencies.append(time.perf_counter() - start)
+
+    async def _run(self, duration: Optional[float], requests: Optional[int], clients) -> LoadResult:
+        deadline = time.monotonic() + duration if duration else float("inf")
+        # A one item list, shared by all users of the event loop
+        budget = [requests] if requests else None
+        result = LoadResult(duration=0.0, endpoints={})
+        start = time.monotonic()
+        await asyncio.gather(*(self._user(client, deadline, budget, result) for client in clients))
+        result.duration = time.monotonic() - start
+        return result
+
+    async def _bench(self, duration, requests, warmup) -> LoadResult:
+        clients = [await self._session() for _ in range(self.concurrency)]
+        try:
+            if warmup:
+                print(f"Warming up for {warmup}s...")
+                await self._run(warmup, None, clients)
+            print(
+                f"Measuring {f'{requests} requests' if requests else f'{duration}s'} "
+                f"with {self.concurrency} concurrent sessions..."
+            )
+            return await self._run(None if requests else duration, requests, clients)
+        finally:
+            for client in clients:
+                await client.close()
+
+    def run(
+        self, duration: Optional[float] = 30, requests: Optional[int] = None, warmup: float = 5
+    ) -> LoadResult:
+        return asyncio.run(self._bench(duration, requests, warmup))
+
+
+def bench_http(
+    runner: Runner,
+    generator_options: dict,
+    duration: Optional[float] = 30,
+    requests: Optional[int] = None,
+    warmup: float = 5,
+    attach: bool = False,
+) -> LoadResult:
+    """Load the profile's Odoo, started in the background unless attaching to a running one"""
+    runner._set_default_db()
+    generator = LoadGenerator(
+        runner.http_host, runner.http_port, db=runner.db, **generator_options
+    )
+    if attach:
+        return generator.run(duration, requests, warmup)
+
+    # Keep the server's output away from the report
+    if runner.logfile is None:
+        runner.logfile = runner.app_dir / "bench-http.log"
+    print(f"Odoo logs to {runner.logfile}")
+    with runner.serving():
+        return generator.run(duration, requests, warmup)
+
+
+def bench_log_profiles(
+    runner: Runner,
+    generator_options: dict,
+    log_profiles: list[str],
+    duration: Optional[float] = 30,
+    warmup: float = 5,
+) -> dict[str, dict]:
+    """Run the same load under each log profile, logging to a file as a server would"""
+    log_dir = runner.app_dir / "bench-logging"
+    log_dir.mkdir(parents=True, exist_ok=True)
+    summaries = {}
+    for log_profile in log_profiles:
+        print(f"\nLog profile '{log_profile}'")
+        runner.log_profile = log_profile
+        runner.logfile = log_dir / f"{log_profile}.log"
+        runner.logfile.unlink(missing_ok=True)
+        summary = summarize(bench_http(runner, generator_options, duration, None, warmup))
+        summary["log_bytes"] = runner.logfile.stat().st_size if runner.logfile.exists() else 0
+        summaries[log_profile] = summary
+    return summaries
+
+
+def print_log_profiles_report(summaries: dict[str, dict]) -> None:
+    print()
+    print(f"{'Log profile':<14}{'req/s':>9}{'p50':>9}{'p95':>9}{'log size':>12}")
+    for log_profile, summary in summaries.items():
+        # Endpoint percentiles weighted by how many requests each one served
+        endpoints = summary["endpoints"].values()
+        served = sum(endpoint["count"] for endpoint in endpoints) or 1
+        p50 = sum(endpoint["median"] * endpoint["count"] for endpoint in endpoints) / served
+        p95 = sum(endpoint["p95"] * endpoint["count"] for endpoint in endpoints) / served
+        print(
+            f"{log_profile:<14}{summary['throughput']:>9.1f}{p50:>7.1f}ms{p95:>7.1f}ms"
+            f"{summary['log_bytes'] / 1024:>10.0f}KB"
+        )
+
+
+def summarize(result: LoadResult) -> dict:
+    endpoints = {}
+    for name, endpoint in sorted(result.endpoints.items()):
+        latencies_ms = [latency * 1000 for latency in endpoint.latencies]
+        summary = stats.summarize(latencies_ms)
+        summary["p99"] = stats.percentile(latencies_ms, 99)
+        summary["errors"] = endpoint.errors
+        summary["throughput"] = len(latencies_ms) / result.duration if result.duration else 0.0
+        endpoints[name] = summary
+    return {
+        "duration": result.duration,
+        "requests": result.requests,
+        "throughput": result.requests / result.duration if result.duration else 0.0,
+        "endpoints": endpoints,
+    }
+
+
+def print_report(summary: dict) -> None:
+    print()
+    print(
+        f"{summary['requests']} requests in {summary['duration']:.1f}s, "
+        f"{summary['throughput']:.1f} req/s"
+    )
+    print(
+        f"{'Endpoint':<30}{'req/s':>8}{'errors':>8}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}  (ms)"
+    )
+    for name, endpoint in summary["endpoints"].items():
+        print(
+            f"{name:<30}{endpoint['throughput']:>8.1f}{endpoint['errors']:>8}"
+            f"{endpoint['median']:>9.1f}{endpoint['p95']:>9.1f}{endpoint['p99']:>9.1f}"
+            f"{endpoint['max']:>9.1f}"
+        )
+
+
+def write_report(summary: dict, setup: dict, output: Path) -> None:
+    with open(output, "w") as f:
+        json.dump({"setup": setup, **summary}, f, indent=2)
+    print(f"Report written to {output}")
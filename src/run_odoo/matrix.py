@@ -0,0 +1,143 @@
+import re
+import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+from platformdirs import user_config_path
+
+from run_odoo import utils
+from run_odoo.runner import PYTHON_VERSIONS, Runner
+
+TEST_RESULT_RE = re.compile(r"(\d+) failed, (\d+) error\(s\) of (\d+) tests")
+
+
+@dataclass
+class MatrixResult:
+    version: float
+    db: str
+    logfile: Path
+    success: bool = False
+    duration: float = 0.0
+    summary: str = ""
+
+
+def parse_versions(versions: str) -> list[float]:
+    """Parse a comma-separated version list such as '16.0,17.0,18.0'"""
+    parsed = []
+    for version in versions.split(","):
+        version = version.strip()
+        if not version:
+            continue
+        try:
+            value = float(version)
+        except ValueError:
+            raise ValueError(f"Invalid Odoo version: {version}")
+        if value not in PYTHON_VERSIONS:
+            raise ValueError(f"Unsupported Odoo version: {version}")
+        parsed.append(value)
+
+    if not parsed:
+        raise ValueError("No Odoo versions specified")
+    return parsed
+
+
+def _test_summary(logfile: Path) -> str:
+    """Last test result line Odoo wrote, e.g. '0 failed, 0 error(s) of 42 tests'"""
+    if not logfile.exists():
+        return ""
+    summary = ""
+    with open(logfile, errors="replace") as f:
+        for line in f:
+            if match := TEST_RESULT_RE.search(line):
+                summary = match.group(0)
+    return summary
+
+
+def _prepare_runner(version: float, work_dir: Path, ports: list[int], **kwargs) -> Runner:
+    """Build a Runner with its own database, port, data dir and log file"""
+    version_dir = work_dir / str(version)
+    version_dir.mkdir(parents=True, exist_ok=True)
+    runner = Runner(
+        version=version,
+        http_port=ports.pop(),
+        data_dir=version_dir / "data",
+        logfile=version_dir / "odoo.log",
+        **kwargs,
+    )
+    runner._set_default_db()
+    runner.db = f"{runner.db}_matrix"
+    return runner
+
+
+def _run_version(runner: Runner) -> MatrixResult:
+    result = MatrixResult(version=runner.version, db=runner.db, logfile=runner.logfile)
+    # Keep logs from previous runs out of the summary
+    runner.logfile.unlink(missing_ok=True)
+    start = time.monotonic()
+    try:
+        runner.run_tests()
+        result.success = True
+    except subprocess.CalledProcessError:
+        result.success = False
+    result.duration = time.monotonic() - start
+    result.summary = _test_summary(runner.logfile)
+    return result
+
+
+def run_test_matrix(
+    addons: list[str],
+    versions: list[float],
+    work_dir: Optional[Path] = None,
+    enterprise: bool = False,
+    path: Optional[Path] = None,
+    extra_params: Optional[str] = None,
+) -> list[MatrixResult]:
+    """Prepare every version's environment, then test them all in parallel"""
+    if work_dir is None:
+        work_dir = user_config_path(appname="run_odoo", appauthor=False) / "matrix"
+
+    ports = []
+    while len(ports) < len(versions):
+        port = utils.find_free_port()
+        if port not in ports:
+            ports.append(port)
+
+    with ThreadPoolExecutor(max_workers=len(versions)) as executor:
+        print(f"Preparing environments for {', '.join(map(str, versions))}...")
+        prepare_start = time.monotonic()
+        runners = list(
+            executor.map(
+                lambda version: _prepare_runner(
+                    version,
+                    work_dir,
+                    ports,
+                    addons=addons,
+                    enterprise=enterprise,
+                    path=path,
+                    extra_params=extra_params,
+                ),
+                versions,
+            )
+        )
+        print(f"Environments ready in {time.monotonic() - prepare_start:.1f}s")
+
+        for runner in runners:
+            print(f"Odoo {runner.version}: logging to {runner.logfile}")
+        return list(executor.map(_run_version, runners))
+
+
+def print_matrix_report(results: list[MatrixResult]) -> None:
+    print()
+    print(f"{'Version':<10}{'Status':<8}{'Time':>10}  {'Tests':<36}Database")
+    for result in results:
+        status = "OK" if result.success else "FAILED"
+        print(
+            f"{result.version:<10}{status:<8}{result.duration:>9.1f}s  "
+            f"{result.summary or '-':<36}{result.db}"
+        )
+    for result in results:
+        if not result.success:
+            print(f"See {result.logfile} for Odoo {result.version} failures")
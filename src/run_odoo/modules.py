@@ -0,0 +1,38 @@
+import ast
+from pathlib import Path
+from typing import Iterable
+
+MANIFEST_NAMES = ("__manifest__.py", "__openerp__.py")
+
+
+def read_manifest(module_dir: Path) -> dict | None:
+    """Return the manifest of a module directory, or None if it is not a module"""
+    for name in MANIFEST_NAMES:
+        manifest_file = module_dir / name
+        if manifest_file.is_file():
+            try:
+                manifest = ast.literal_eval(manifest_file.read_text())
+            except (SyntaxError, ValueError):
+                print(f"Warning: Could not parse {manifest_file}")
+                return None
+            return manifest if isinstance(manifest, dict) else None
+    return None
+
+
+def find_modules(addons_paths: Iterable[str | Path]) -> dict[str, Path]:
+    """Map installable module names to their directory
+
+    Like Odoo, the first addons path providing a module wins.
+    """
+    modules: dict[str, Path] = {}
+    for addons_path in addons_paths:
+        addons_path = Path(addons_path)
+        if not addons_path.is_dir():
+            continue
+        for module_dir in sorted(addons_path.iterdir()):
+            if module_dir.name in modules or not module_dir.is_dir():
+                continue
+            manifest = read_manifest(module_dir)
+            if manifest is not None and manifest.get("installable", True):
+                modules[module_dir.name] = module_dir
+    return modules
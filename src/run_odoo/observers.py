@@ -0,0 +1,24 @@
+import subprocess
+
+
+class RunObserver:
+    """Hooks called around an odoo-bin process started by Runner
+
+    When a Runner has observers, Odoo's output is streamed through them
+    line by line instead of going straight to the terminal.
+    """
+
+    # Extra --log-handler values the observer needs, e.g. "odoo.sql_db:DEBUG"
+    log_handlers: tuple[str, ...] = ()
+    # Interpreter options odoo-bin must run with, e.g. ("-X", "importtime")
+    python_options: tuple[str, ...] = ()
+
+    def started(self, proc: subprocess.Popen) -> None:
+        """Called once the process is spawned"""
+
+    def line(self, line: str) -> bool:
+        """Called for each output line, return True to hide it from the terminal"""
+        return False
+
+    def finished(self, returncode: int | None) -> None:
+        """Called when the process exited, or was interrupted"""
@@ -0,0 +1,36 @@
+# Piped into `odoo-bin shell`, which executes it with `env` and `odoo` defined,
+# after exec_loop.py which defines run_batch. Runs the scripts listed in
+# RUN_ODOO_EXEC_SCRIPTS one after the other in the shell's transaction, each
+# in its own savepoint. Runs on the Python of the Odoo version, keep it
+# compatible with 3.6.
+import json
+import os
+import sys
+import traceback
+
+SCRIPTS = json.loads(os.environ["RUN_ODOO_EXEC_SCRIPTS"])
+COMMIT = bool(os.environ.get("RUN_ODOO_EXEC_COMMIT"))
+KEEP_GOING = bool(os.environ.get("RUN_ODOO_EXEC_KEEP_GOING"))
+
+cr = env.cr  # noqa: F821 - provided by odoo-bin shell
+
+
+def run_script(path):
+    namespace = {"env": env, "self": env.user, "odoo": odoo, "__name__": "__main__"}  # noqa: F821
+    try:
+        with open(path) as f:
+            code = compile(f.read(), path, "exec")
+        with cr.savepoint():
+            exec(code, namespace)
+    except SystemExit:
+        pass
+    except Exception:
+        traceback.print_exc()
+        return False
+    return True
+
+
+failed = run_batch(SCRIPTS, run_script, cr, COMMIT, KEEP_GOING)  # noqa: F821 - from exec_loop.py
+sys.stdout.flush()
+if failed:
+    sys.exit(1)
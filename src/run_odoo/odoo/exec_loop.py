@@ -0,0 +1,37 @@
+# The loop of `run-odoo exec`, shared by both ways of running scripts:
+# prepended to exec_batch.py for a one-off `odoo-bin shell`, and loaded by
+# shelld for the shell daemon. Runs on the Python of the Odoo version too,
+# keep it compatible with 3.6.
+import time
+
+
+def run_batch(scripts, run_script, cr, commit=False, keep_going=False):
+    """Run scripts one after the other in one transaction, each in a savepoint
+
+    run_script(script) runs a script in its own savepoint and returns whether
+    it succeeded, cr is what commits or rolls back the transaction. The
+    batch is rolled back at the first failing script, or with keep_going
+    only that script's changes are. Returns the failed scripts.
+    """
+    failed = []
+    for script in scripts:
+        print("==> {}".format(script), flush=True)
+        started = time.time()
+        succeeded = run_script(script)
+        status = "done" if succeeded else "failed"
+        print("<== {} {} in {:.2f}s".format(script, status, time.time() - started), flush=True)
+        if not succeeded:
+            failed.append(script)
+            if not keep_going:
+                break
+
+    if failed and not keep_going:
+        cr.rollback()
+        print("Rolled back")
+    elif commit:
+        cr.commit()
+        print("Committed" + (", without the changes of failed scripts" if failed else ""))
+    else:
+        cr.rollback()
+        print("Rolled back, use --commit to keep the changes")
+    return failed
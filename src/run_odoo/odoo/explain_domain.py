@@ -0,0 +1,71 @@
+# Piped into `odoo-bin shell`, which executes it with `env` defined.
+# Compiles a search domain into the SQL the ORM would run, explains it and
+# writes the plan, with the columns the domain filters and sorts on, as JSON to
+# RUN_ODOO_EXPLAIN_OUTPUT. Runs on the Python of the Odoo version, keep it
+# compatible with 3.6.
+import ast
+import json
+import os
+
+output_path = os.environ["RUN_ODOO_EXPLAIN_OUTPUT"]
+model = env[os.environ["RUN_ODOO_EXPLAIN_MODEL"]]  # noqa: F821 - provided by odoo-bin shell
+domain = ast.literal_eval(os.environ.get("RUN_ODOO_EXPLAIN_DOMAIN") or "[]")
+order = os.environ.get("RUN_ODOO_EXPLAIN_ORDER") or None
+limit = int(os.environ.get("RUN_ODOO_EXPLAIN_LIMIT") or 0) or None
+login = os.environ.get("RUN_ODOO_EXPLAIN_USER")
+if login:
+    # Record rules of the user apply, as in their list views
+    model = model.with_user(env["res.users"].search([("login", "=", login)], limit=1))  # noqa: F821
+
+
+def field_columns(model, path, operator):
+    """Stored columns a field path goes through, as (table, column, model, field, operator)"""
+    columns = []
+    for name in path.split("."):
+        field = model._fields.get(name)
+        if field is None:
+            break
+        if field.store and field.column_type:
+            columns.append({
+                "table": model._table,
+                "column": name,
+                "model": model._name,
+                "field": name,
+                "operator": operator,
+                "index": field.index if isinstance(field.index, str) else bool(field.index),
+            })
+        if not field.relational:
+            break
+        model = model.env[field.comodel_name]
+    return columns
+
+
+columns = []
+for leaf in domain:
+    if isinstance(leaf, (list, tuple)) and len(leaf) == 3 and isinstance(leaf[0], str):
+        columns.extend(field_columns(model, leaf[0], leaf[1]))
+for part in (order or model._order or "").split(","):
+    if part.strip():
+        columns.extend(field_columns(model, part.split()[0], "order"))
+
+result = {"model": model._name, "domain": repr(domain), "columns": columns, "indexes": {}}
+query = model._search(domain, limit=limit, order=order)
+if not hasattr(query, "select"):
+    # Older versions return ids right away for domains known to match nothing
+    result["error"] = "The domain matches nothing, no query is run"
+else:
+    select = query.select()
+    # (sql, params) before Odoo 17, an SQL object since
+    sql, params = select if isinstance(select, tuple) else (select.code, select.params)
+    cr = env.cr  # noqa: F821
+    result["sql"] = cr.mogrify(sql, params).decode()
+    cr.execute("EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) " + sql, params)
+    plan = cr.fetchone()[0]
+    # psycopg2 decodes json columns, unless the type is unknown to it
+    result["plan"] = (plan if isinstance(plan, list) else json.loads(plan))[0]
+    for table in set(column["table"] for column in columns):
+        cr.execute("SELECT indexdef FROM pg_indexes WHERE tablename = %s", [table])
+        result["indexes"][table] = [row[0] for row in cr.fetchall()]
+
+with open(output_path, "w") as f:
+    json.dump(result, f, default=str)
@@ -0,0 +1,101 @@
+# Piped into `odoo-bin shell`, which executes it with `env` and `odoo` defined.
+# Keeps the registry loaded and serves code execution requests on a Unix
+# socket, one cursor and namespace per connection. Runs on the Python of the
+# Odoo version, keep it compatible with 3.6.
+import contextlib
+import hashlib
+import io
+import json
+import os
+import socketserver
+import threading
+import time
+import traceback
+
+from odoo import SUPERUSER_ID, api
+from odoo.modules.registry import Registry
+
+SOCKET_PATH = os.environ["RUN_ODOO_SHELL_SOCKET"]
+DB_NAME = env.cr.dbname  # noqa: F821 - provided by odoo-bin shell
+# stdout and stderr are redirected per request, requests take turns
+OUTPUT_LOCK = threading.Lock()
+
+
+def module_signature(cr):
+    """Installed modules and their versions, to notice updates made by other processes"""
+    cr.execute(
+        "SELECT name, latest_version, write_date FROM ir_module_module "
+        "WHERE state = 'installed' ORDER BY name"
+    )
+    return hashlib.sha1(repr(cr.fetchall()).encode()).hexdigest()
+
+
+# The Python code loaded below is the one of the modules installed now
+SIGNATURE = module_signature(env.cr)  # noqa: F821
+
+
+def execute(request, namespace, cr):
+    output = io.StringIO()
+    started = time.time()
+    error = None
+    with OUTPUT_LOCK, contextlib.redirect_stdout(output), contextlib.redirect_stderr(output):
+        try:
+            code = compile(request["code"], request.get("filename", "<run-odoo>"), request.get("mode", "exec"))
+            # A failing script in a savepoint only undoes its own changes
+            with cr.savepoint() if request.get("savepoint") else contextlib.ExitStack():
+                exec(code, namespace)
+        except SystemExit:
+            pass
+        except BaseException:
+            error = traceback.format_exc()
+    return {"output": output.getvalue(), "error": error, "duration": time.time() - started}
+
+
+class Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        threading.current_thread().dbname = DB_NAME
+        with contextlib.ExitStack() as stack:
+            # Needed before Odoo 15, a deprecated no-op since
+            if hasattr(api.Environment, "manage"):
+                stack.enter_context(api.Environment.manage())
+            # Picks up a registry reloaded after modules were upgraded elsewhere
+            registry = Registry(DB_NAME).check_signaling()
+            cr = stack.enter_context(contextlib.closing(registry.cursor()))
+            stack.callback(cr.rollback)
+            env = api.Environment(cr, SUPERUSER_ID, {})
+            namespace = {"env": env, "self": env.user, "odoo": __import__("odoo"), "__name__": "__main__"}
+            for line in self.rfile:
+                request = json.loads(line.decode())
+                action = request.get("action", "exec")
+                if action == "exec":
+                    response = execute(request, namespace, cr)
+                elif action == "commit":
+                    cr.commit()
+                    response = {}
+                elif action == "rollback":
+                    cr.rollback()
+                    response = {}
+                elif action == "stop":
+                    threading.Thread(target=self.server.shutdown).start()
+                    response = {}
+                else:
+                    # Stale once modules were installed or updated since the start
+                    response = {"registry": DB_NAME, "stale": module_signature(cr) != SIGNATURE}
+                self.wfile.write(json.dumps(response).encode() + b"\n")
+                self.wfile.flush()
+
+
+class Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+if os.path.exists(SOCKET_PATH):
+    os.unlink(SOCKET_PATH)
+server = Server(SOCKET_PATH, Handler)
+os.chmod(SOCKET_PATH, 0o600)
+print("run-odoo shell daemon serving {} on {}".format(DB_NAME, SOCKET_PATH), flush=True)
+try:
+    server.serve_forever()
+finally:
+    server.server_close()
+    os.unlink(SOCKET_PATH)
@@ -0,0 +1,108 @@
+import re
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Iterable, Optional
+
+# Default Odoo log format:
+# %(asctime)s %(pid)s %(levelname)s %(dbname)s %(name)s: %(message)s
+LOG_LINE_RE = re.compile(
+    r"^(?P<date>\d{4}-\d\d-\d\d \d\d:\d\d:\d\d,\d{3}) (?P<pid>\d+) (?P<level>[A-Z]+) "
+    r"(?P<db>\S+) (?P<logger>[\w.\-]+): (?P<message>.*)$"
+)
+LOADING_MODULE_RE = re.compile(r"^Loading module (?P<module>\w+) \(\d+/\d+\)")
+MODULES_LOADED = "Modules loaded."
+
+# Needed for the "Loading module" lines used to attribute time to modules
+MODULE_LOADING_HANDLER = "odoo.modules.loading:DEBUG"
+
+
+@dataclass
+class LogRecord:
+    timestamp: float
+    pid: int
+    level: str
+    db: str
+    logger: str
+    message: str
+
+
+def parse_line(line: str) -> Optional[LogRecord]:
+    """Parse one Odoo log line, None for continuation lines (tracebacks, queries)"""
+    match = LOG_LINE_RE.match(line.rstrip("\n"))
+    if not match:
+        return None
+    timestamp = datetime.strptime(match["date"], "%Y-%m-%d %H:%M:%S,%f").timestamp()
+    return LogRecord(
+        timestamp=timestamp,
+        pid=int(match["pid"]),
+        level=match["level"],
+        db=match["db"],
+        logger=match["logger"],
+        message=match["message"],
+    )
+
+
+def parse_lines(lines: Iterable[str]) -> Iterable[LogRecord]:
+    for line in lines:
+        if record := parse_line(line):
+            yield record
+
+
+def loading_module(record: LogRecord) -> Optional[str]:
+    """Module name if the record announces that Odoo starts loading a module"""
+    if record.logger != "odoo.modules.loading":
+        return None
+    match = LOADING_MODULE_RE.match(record.message)
+    return match["module"] if match else None
+
+
+@dataclass
+class ModuleLoad:
+    module: str
+    duration: float = 0.0
+    errors: int = 0
+
+
+class ModuleLoadTracker:
+    """Follow which module Odoo is loading from a stream of records
+
+    Time runs from one "Loading module" line to the next, ERROR and CRITICAL
+    records are attributed to the module being loaded.
+    """
+
+    def __init__(self) -> None:
+        self.loads: dict[str, ModuleLoad] = {}
+        self.current: Optional[ModuleLoad] = None
+        self.loaded = False
+        self._started = 0.0
+        self._last_timestamp = 0.0
+
+    def feed(self, record: LogRecord) -> None:
+        self._last_timestamp = record.timestamp
+        module = loading_module(record)
+        finished = record.logger == "odoo.modules.loading" and record.message == MODULES_LOADED
+        if module or finished:
+            self._stop(record.timestamp)
+            if module:
+                self.current = self.loads.setdefault(module, ModuleLoad(module))
+            self._started = record.timestamp
+            self.loaded = finished
+        elif self.current and record.level in ("ERROR", "CRITICAL"):
+            self.current.errors += 1
+
+    def _stop(self, timestamp: float) -> None:
+        if self.current:
+            self.current.duration += timestamp - self._started
+            self.current = None
+
+    def close(self) -> dict[str, ModuleLoad]:
+        self._stop(self._last_timestamp)
+        return self.loads
+
+
+def module_loads(records: Iterable[LogRecord]) -> dict[str, ModuleLoad]:
+    """Time spent loading each module, see ModuleLoadTracker"""
+    tracker = ModuleLoadTracker()
+    for record in records:
+        tracker.feed(record)
+    return tracker.close()
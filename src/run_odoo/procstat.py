@@ -0,0 +1,182 @@
+import csv
+import os
+import subprocess
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+from run_odoo import utils
+from run_odoo.observers import RunObserver
+from run_odoo.sampling import process_role
+
+CLOCK_TICKS = os.sysconf("SC_CLK_TCK")
+CSV_FIELDS = ["time", "pid", "role", "rss_kb", "uss_kb", "cpu_seconds", "threads", "vms_kb"]
+
+
+@dataclass
+class ProcSample:
+    time: float
+    pid: int
+    role: str
+    rss_kb: int
+    uss_kb: int
+    cpu_seconds: float
+    threads: int
+    # Virtual size, what Odoo compares to limit_memory_soft and caps with
+    # limit_memory_hard (RLIMIT_AS)
+    vms_kb: int = 0
+
+
+def read_sample(pid: int, role: str, proc_root: Path = Path("/proc")) -> Optional[ProcSample]:
+    """Memory, CPU time and threads of a process, None if it is gone"""
+    proc_dir = proc_root / str(pid)
+    try:
+        status = (proc_dir / "status").read_text()
+        stat = (proc_dir / "stat").read_text()
+    except OSError:
+        return None
+
+    fields = {}
+    for line in status.splitlines():
+        name, _, value = line.partition(":")
+        fields[name] = value.split()
+    # Fields after the parenthesized command name, utime and stime are the 14th and 15th
+    stat_fields = stat[stat.rindex(")") + 2 :].split()
+    cpu_ticks = int(stat_fields[11]) + int(stat_fields[12])
+
+    # Memory only this process would free on exit, what recycling a worker gives back
+    uss_kb = 0
+    try:
+        for line in (proc_dir / "smaps_rollup").read_text().splitlines():
+            if line.startswith(("Private_Clean:", "Private_Dirty:")):
+                uss_kb += int(line.split()[1])
+    except OSError:
+        pass
+
+    return ProcSample(
+        time=time.time(),
+        pid=pid,
+        role=role,
+        rss_kb=int(fields.get("VmRSS", ["0"])[0]),
+        uss_kb=uss_kb,
+        cpu_seconds=cpu_ticks / CLOCK_TICKS,
+        threads=int(fields.get("Threads", ["0"])[0]),
+        vms_kb=int(fields.get("VmSize", ["0"])[0]),
+    )
+
+
+@dataclass
+class ProcessSummary:
+    pid: int
+    role: str
+    samples: int
+    first_seen: float
+    last_seen: float
+    peak_rss_kb: int
+    avg_rss_kb: float
+    peak_uss_kb: int
+    cpu_seconds: float
+    max_threads: int
+    peak_vms_kb: int
+
+
+def summarize(samples: list[ProcSample]) -> list[ProcessSummary]:
+    by_pid: dict[int, list[ProcSample]] = {}
+    for sample in samples:
+        by_pid.setdefault(sample.pid, []).append(sample)
+
+    summaries = []
+    for pid, process_samples in by_pid.items():
+        summaries.append(
+            ProcessSummary(
+                pid=pid,
+                role=process_samples[0].role,
+                samples=len(process_samples),
+                first_seen=process_samples[0].time,
+                last_seen=process_samples[-1].time,
+                peak_rss_kb=max(sample.rss_kb for sample in process_samples),
+                avg_rss_kb=sum(sample.rss_kb for sample in process_samples) / len(process_samples),
+                peak_uss_kb=max(sample.uss_kb for sample in process_samples),
+                cpu_seconds=process_samples[-1].cpu_seconds,
+                max_threads=max(sample.threads for sample in process_samples),
+                peak_vms_kb=max(sample.vms_kb for sample in process_samples),
+            )
+        )
+    return sorted(summaries, key=lambda summary: summary.first_seen)
+
+
+class ProcessSampler(RunObserver):
+    """Sample RSS, USS, CPU time and threads of the whole Odoo process tree"""
+
+    def __init__(self, output: Optional[Path] = None, interval: float = 1.0) -> None:
+        self.output = output
+        self.interval = interval
+        self.samples: list[ProcSample] = []
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._file = None
+        self._writer = None
+
+    def _sample_tree(self, main_pid: int) -> None:
+        for pid in [main_pid] + utils.child_pids(main_pid):
+            sample = read_sample(pid, process_role(pid, main_pid))
+            if sample is None:
+                continue
+            self.samples.append(sample)
+            if self._writer:
+                self._writer.writerow([getattr(sample, name) for name in CSV_FIELDS])
+        if self._file:
+            self._file.flush()
+
+    def _sample_loop(self, main_pid: int) -> None:
+        while not self._stop.is_set():
+            self._sample_tree(main_pid)
+            self._stop.wait(self.interval)
+
+    def started(self, proc: subprocess.Popen) -> None:
+        if self.output:
+            self._file = open(self.output, "w", newline="")
+            self._writer = csv.writer(self._file)
+            self._writer.writerow(CSV_FIELDS)
+        self._thread = threading.Thread(target=self._sample_loop, args=(proc.pid,), daemon=True)
+        self._thread.start()
+
+    def finished(self, returncode: int | None) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+        if self._file:
+            self._file.close()
+            print(f"Process samples written to {self.output}")
+        print_report(summarize(self.samples))
+
+
+def print_report(summaries: list[ProcessSummary]) -> None:
+    if not summaries:
+        print("No process samples were taken")
+        return
+    print()
+    print(
+        f"{'PID':>8}  {'Role':<8}{'Alive':>8}{'Peak RSS':>10}{'Avg RSS':>10}"
+        f"{'Peak USS':>10}{'Peak VMS':>10}{'CPU':>9}{'Threads':>9}"
+    )
+    for summary in summaries:
+        print(
+            f"{summary.pid:>8}  {summary.role:<8}"
+            f"{summary.last_seen - summary.first_seen:>7.0f}s"
+            f"{summary.peak_rss_kb / 1024:>8.0f}MB{summary.avg_rss_kb / 1024:>8.0f}MB"
+            f"{summary.peak_uss_kb / 1024:>8.0f}MB{summary.peak_vms_kb / 1024:>8.0f}MB"
+            f"{summary.cpu_seconds:>8.1f}s"
+            f"{summary.max_threads:>9}"
+        )
+    workers = [summary for summary in summaries if summary.role == "worker"]
+    if workers:
+        # Odoo checks limit_memory_soft against virtual size, not RSS: limits
+        # sized from RSS would recycle or kill workers right away
+        peak = max(summary.peak_vms_kb for summary in workers)
+        print(
+            f"\n{len(workers)} worker processes seen, highest worker peak virtual size "
+            f"{peak / 1024:.0f}MB: limit_memory_soft and limit_memory_hard must stay above it"
+        )
@@ -0,0 +1,214 @@
+import asyncio
+import json
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterable, Optional
+
+from run_odoo import loadtest
+from run_odoo.runner import Runner
+
+
+@dataclass
+class RecordedCall:
+    time: float
+    model: str
+    method: str
+    args: list = field(default_factory=list)
+    kwargs: dict = field(default_factory=dict)
+    session: Optional[str] = None
+
+    @property
+    def name(self) -> str:
+        return f"{self.model}.{self.method}"
+
+    @property
+    def endpoint(self) -> loadtest.Endpoint:
+        return loadtest.call_kw(self.model, self.method, self.args, self.kwargs)
+
+
+def read_calls(lines: Iterable[str]) -> list[RecordedCall]:
+    """Calls from a log written by the tracing addon, in the order they were made"""
+    calls = []
+    for line in lines:
+        if not line.strip():
+            continue
+        data = json.loads(line)
+        calls.append(
+            RecordedCall(
+                time=data["time"],
+                model=data["model"],
+                method=data["method"],
+                args=data.get("args") or [],
+                kwargs=data.get("kwargs") or {},
+                session=data.get("session"),
+            )
+        )
+    return sorted(calls, key=lambda call: call.time)
+
+
+def assign_sessions(calls: list[RecordedCall], sessions: int) -> list[list[RecordedCall]]:
+    """Spread calls over the replay sessions, keeping each recorded session's calls together"""
+    queues: list[list[RecordedCall]] = [[] for _ in range(sessions)]
+    slots: dict[Optional[str], int] = {}
+    for index, call in enumerate(calls):
+        if call.session is None:
+            # Unknown session, e.g. external API calls
+            slot = index % sessions
+        else:
+            slot = slots.setdefault(call.session, len(slots) % sessions)
+        queues[slot].append(call)
+    return queues
+
+
+class Replayer:
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        db: str,
+        calls: list[RecordedCall],
+        sessions: int = 10,
+        speed: float = 1.0,
+        login: str = "admin",
+        password: str = "admin",
+    ) -> None:
+        self.host = host
+        self.port = port
+        self.db = db
+        self.calls = calls
+        self.sessions = sessions
+        # 2.0 replays twice as fast as recorded, 0 as fast as possible
+        self.speed = speed
+        self.login = login
+        self.password = password
+
+    async def _session(self, calls, origin, start, result: loadtest.LoadResult) -> None:
+        client = loadtest.HttpClient(self.host, self.port)
+        try:
+            await client.authenticate(self.db, self.login, self.password)
+            for call in calls:
+                if self.speed:
+                    delay = start + (call.time - origin) / self.speed - time.monotonic()
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                endpoint = call.endpoint
+                call_result = result.endpoints.setdefault(call.name, loadtest.EndpointResult())
+                request_start = time.perf_counter()
+                try:
+                    status, response = await client.request("POST", endpoint.path, endpoint.body)
+                except (OSError, loadtest.HttpError, asyncio.IncompleteReadError, ValueError):
+                    call_result.errors += 1
+                    await client.close()
+                    continue
+                if loadtest.is_error(status, response, endpoint):
+                    call_result.errors += 1
+                else:
+                    call_result.latencies.append(time.perf_counter() - request_start)
+        finally:
+            await client.close()
+
+    async def _replay(self) -> loadtest.LoadResult:
+        result = loadtest.LoadResult(duration=0.0, endpoints={})
+        if not self.calls:
+            return result
+        origin = self.calls[0].time
+        start = time.monotonic()
+        await asyncio.gather(
+            *(
+                self._session(calls, origin, start, result)
+                for calls in assign_sessions(self.calls, self.sessions)
+                if calls
+            )
+        )
+        result.duration = time.monotonic() - start
+        return result
+
+    def run(self) -> loadtest.LoadResult:
+        recorded = self.calls[-1].time - self.calls[0].time if self.calls else 0
+        print(
+            f"Replaying {len(self.calls)} calls recorded over {recorded:.0f}s "
+            f"with {self.sessions} sessions"
+            + (f" at {self.speed}x speed" if self.speed else " as fast as possible")
+        )
+        return asyncio.run(self._replay())
+
+
+def replay(
+    runner: Runner,
+    calls: list[RecordedCall],
+    replayer_options: dict,
+    attach: bool = False,
+) -> loadtest.LoadResult:
+    runner._set_default_db()
+    replayer = Replayer(runner.http_host, runner.http_port, runner.db, calls, **replayer_options)
+    if attach:
+        return replayer.run()
+
+    if runner.logfile is None:
+        runner.logfile = runner.app_dir / "replay.log"
+    print(f"Odoo logs to {runner.logfile}")
+    with runner.serving():
+        return replayer.run()
+
+
+@dataclass
+class Comparison:
+    name: str
+    baseline_p50: float
+    candidate_p50: float
+    baseline_p95: float
+    candidate_p95: float
+
+    @property
+    def p95_change(self) -> float:
+        """Relative p95 change in percent, positive is slower"""
+        if not self.baseline_p95:
+            return 0.0
+        return 100 * (self.candidate_p95 - self.baseline_p95) / self.baseline_p95
+
+
+def compare(baseline: dict, candidate: dict) -> list[Comparison]:
+    """Latencies of the endpoints both reports (bench-http or replay) measured"""
+    comparisons = []
+    for name, before in baseline["endpoints"].items():
+        after = candidate["endpoints"].get(name)
+        if after is None or not before["count"] or not after["count"]:
+            continue
+        comparisons.append(
+            Comparison(name, before["median"], after["median"], before["p95"], after["p95"])
+        )
+    return sorted(comparisons, key=lambda comparison: comparison.p95_change, reverse=True)
+
+
+def load_report(path: Path) -> dict:
+    with open(path) as f:
+        return json.load(f)
+
+
+def print_comparison(
+    comparisons: list[Comparison], baseline: dict, candidate: dict, tolerance: float
+) -> list[Comparison]:
+    """Print the comparison and return the endpoints whose p95 got slower than tolerated"""
+    print(
+        f"Throughput: {baseline['throughput']:.1f} -> {candidate['throughput']:.1f} req/s, "
+        f"errors: {sum(e['errors'] for e in baseline['endpoints'].values())} -> "
+        f"{sum(e['errors'] for e in candidate['endpoints'].values())}"
+    )
+    print(
+        f"{'Endpoint':<40}{'p50 before':>12}{'after':>10}"
+        f"{'p95 before':>12}{'after':>10}{'change':>9}"
+    )
+    regressions = []
+    for comparison in comparisons:
+        flag = ""
+        if comparison.p95_change > tolerance:
+            regressions.append(comparison)
+            flag = "  slower"
+        print(
+            f"{comparison.name:<40}"
+            f"{comparison.baseline_p50:>10.1f}ms{comparison.candidate_p50:>8.1f}ms"
+            f"{comparison.baseline_p95:>10.1f}ms{comparison.candidate_p95:>8.1f}ms"
+            f"{comparison.p95_change:>+8.0f}%{flag}"
+        )
+    return regressions
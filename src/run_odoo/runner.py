@@ -1,12 +1,23 @@
+from contextlib import contextmanager
 from dataclasses import dataclass, field
 from operator import add
 from os import environ
+import hashlib
+import json
+import secrets
 import subprocess
 from platformdirs import user_config_path
 import os
+import sys
+import time
+import threading
 from pathlib import Path
 import distro
+from . import db as pg
+from . import modules
 from . import utils
+from .observers import RunObserver
+from .timings import PhaseTimer
 from typing import Optional
 
 
@@ -20,10 +31,66 @@ PYTHON_VERSIONS = {
 
 ODOO_URL = "https://github.com/odoo/odoo.git"
 ENT_ODOO_URL = "git@github.com:odoo/enterprise.git"
+# Package managers hold a global lock, environments prepared in parallel take turns
+SYSTEM_DEPS_LOCK = threading.Lock()
+# Versions sharing a pyenv Python, or profiles sharing a virtualenv, must not
+# check and create it at the same time: one lock per Python or virtualenv
+SETUP_LOCKS: dict[str, threading.Lock] = {}
+SETUP_LOCKS_GUARD = threading.Lock()
+
+
+def _setup_lock(name: str) -> threading.Lock:
+    with SETUP_LOCKS_GUARD:
+        return SETUP_LOCKS.setdefault(name, threading.Lock())
+
+
+# Server limits and their odoo-bin options, which don't share a naming scheme
+SERVER_LIMIT_OPTIONS = {
+    "limit_memory_soft": "--limit-memory-soft",
+    "limit_memory_hard": "--limit-memory-hard",
+    "limit_request": "--limit-request",
+    "db_maxconn": "--db_maxconn",
+}
+
 # FIXME: update db_user to odoo - keeping openerp for compatibility
 DEFAULT_OPTS = " --db_host=localhost --db_user=openerp --db_password=openerp --limit-time-cpu=3600 --limit-time-real=3600"
 
 
+# Server-wide addons shipped with run-odoo
+ADDONS_DIR = Path(__file__).parent / "addons"
+TRACE_MODULE = "run_odoo_trace"
+# Piped into odoo-bin shell to serve code over a Unix socket
+SHELL_DAEMON_SCRIPT = Path(__file__).parent / "odoo" / "shell_daemon.py"
+# Piped into odoo-bin shell to run scripts in one registry load
+EXEC_BATCH_SCRIPT = Path(__file__).parent / "odoo" / "exec_batch.py"
+# The batch loop itself, shared with the shell daemon
+EXEC_LOOP_SCRIPT = Path(__file__).parent / "odoo" / "exec_loop.py"
+
+# Named logging setups: Odoo's --log-level plus per-logger handlers.
+# Without a profile, log_level is used and Python warnings are shown.
+LOG_PROFILES = {
+    "quiet": ("warn", ["py.warnings:ERROR"]),
+    "dev": ("info", ["py.warnings:INFO"]),
+    "debug-sql": ("info", ["py.warnings:INFO", "odoo.sql_db:DEBUG"]),
+    # Nothing below errors, not even access logs, to measure the server alone
+    "bench": ("error", ["py.warnings:ERROR"]),
+}
+DEFAULT_LOG_HANDLERS = ["py.warnings:INFO"]
+
+LOG_LEVELS = ["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"]
+
+
+def _merge_log_handlers(handlers):
+    """Keep one handler per logger, the most verbose level wins"""
+    levels = {}
+    for handler in handlers:
+        logger, _, level = handler.rpartition(":")
+        current = levels.get(logger)
+        if current is None or LOG_LEVELS.index(level) < LOG_LEVELS.index(current):
+            levels[logger] = level
+    return [f"{logger}:{level}" for logger, level in levels.items()]
+
+
 @dataclass
 class Runner:
     version: float
@@ -33,23 +100,52 @@ class Runner:
     enterprise: bool = False
     themes: bool = False
     log_level: str = "warn"
+    log_profile: Optional[str] = None
     workers: int = 0
     max_cron_threads: int = 0
+    limit_memory_soft: Optional[int] = None
+    limit_memory_hard: Optional[int] = None
+    limit_request: Optional[int] = None
+    db_maxconn: Optional[int] = None
     db_host: str = "localhost"
     db_user: str = "odoo"
     db_password: str = "odoo"
     http_port: int = 8069
+    gevent_port: Optional[int] = None
     http_interface: str = "0.0.0.0"
     extra_params: Optional[str] = None
     install_modules: bool = True
     stop_after_init: bool = False
     test_enable: bool = False
+    data_dir: Optional[Path] = None
+    logfile: Optional[Path] = None
+    coverage: bool = False
+    log_handlers: list[str] = field(default_factory=list)
+    observers: list[RunObserver] = field(default_factory=list)
+    timings: bool = False
+    trace: bool = False
+    record_calls: Optional[Path] = None
+    vacuum_analyze: bool = False
 
     def __post_init__(self) -> None:
+        self.timer = None
+        if self.record_calls:
+            # Calls are recorded by the tracing addon
+            self.trace = True
+        # Required to read the recent requests, a new one every run
+        self.trace_token = secrets.token_urlsafe(16) if self.trace else None
+        if self.timings:
+            self.timer = PhaseTimer(host=self.http_host, port=self.http_port)
+            self.observers.append(self.timer)
         self.sanity_check()
         self.home_dir = Path.home()
         self._prepare_env()
 
+    @property
+    def http_host(self):
+        """Address to reach the HTTP server on from this machine"""
+        return "127.0.0.1" if self.http_interface == "0.0.0.0" else self.http_interface
+
     # FIXME: implement more validation
     def sanity_check(self):
         if not self.version:
@@ -58,14 +154,16 @@ class Runner:
         if self.version not in PYTHON_VERSIONS:
             raise ValueError(f"Unsupported Odoo version: {self.version}")
 
+        if self.log_profile and self.log_profile not in LOG_PROFILES:
+            raise ValueError(
+                f"Unknown log profile: {self.log_profile}, use one of {', '.join(LOG_PROFILES)}"
+            )
+
         if not self.addons and self.install_modules:
             print("Warning: No modules specified for installation")
 
-    # FIXME: improve readability and modularity
-    def _prepare_params(self):
-        """Build command line options for Odoo"""
-        options = []
-
+    def _get_addons_paths(self):
+        """Addons paths of the Odoo source, enterprise and custom path, in that order"""
         # Build addons paths
         addon_paths = []
 
@@ -106,10 +204,27 @@ class Runner:
                     if custom_enterprise.exists():
                         addon_paths.append(str(custom_enterprise))
 
+        if self.trace:
+            addon_paths.append(str(ADDONS_DIR))
+
+        return addon_paths
+
+    # FIXME: improve readability and modularity
+    def _prepare_params(self):
+        """Build command line options for Odoo"""
+        options = []
+        addon_paths = self._get_addons_paths()
+
         # Database options
         if self.db:
             options.extend(["-d", self.db])
 
+        if self.data_dir:
+            options.extend(["--data-dir", str(self.data_dir)])
+
+        if self.logfile:
+            options.extend(["--logfile", str(self.logfile)])
+
         if addon_paths:
             options.extend(["--addons-path", ",".join(addon_paths)])
             print(f"Addons paths: {','.join(addon_paths)}")
@@ -117,6 +232,7 @@ class Runner:
             print("Warning: No addons paths found")
 
         # Server options
+        log_level, log_handlers = self._log_settings()
         options.extend(
             [
                 "--http-interface",
@@ -124,19 +240,30 @@ class Runner:
                 "--http-port",
                 str(self.http_port),
                 "--load",
-                "web,base",
+                ",".join(self._server_wide_modules()),
                 "--workers",
                 str(self.workers),
                 "--max-cron-threads",
                 str(self.max_cron_threads),
                 "--log-level",
-                self.log_level,
-                "--log-handler",
-                ":DEBUG",
-                "--log-handler",
-                "py.warnings:INFO",
+                log_level,
             ]
         )
+        if self.gevent_port is not None:
+            # Renamed in Odoo 16 along with the move to websockets
+            gevent_option = "--gevent-port" if self.version >= 16.0 else "--longpolling-port"
+            options.extend([gevent_option, str(self.gevent_port)])
+
+        for name, option in SERVER_LIMIT_OPTIONS.items():
+            value = getattr(self, name)
+            if value is not None:
+                options.extend([option, str(value)])
+
+        extra_handlers = log_handlers + list(self.log_handlers)
+        for observer in self.observers:
+            extra_handlers.extend(observer.log_handlers)
+        for handler in _merge_log_handlers(extra_handlers):
+            options.extend(["--log-handler", handler])
 
         # Module installation
         if self.addons and self.install_modules:
@@ -163,19 +290,27 @@ class Runner:
         )
 
         self._setup_odoo_source()
+        self._mark("odoo source ready")
         self._setup_enterprise_source()
+        self._mark("enterprise source ready")
         self._setup_virtual_environment()
+        self._mark("virtualenv ready")
+
+    def _mark(self, label):
+        if self.timer:
+            self.timer.mark(label)
 
     def _setup_odoo_source(self):
         self.odoo_root_dir = self.app_dir / str(self.version)
         if not self.odoo_root_dir.exists():
             # FIXME: pull: maybe an util func to reuse in update odoo_src - create utils.clone_or_update_repo
             os.mkdir(self.odoo_root_dir)
-            os.chdir(self.odoo_root_dir)
             # FIXME: check shallow clone: https://stackoverflow.com/questions/37531605/how-to-test-if-git-repository-is-shallow
+            # cwd instead of os.chdir: several versions may be prepared in parallel
             subprocess.run(
                 ["git", "clone", ODOO_URL, "-b", str(self.version), "odoo"],
                 check=True,
+                cwd=self.odoo_root_dir,
             )
         else:
             # TODO: update branch? - implement git pull for updates
@@ -233,13 +368,18 @@ class Runner:
             raise RuntimeError("pyenv is not installed or not in PATH")
 
         # Install Python version if not available
-        result = subprocess.run(
-            ["pyenv", "versions", "--bare"], capture_output=True, text=True
-        )
-        if py_version not in result.stdout:
-            print(f"Installing Python {py_version}...")
-            subprocess.run(["pyenv", "install", py_version], check=True)
+        with _setup_lock(f"python-{py_version}"):
+            result = subprocess.run(
+                ["pyenv", "versions", "--bare"], capture_output=True, text=True
+            )
+            if py_version not in result.stdout:
+                print(f"Installing Python {py_version}...")
+                subprocess.run(["pyenv", "install", py_version], check=True)
 
+        with _setup_lock(self.venv):
+            self._create_virtual_environment(py_version)
+
+    def _create_virtual_environment(self, py_version):
         # Create virtual environment if it doesn't exist
         result = subprocess.run(
             ["pyenv", "virtualenvs", "--bare"], capture_output=True, text=True
@@ -252,10 +392,11 @@ class Runner:
             # FIXME: what about venv exists but some packages are not installed yet - add package verification
             # FIXME: check module python-packages required using manifestoo - integrate manifestoo for dependency analysis
             # TODO: maybe use a class like strategy to handle this - create DistroStrategy pattern
-            if distro.id() == "fedora":
-                utils.install_dependecies_fedora()
-            elif distro.id() in ["ubuntu", "debian"]:
-                utils.install_dependencies_debian()
+            with SYSTEM_DEPS_LOCK:
+                if distro.id() == "fedora":
+                    utils.install_dependecies_fedora()
+                elif distro.id() in ["ubuntu", "debian"]:
+                    utils.install_dependencies_debian()
 
             self._install_python_dependencies()
 
@@ -287,64 +428,381 @@ class Runner:
                 env=self._get_venv_env(),
             )
 
+    def _log_settings(self):
+        """Odoo log level and handlers, from the log profile if one is set"""
+        if self.log_profile:
+            log_level, handlers = LOG_PROFILES[self.log_profile]
+            return log_level, list(handlers)
+        return self.log_level, list(DEFAULT_LOG_HANDLERS)
+
+    def _server_wide_modules(self):
+        server_wide = ["web", "base"]
+        if self.trace:
+            server_wide.append(TRACE_MODULE)
+        return server_wide
+
+    def _trace_log(self):
+        """JSON lines file the tracing addon appends every request to"""
+        trace_dir = self.app_dir / "trace"
+        trace_dir.mkdir(parents=True, exist_ok=True)
+        return trace_dir / f"{self.db or 'odoo'}.jsonl"
+
     def _get_venv_env(self):
         venv_path = Path.home() / ".pyenv" / "versions" / self.venv
         env = os.environ.copy()
         env["VIRTUAL_ENV"] = str(venv_path)
         env["PATH"] = f"{venv_path}/bin:{env['PATH']}"
+        if self.coverage:
+            # Each process writes its own .coverage.<suffix> file next to it
+            env["COVERAGE_FILE"] = str(self._coverage_dir() / ".coverage")
+        if self.trace:
+            env["RUN_ODOO_TRACE_LOG"] = str(self._trace_log())
+            env["RUN_ODOO_TRACE_TOKEN"] = self.trace_token
+        if self.record_calls:
+            env["RUN_ODOO_RECORD_CALLS"] = str(Path(self.record_calls).absolute())
         return env
 
     def _get_odoo_bin(self):
         """Get the path to the Odoo binary"""
         return self.odoo_root_dir / "odoo" / "odoo-bin"
 
-    def run(self):
-        """Run Odoo with the configured parameters"""
+    def _get_pg_env(self):
+        """Environment for PostgreSQL client tools, using the credentials odoo-bin gets"""
+        db_opts = dict(
+            opt[2:].split("=", 1) for opt in DEFAULT_OPTS.split() if opt.startswith("--db_")
+        )
+        env = os.environ.copy()
+        env["PGHOST"] = db_opts["db_host"]
+        env["PGUSER"] = db_opts["db_user"]
+        env["PGPASSWORD"] = db_opts["db_password"]
+        return env
+
+    def _set_default_db(self):
         if not self.db:
             version_major = int(self.version)
             edition = "e" if self.enterprise else "c"
             module_name = self.addons[0] if self.addons else "base"
             self.db = f"v{version_major}{edition}_{module_name}"
 
-        options = self._prepare_params()
+    def _vacuum_analyze(self, db_name=None):
+        """Refresh planner statistics, stale after installing or upgrading modules"""
+        if self.vacuum_analyze:
+            pg.vacuum_analyze(db_name or self.db, self._get_pg_env())
 
-        # Build command
+    def _build_command(self, options):
         cmd = [str(self._get_odoo_bin())] + options
-
+        python_options = [opt for observer in self.observers for opt in observer.python_options]
+        if python_options:
+            # python resolves to the virtualenv's interpreter
+            cmd = ["python"] + python_options + cmd
         # Add default database options
         cmd.extend(DEFAULT_OPTS.split())
+        return cmd
+
+    def _coverage_dir(self):
+        return self.app_dir / "coverage" / str(self.version)
+
+    def _coverage_command(self, cmd):
+        """Wrap an odoo-bin command to measure the tested modules' source only"""
+        available = modules.find_modules(self._get_addons_paths())
+        sources = [str(available[addon]) for addon in self.addons or [] if addon in available]
+        if not sources:
+            raise ValueError("No source found for the modules to measure coverage")
+        return [
+            "python",
+            "-m",
+            "coverage",
+            "run",
+            "--parallel-mode",
+            f"--source={','.join(sources)}",
+        ] + cmd
+
+    def _ensure_venv_tool(self, executable, package=None):
+        """Install a tool in the virtualenv unless its executable is already there"""
+        env = self._get_venv_env()
+        tool_path = Path(env["VIRTUAL_ENV"]) / "bin" / executable
+        if not tool_path.exists():
+            print(f"Installing {package or executable} in {self.venv}...")
+            subprocess.run(["pip", "install", package or executable], check=True, env=env)
+        return tool_path
+
+    def _ensure_coverage(self, erase=False):
+        env = self._get_venv_env()
+        self._ensure_venv_tool("coverage")
+
+        self._coverage_dir().mkdir(parents=True, exist_ok=True)
+        if erase:
+            subprocess.run(["python", "-m", "coverage", "erase"], check=True, env=env)
+
+    def _coverage_report(self):
+        """Merge the data files of every process/shard and write HTML and XML reports"""
+        env = self._get_venv_env()
+        coverage = ["python", "-m", "coverage"]
+        # --append keeps data from shards that were combined earlier
+        result = subprocess.run(coverage + ["combine", "--append"], env=env)
+        if result.returncode != 0:
+            print("Warning: No coverage data to combine")
+            return
+        html_dir = Path.cwd() / "htmlcov"
+        xml_file = Path.cwd() / "coverage.xml"
+        subprocess.run(coverage + ["report"], env=env)
+        subprocess.run(coverage + ["html", "-d", str(html_dir)], check=True, env=env)
+        subprocess.run(coverage + ["xml", "-o", str(xml_file)], check=True, env=env)
+        print(f"Coverage reports written to {html_dir} and {xml_file}")
+
+    def _execute(self, cmd):
+        """Run an Odoo command, streaming its output through the observers if any"""
+        env = self._get_venv_env()
+        if not self.observers:
+            subprocess.run(cmd, check=True, env=env)
+            return
+
+        proc = subprocess.Popen(
+            cmd,
+            env=env,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            errors="replace",
+            bufsize=1,
+        )
+        for observer in self.observers:
+            observer.started(proc)
+        try:
+            for line in proc.stdout:
+                hidden = False
+                for observer in self.observers:
+                    hidden = observer.line(line) or hidden
+                if not hidden:
+                    sys.stdout.write(line)
+            proc.wait()
+        finally:
+            # On Ctrl+C Odoo gets the signal too, let it shut down
+            if proc.poll() is None:
+                proc.wait()
+            for observer in self.observers:
+                observer.finished(proc.returncode)
+        if proc.returncode:
+            raise subprocess.CalledProcessError(proc.returncode, cmd)
+
+    def run(self):
+        """Run Odoo with the configured parameters"""
+        self._set_default_db()
+
+        options = self._prepare_params()
+
+        # Build command
+        cmd = self._build_command(options)
+        if self.coverage:
+            cmd = self._coverage_command(cmd)
 
         print(f"Starting Odoo {self.version} with database '{self.db}'...")
         print(f"Command: {' '.join(cmd)}")
+        if self.trace:
+            print(
+                f"Tracing requests to {self._trace_log()}, recent ones on "
+                f"http://localhost:{self.http_port}/run_odoo/trace?token={self.trace_token}"
+            )
 
         try:
-            subprocess.run(cmd, check=True, env=self._get_venv_env())
+            self._execute(cmd)
         except KeyboardInterrupt:
             print("\nOdoo stopped by user")
+            return
         except subprocess.CalledProcessError as e:
             print(f"Error running Odoo: {e}")
             raise
-
-    def run_tests(self):
-        """Run tests for specified modules"""
+        # Outside the try: a vacuumdb failure is not an Odoo one
+        if self.stop_after_init and self.install_modules and self.addons:
+            self._vacuum_analyze()
+
+    def start(self, **popen_kwargs):
+        """Start Odoo in the background and return its process"""
+        self._set_default_db()
+        cmd = self._build_command(self._prepare_params())
+        print(f"Starting Odoo {self.version} with database '{self.db}' in the background...")
+        return subprocess.Popen(cmd, env=self._get_venv_env(), **popen_kwargs)
+
+    @contextmanager
+    def serving(self, **popen_kwargs):
+        """Start Odoo, wait until it accepts HTTP connections and stop it on exit"""
+        proc = self.start(**popen_kwargs)
+        self._mark("odoo-bin spawned")
+        try:
+            if not utils.wait_for_port(self.http_host, self.http_port, proc=proc):
+                raise RuntimeError(f"Odoo did not start listening on port {self.http_port}")
+            if self.timer:
+                self.timer.mark("HTTP port accepting connections")
+                self.timer.report()
+            yield proc
+        finally:
+            proc.terminate()
+            try:
+                proc.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+                proc.wait()
+
+    def run_tests(
+        self, reuse_db=False, update_modules=None, rebuild_template=False, erase_coverage=False
+    ):
+        """Run tests for specified modules
+
+        With reuse_db, modules are installed once in a template database and
+        each run tests a fresh copy of it, only updating update_modules.
+        With coverage, data accumulates across runs and shards until erased.
+        """
         self.test_enable = True
         self.stop_after_init = True
         self.workers = 0
-        self.run()
+        if self.coverage:
+            self._ensure_coverage(erase=erase_coverage)
+        try:
+            if reuse_db:
+                self._run_tests_from_template(update_modules or [], rebuild_template)
+            else:
+                self.run()
+        finally:
+            if self.coverage:
+                self._coverage_report()
+
+    def _template_db_name(self):
+        """Template database name, unique per version, edition and module set"""
+        version_major = int(self.version)
+        edition = "e" if self.enterprise else "c"
+        digest = hashlib.sha1(",".join(sorted(self.addons)).encode()).hexdigest()[:8]
+        return f"v{version_major}{edition}_tmpl_{digest}"
+
+    def _run_tests_from_template(self, update_modules, rebuild_template=False):
+        if not self.addons:
+            raise ValueError("No modules specified for testing")
 
-    def run_shell(self):
-        """Start Odoo shell"""
-        options = self._prepare_params()
-        options.extend(["shell", "--no-http"])
+        template = self._template_db_name()
+        # Tests run on a copy owned by this flow, the user's database is never replaced
+        self.db = f"{template}_run"
+        pg_env = self._get_pg_env()
 
-        cmd = [str(self._get_odoo_bin())] + options
-        cmd.extend(DEFAULT_OPTS.split())
+        if rebuild_template:
+            pg.drop_database(template, pg_env, self.data_dir)
 
-        print(f"Starting Odoo shell for database '{self.db}'...")
-        subprocess.run(cmd, check=True, env=self._get_venv_env())
+        options = self._prepare_params()
+        db_index = options.index("-d") + 1
+        if not pg.database_exists(template, pg_env):
+            # Install without running tests, they run against the copies
+            install_options = [opt for opt in options if opt != "--test-enable"]
+            # Installed under another name and renamed once complete, a failed
+            # or interrupted install must not be taken for the template
+            building = f"{template}_build"
+            pg.drop_database(building, pg_env, self.data_dir)
+            install_options[db_index] = building
+            print(f"Installing {','.join(self.addons)} in template database '{template}'...")
+            subprocess.run(
+                self._build_command(install_options), check=True, env=self._get_venv_env()
+            )
+            # Copies inherit the template's statistics
+            self._vacuum_analyze(building)
+            pg.rename_database(building, template, pg_env, self.data_dir)
+
+        print(f"Copying template database '{template}' to '{self.db}'...")
+        pg.clone_database(template, self.db, pg_env, self.data_dir)
+
+        # Tests only run for installed modules selected by tags, updated
+        # modules also get their at_install tests run
+        install_index = options.index("-i")
+        del options[install_index : install_index + 2]
+        options.extend(["--test-tags", ",".join(f"/{addon}" for addon in self.addons)])
+        if update_modules:
+            options.extend(["-u", ",".join(update_modules)])
+
+        cmd = self._build_command(options)
+        if self.coverage:
+            cmd = self._coverage_command(cmd)
+        print(f"Running tests for {','.join(self.addons)} in database '{self.db}'...")
+        print(f"Command: {' '.join(cmd)}")
+        self._execute(cmd)
 
-    def upgrade_modules(self):
-        """Upgrade specified modules"""
+    def _shell_command(self):
+        options = self._prepare_params()
+        options.extend(["shell", "--no-http"])
+        return self._build_command(options)
+
+    def run_shell(self, script=None, env_vars=None):
+        """Start Odoo shell
+
+        A script given as bytes is piped to the shell, which executes it
+        instead of prompting. Returns the shell's exit code.
+        """
+        cmd = self._shell_command()
+
+        if self.timer:
+            # The shell is interactive, only the preparation can be timed
+            self.timer.report()
+        env = self._get_venv_env()
+        env.update(env_vars or {})
+        if script is None:
+            print(f"Starting Odoo shell for database '{self.db}'...")
+            subprocess.run(cmd, check=True, env=env)
+            return 0
+        return subprocess.run(cmd, input=script, env=env).returncode
+
+    def exec_scripts(self, scripts, commit=False, keep_going=False):
+        """Run scripts one after the other in a single Odoo shell, each in its own savepoint
+
+        The batch is rolled back at the first failing script, or with
+        keep_going only that script's changes are. Returns whether every
+        script succeeded.
+        """
+        self._set_default_db()
+        print(f"Running {len(scripts)} scripts in database '{self.db}'...")
+        env_vars = {
+            "RUN_ODOO_EXEC_SCRIPTS": json.dumps([str(Path(script).absolute()) for script in scripts]),
+            "RUN_ODOO_EXEC_COMMIT": "1" if commit else "",
+            "RUN_ODOO_EXEC_KEEP_GOING": "1" if keep_going else "",
+        }
+        script = EXEC_LOOP_SCRIPT.read_bytes() + b"\n" + EXEC_BATCH_SCRIPT.read_bytes()
+        return self.run_shell(script=script, env_vars=env_vars) == 0
+
+    def shell_socket(self):
+        """Unix socket the shell daemon of the database listens on"""
+        self._set_default_db()
+        socket_dir = self.app_dir / "shell"
+        socket_dir.mkdir(parents=True, exist_ok=True)
+        return socket_dir / f"{self.db}.sock"
+
+    def start_shell_daemon(self):
+        """Start an Odoo shell that keeps the registry loaded and serves code on shell_socket()
+
+        The daemon runs in its own session so it outlives the command starting it,
+        its output goes to a log file next to the socket.
+        """
+        self._set_default_db()
+        cmd = self._shell_command()
+
+        env = self._get_venv_env()
+        env["RUN_ODOO_SHELL_SOCKET"] = str(self.shell_socket())
+        log_path = self.shell_socket().with_suffix(".log")
+        print(f"Starting shell daemon for database '{self.db}', logging to {log_path}...")
+        with open(log_path, "ab") as log:
+            proc = subprocess.Popen(
+                cmd,
+                env=env,
+                stdin=subprocess.PIPE,
+                stdout=log,
+                stderr=subprocess.STDOUT,
+                start_new_session=True,
+            )
+        proc.stdin.write(SHELL_DAEMON_SCRIPT.read_bytes())
+        proc.stdin.close()
+        return proc
+
+    def upgrade_modules(self, snapshot=False, rehearse=False, force=False):
+        """Upgrade specified modules
+
+        With snapshot, the database and its filestore are copied first and the
+        copy takes the database's place again if the upgrade fails or is
+        interrupted. Rehearsing also puts it back after a successful upgrade.
+        With force, a database in the way of the snapshot is replaced.
+        """
         if not self.addons:
             raise ValueError("No modules specified for upgrade")
 
@@ -357,8 +815,45 @@ class Runner:
 
         options.extend(["--stop-after-init", "--no-http"])
 
-        cmd = [str(self._get_odoo_bin())] + options
-        cmd.extend(DEFAULT_OPTS.split())
+        cmd = self._build_command(options)
+
+        if snapshot or rehearse:
+            self._upgrade_from_snapshot(cmd, rehearse, force)
+            return
 
         print(f"Upgrading modules {','.join(self.addons)} in database '{self.db}'...")
-        subprocess.run(cmd, check=True, env=self._get_venv_env())
+        self._execute(cmd)
+        self._vacuum_analyze()
+
+    def _snapshot_db_name(self):
+        return f"{self.db}_snapshot"
+
+    def _upgrade_from_snapshot(self, cmd, rehearse=False, force=False):
+        if not self.db:
+            raise ValueError("A database name is needed to take a snapshot")
+        snapshot = self._snapshot_db_name()
+        pg_env = self._get_pg_env()
+
+        print(f"Taking a snapshot of '{self.db}' as '{snapshot}'...")
+        started = time.perf_counter()
+        method = pg.snapshot_database(self.db, snapshot, pg_env, self.data_dir, force)
+        detail = f", filestore copied with {method}" if method else ""
+        print(f"Snapshot taken in {time.perf_counter() - started:.1f}s{detail}")
+
+        print(f"Upgrading modules {','.join(self.addons)} in database '{self.db}'...")
+        try:
+            self._execute(cmd)
+        except (subprocess.CalledProcessError, KeyboardInterrupt):
+            print(f"Upgrade failed, restoring '{self.db}' from its snapshot...")
+            self._restore_snapshot(snapshot, pg_env)
+            raise
+        if rehearse:
+            print(f"Rehearsal done, restoring '{self.db}' from its snapshot...")
+            self._restore_snapshot(snapshot, pg_env)
+            return
+        pg.drop_database(snapshot, pg_env, self.data_dir)
+        self._vacuum_analyze()
+
+    def _restore_snapshot(self, snapshot, pg_env):
+        pg.restore_snapshot(self.db, snapshot, pg_env, self.data_dir)
+        print(f"Database '{self.db}' is back to its state before the upgrade")
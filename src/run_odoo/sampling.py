@@ -0,0 +1,213 @@
+import json
+import math
+import subprocess
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterable, Optional
+
+from run_odoo import utils
+from run_odoo.runner import Runner
+
+# Workers spawn lazily and are recycled, look for new ones this often while sampling
+CHILD_POLL_INTERVAL = 1.0
+
+
+@dataclass
+class SampledProcess:
+    pid: int
+    role: str
+    collapsed_file: Path
+    speedscope_file: Path
+    stacks: Counter = field(default_factory=Counter)
+    error: str = ""
+
+
+def process_role(pid: int, main_pid: int) -> str:
+    if pid == main_pid:
+        return "main"
+    try:
+        cmdline = Path(f"/proc/{pid}/cmdline").read_bytes().split(b"\0")
+    except OSError:
+        return "worker"
+    return "gevent" if b"gevent" in cmdline else "worker"
+
+
+def read_collapsed(lines: Iterable[str]) -> Counter:
+    """Parse collapsed stacks: 'frame;frame;frame count' per line"""
+    stacks: Counter = Counter()
+    for line in lines:
+        line = line.rstrip("\n")
+        if not line:
+            continue
+        stack, _, count = line.rpartition(" ")
+        if stack and count.isdigit():
+            stacks[stack] += int(count)
+    return stacks
+
+
+def to_speedscope(stacks: Counter, name: str) -> dict:
+    """Convert collapsed stacks to a speedscope sampled profile"""
+    frames: list[dict] = []
+    frame_index: dict[str, int] = {}
+    samples, weights = [], []
+    for stack, count in stacks.items():
+        sample = []
+        for frame in stack.split(";"):
+            if frame not in frame_index:
+                frame_index[frame] = len(frames)
+                frames.append({"name": frame})
+            sample.append(frame_index[frame])
+        samples.append(sample)
+        weights.append(count)
+    return {
+        "$schema": "https://www.speedscope.app/file-format-schema.json",
+        "shared": {"frames": frames},
+        "profiles": [
+            {
+                "type": "sampled",
+                "name": name,
+                "unit": "none",
+                "startValue": 0,
+                "endValue": sum(weights),
+                "samples": samples,
+                "weights": weights,
+            }
+        ],
+        "name": name,
+        "exporter": "run-odoo",
+    }
+
+
+def top_functions(stacks: Counter, top: int = 20) -> list[tuple[str, int, int]]:
+    """(function, self samples, total samples), most self time first"""
+    own: Counter = Counter()
+    total: Counter = Counter()
+    for stack, count in stacks.items():
+        frames = stack.split(";")
+        own[frames[-1]] += count
+        # Recursive frames count once per sample
+        for frame in set(frames):
+            total[frame] += count
+    return [(frame, count, total[frame]) for frame, count in own.most_common(top)]
+
+
+def _start_py_spy(
+    py_spy: Path,
+    pid: int,
+    main_pid: int,
+    duration: int,
+    output_dir: Path,
+    rate: int,
+    sudo: bool,
+) -> tuple[SampledProcess, subprocess.Popen]:
+    role = process_role(pid, main_pid)
+    sampled = SampledProcess(
+        pid=pid,
+        role=role,
+        collapsed_file=output_dir / f"{role}-{pid}.collapsed.txt",
+        speedscope_file=output_dir / f"{role}-{pid}.speedscope.json",
+    )
+    cmd = [
+        str(py_spy),
+        "record",
+        "--pid",
+        str(pid),
+        "--duration",
+        str(duration),
+        "--rate",
+        str(rate),
+        "--format",
+        "raw",
+        "--nolineno",
+        "--output",
+        str(sampled.collapsed_file),
+    ]
+    if sudo:
+        cmd = ["sudo"] + cmd
+    proc = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    return sampled, proc
+
+
+def sample_processes(
+    py_spy: Path,
+    main_pid: int,
+    duration: int,
+    output_dir: Path,
+    rate: int = 100,
+    sudo: bool = False,
+) -> list[SampledProcess]:
+    """Sample the Odoo process and each of its workers with py-spy, in parallel
+
+    Children are polled during the whole window: workers spawned late, or
+    replacing recycled ones, are sampled for the time that is left.
+    """
+    output_dir.mkdir(parents=True, exist_ok=True)
+    deadline = time.monotonic() + duration
+    running = []
+    seen: set[int] = set()
+    print(f"Sampling the Odoo processes for {duration}s...")
+    while (remaining := deadline - time.monotonic()) >= 1:
+        for pid in [main_pid] + utils.child_pids(main_pid):
+            if pid not in seen:
+                seen.add(pid)
+                running.append(
+                    _start_py_spy(
+                        py_spy, pid, main_pid, math.ceil(remaining), output_dir, rate, sudo
+                    )
+                )
+        time.sleep(min(CHILD_POLL_INTERVAL, remaining))
+
+    results = []
+    for sampled, proc in running:
+        _, stderr = proc.communicate()
+        if proc.returncode != 0 or not sampled.collapsed_file.exists():
+            # Workers may have been recycled while sampling
+            sampled.error = stderr.strip().splitlines()[-1] if stderr.strip() else "py-spy failed"
+        else:
+            with open(sampled.collapsed_file) as f:
+                sampled.stacks = read_collapsed(f)
+            with open(sampled.speedscope_file, "w") as f:
+                json.dump(to_speedscope(sampled.stacks, f"{sampled.role} {sampled.pid}"), f)
+        results.append(sampled)
+    return results
+
+
+def profile_odoo(
+    runner: Runner,
+    duration: int,
+    output_dir: Path,
+    pid: Optional[int] = None,
+    rate: int = 100,
+    sudo: bool = False,
+) -> list[SampledProcess]:
+    """Sample a running Odoo, or start one from the runner and sample it once it serves HTTP"""
+    py_spy = runner._ensure_venv_tool("py-spy")
+    if pid is not None:
+        return sample_processes(py_spy, pid, duration, output_dir, rate, sudo)
+
+    with runner.serving() as proc:
+        return sample_processes(py_spy, proc.pid, duration, output_dir, rate, sudo)
+
+
+def print_report(results: list[SampledProcess], top: int = 15) -> None:
+    for sampled in results:
+        print(f"\n{sampled.role} (pid {sampled.pid})")
+        if sampled.error:
+            print(f"  not sampled: {sampled.error}")
+            continue
+        samples = sum(sampled.stacks.values())
+        if not samples:
+            print("  no samples")
+            continue
+        print(f"  {'self %':>7}{'total %':>9}  function")
+        for frame, own, total in top_functions(sampled.stacks, top):
+            print(f"  {100 * own / samples:>6.1f}%{100 * total / samples:>8.1f}%  {frame}")
+        print(f"  {sampled.collapsed_file}")
+        print(f"  {sampled.speedscope_file}")
+    if any(sampled.error for sampled in results):
+        print(
+            "\nAttaching to another process may need ptrace permission, try --sudo "
+            "or lower /proc/sys/kernel/yama/ptrace_scope"
+        )
@@ -0,0 +1,171 @@
+import code
+import codeop
+import json
+import runpy
+import socket
+import sys
+import time
+from pathlib import Path
+from typing import Optional
+
+from run_odoo.runner import EXEC_LOOP_SCRIPT, Runner
+
+
+class ShellConnection:
+    """A connection to a shell daemon, with its own cursor and namespace
+
+    Everything sent over one connection shares a transaction, rolled back
+    when the connection closes unless committed.
+    """
+
+    def __init__(self, path: Path, timeout: Optional[float] = None) -> None:
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(timeout)
+        try:
+            self.sock.connect(str(path))
+        except OSError:
+            self.sock.close()
+            raise
+        self.file = self.sock.makefile("rwb")
+
+    def call(self, action: str, **fields) -> dict:
+        self.file.write(json.dumps({"action": action, **fields}).encode() + b"\n")
+        self.file.flush()
+        line = self.file.readline()
+        if not line:
+            raise ConnectionError("The shell daemon closed the connection")
+        return json.loads(line)
+
+    def execute(
+        self, source: str, filename: str = "<run-odoo>", mode: str = "exec", savepoint: bool = False
+    ) -> dict:
+        """Run code, returning its output, the traceback if it failed and how long it took"""
+        return self.call("exec", code=source, filename=filename, mode=mode, savepoint=savepoint)
+
+    def commit(self) -> None:
+        self.call("commit")
+
+    def rollback(self) -> None:
+        self.call("rollback")
+
+    def close(self) -> None:
+        self.file.close()
+        self.sock.close()
+
+    def __enter__(self) -> "ShellConnection":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def daemon_status(path: Path) -> Optional[dict]:
+    """The daemon's answer to a ping, None if none is running"""
+    try:
+        with ShellConnection(path, timeout=5) as connection:
+            return connection.call("ping")
+    except (OSError, ValueError):
+        return None
+
+
+def is_running(path: Path) -> bool:
+    return daemon_status(path) is not None
+
+
+def ensure_daemon(runner: Runner, timeout: float = 600, interval: float = 0.2) -> Path:
+    """Socket of the database's shell daemon, started first if it is not running
+
+    A daemon started before modules were installed or updated holds their
+    old code, it is restarted.
+    """
+    path = runner.shell_socket()
+    status = daemon_status(path)
+    if status is not None and not status.get("stale"):
+        return path
+    if status is not None:
+        print(f"Modules of '{runner.db}' changed since the shell daemon started, restarting it...")
+        stop_daemon(path)
+        # The old daemon removes the socket on its way out
+        deadline = time.monotonic() + 30
+        while path.exists() and time.monotonic() < deadline:
+            time.sleep(interval)
+
+    proc = runner.start_shell_daemon()
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"The shell daemon exited, see {path.with_suffix('.log')}")
+        if is_running(path):
+            return path
+        time.sleep(interval)
+    proc.kill()
+    raise RuntimeError(f"The shell daemon did not start within {timeout:.0f}s")
+
+
+def stop_daemon(path: Path) -> bool:
+    """Stop the daemon listening on path, False if none was running"""
+    try:
+        with ShellConnection(path, timeout=5) as connection:
+            connection.call("stop")
+    except (OSError, ValueError):
+        return False
+    return True
+
+
+def print_result(result: dict) -> None:
+    if result["output"]:
+        sys.stdout.write(result["output"])
+    if result["error"]:
+        sys.stderr.write(result["error"])
+
+
+def run_scripts(
+    path: Path, scripts: list[Path], commit: bool = False, keep_going: bool = False
+) -> bool:
+    """Run scripts one after the other in one transaction on the daemon, each in a savepoint
+
+    Same behavior as Runner.exec_scripts: the batch is rolled back at the first
+    failing script, or with keep_going only that script's changes are.
+    Returns whether every script succeeded.
+    """
+    # Also runs on the Odoo side, where it can't be imported from run_odoo
+    run_batch = runpy.run_path(str(EXEC_LOOP_SCRIPT))["run_batch"]
+    with ShellConnection(path) as connection:
+
+        def run_script(script: Path) -> bool:
+            result = connection.execute(script.read_text(), filename=str(script), savepoint=True)
+            print_result(result)
+            return not result["error"]
+
+        failed = run_batch(scripts, run_script, connection, commit, keep_going)
+    return not failed
+
+
+class DaemonConsole(code.InteractiveConsole):
+    """Interactive console whose input runs in the shell daemon"""
+
+    def __init__(self, connection: ShellConnection) -> None:
+        super().__init__(filename="<console>")
+        self.connection = connection
+
+    def runsource(self, source, filename="<input>", symbol="single"):
+        try:
+            if codeop.compile_command(source, filename, symbol) is None:
+                # Incomplete statement, wait for more lines
+                return True
+        except (OverflowError, SyntaxError, ValueError):
+            # The daemon reports the error, its Python may differ
+            pass
+        print_result(self.connection.execute(source, filename, symbol))
+        return False
+
+
+def interact(path: Path, db: str) -> None:
+    with ShellConnection(path) as connection:
+        DaemonConsole(connection).interact(
+            banner=(
+                f"Odoo shell on '{db}' served by the shell daemon, env and odoo are defined.\n"
+                "Changes are rolled back on exit unless you call env.cr.commit()."
+            ),
+            exitmsg="",
+        )
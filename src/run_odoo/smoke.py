@@ -0,0 +1,233 @@
+import fnmatch
+import json
+import subprocess
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Optional
+
+from run_odoo import db as pg
+from run_odoo import modules, odoo_log, utils
+from run_odoo.runner import Runner
+
+DEFAULT_EXCLUDES = ["test_*"]
+
+
+@dataclass
+class InstallResult:
+    module: str
+    success: bool
+    duration: float
+    # Peak RSS of the odoo-bin process that installed the module's batch
+    peak_rss_kb: int
+    batch: int
+    errors: int = 0
+
+
+@dataclass
+class BatchJob:
+    """Everything a pool worker needs to install one batch, kept picklable"""
+
+    index: int
+    modules: list[str]
+    db: str
+    template: str
+    cmd: list[str]
+    env: dict
+    pg_env: dict
+    logfile: Path
+    data_dir: Optional[Path] = None
+    keep_db: bool = False
+
+
+def select_modules(
+    available: dict[str, Path], excludes: list[str], installed: list[str]
+) -> list[str]:
+    """Module names to smoke test, skipping excluded patterns and modules already installed"""
+    return sorted(
+        name
+        for name in available
+        if name not in installed
+        and not any(fnmatch.fnmatch(name, pattern) for pattern in excludes)
+    )
+
+
+def install_batch(job: BatchJob) -> list[InstallResult]:
+    """Install a batch of modules in a fresh copy of the template database"""
+    pg.clone_database(job.template, job.db, job.pg_env, job.data_dir)
+    job.logfile.unlink(missing_ok=True)
+
+    returncode, _, peak_rss_kb = utils.run_with_rusage(
+        job.cmd, env=job.env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+
+    records = []
+    if job.logfile.exists():
+        with open(job.logfile, errors="replace") as f:
+            records = list(odoo_log.parse_lines(f))
+    loads = odoo_log.module_loads(records)
+    total_errors = sum(1 for record in records if record.level in ("ERROR", "CRITICAL"))
+    # Errors outside of any module loading can't be blamed on one module
+    unattributed = total_errors - sum(load.errors for load in loads.values())
+
+    results = []
+    for module in job.modules:
+        load = loads.get(module)
+        results.append(
+            InstallResult(
+                module=module,
+                success=returncode == 0
+                and load is not None
+                and load.errors == 0
+                and unattributed == 0,
+                duration=load.duration if load else 0.0,
+                peak_rss_kb=peak_rss_kb,
+                batch=job.index,
+                errors=load.errors if load else 0,
+            )
+        )
+
+    if not job.keep_db:
+        pg.drop_database(job.db, job.pg_env, job.data_dir)
+    return results
+
+
+class SmokeInstall:
+    """Install every installable module in batches, each in its own database"""
+
+    def __init__(
+        self,
+        runner: Runner,
+        work_dir: Path,
+        batch_size: int = 10,
+        jobs: int = 4,
+        excludes: Optional[list[str]] = None,
+        without_demo: bool = False,
+        keep_dbs: bool = False,
+    ) -> None:
+        self.runner = runner
+        self.work_dir = work_dir
+        self.batch_size = batch_size
+        self.jobs = jobs
+        self.excludes = DEFAULT_EXCLUDES if excludes is None else excludes
+        self.without_demo = without_demo
+        self.keep_dbs = keep_dbs
+        self.pg_env = runner._get_pg_env()
+        version_major = int(runner.version)
+        edition = "e" if runner.enterprise else "c"
+        self.db_prefix = f"v{version_major}{edition}_smoke"
+        # Demo data is decided when the database is created
+        self.template = f"{self.db_prefix}_base" + ("_nodemo" if without_demo else "")
+        self.base_options = runner._prepare_params()
+
+    def _command(self, db: str, module_names: list[str], logfile: Path) -> list[str]:
+        options = list(self.base_options)
+        options.extend(
+            [
+                "-d",
+                db,
+                "-i",
+                ",".join(module_names),
+                "--stop-after-init",
+                "--no-http",
+                "--logfile",
+                str(logfile),
+                "--log-handler",
+                odoo_log.MODULE_LOADING_HANDLER,
+            ]
+        )
+        if self.without_demo:
+            options.append("--without-demo=all")
+        return self.runner._build_command(options)
+
+    def _job(self, index: int, module_names: list[str]) -> BatchJob:
+        db = f"{self.db_prefix}_{index}"
+        logfile = self.work_dir / f"{db}.log"
+        return BatchJob(
+            index=index,
+            modules=module_names,
+            db=db,
+            template=self.template,
+            cmd=self._command(db, module_names, logfile),
+            env=self.runner._get_venv_env(),
+            pg_env=self.pg_env,
+            logfile=logfile,
+            data_dir=self.runner.data_dir,
+            keep_db=self.keep_dbs,
+        )
+
+    def prepare_template(self, rebuild: bool = False) -> None:
+        if rebuild:
+            pg.drop_database(self.template, self.pg_env, self.runner.data_dir)
+        if pg.database_exists(self.template, self.pg_env):
+            return
+        print(f"Creating template database '{self.template}' with base installed...")
+        # Renamed once base is installed, a failed or interrupted install
+        # must not be reused as the template
+        building = f"{self.template}_build"
+        pg.drop_database(building, self.pg_env, self.runner.data_dir)
+        logfile = self.work_dir / f"{self.template}.log"
+        subprocess.run(
+            self._command(building, ["base"], logfile),
+            check=True,
+            env=self.runner._get_venv_env(),
+        )
+        pg.rename_database(building, self.template, self.pg_env, self.runner.data_dir)
+
+    def _run_jobs(self, jobs: list[BatchJob]) -> list[InstallResult]:
+        results = []
+        with ProcessPoolExecutor(max_workers=self.jobs) as executor:
+            for batch_results in executor.map(install_batch, jobs):
+                for result in batch_results:
+                    status = "ok" if result.success else "FAILED"
+                    print(f"[batch {result.batch}] {result.module}: {status} ({result.duration:.1f}s)")
+                results.extend(batch_results)
+        return results
+
+    def run(self, rebuild_template: bool = False) -> list[InstallResult]:
+        self.work_dir.mkdir(parents=True, exist_ok=True)
+        available = modules.find_modules(self.runner._get_addons_paths())
+        module_names = select_modules(available, self.excludes, installed=["base"])
+        print(f"Found {len(module_names)} installable modules")
+        self.prepare_template(rebuild_template)
+
+        batches = [
+            module_names[i : i + self.batch_size]
+            for i in range(0, len(module_names), self.batch_size)
+        ]
+        jobs = [self._job(index, batch) for index, batch in enumerate(batches)]
+        results = self._run_jobs(jobs)
+
+        # A failing module makes its whole batch fail, retry them one by one
+        # to find the culprit
+        if self.batch_size > 1:
+            failed = [result.module for result in results if not result.success]
+            if failed:
+                print(f"Retrying {len(failed)} modules from failed batches individually...")
+                retry_jobs = [
+                    self._job(len(batches) + index, [module])
+                    for index, module in enumerate(failed)
+                ]
+                retried = {result.module: result for result in self._run_jobs(retry_jobs)}
+                results = [retried.get(result.module, result) for result in results]
+
+        return results
+
+
+def print_report(results: list[InstallResult]) -> None:
+    print()
+    print(f"{'Module':<40}{'Status':<8}{'Install':>10}{'Peak RSS':>12}")
+    for result in sorted(results, key=lambda r: (r.success, -r.duration)):
+        status = "OK" if result.success else "FAILED"
+        print(
+            f"{result.module:<40}{status:<8}{result.duration:>9.1f}s"
+            f"{result.peak_rss_kb / 1024:>10.0f}MB"
+        )
+    failed = sum(1 for result in results if not result.success)
+    print(f"\n{len(results) - failed} installed, {failed} failed")
+
+
+def write_report(results: list[InstallResult], output: Path) -> None:
+    with open(output, "w") as f:
+        json.dump([asdict(result) for result in results], f, indent=2)
+    print(f"Report written to {output}")
@@ -0,0 +1,195 @@
+import csv
+import datetime
+import json
+import sys
+from decimal import Decimal
+from pathlib import Path
+from typing import Optional
+
+FORMATS = {".csv": "csv", ".jsonl": "jsonl", ".ndjson": "jsonl", ".parquet": "parquet"}
+# Name of the server-side cursor, rows are fetched from it in batches
+CURSOR_NAME = "run_odoo_export"
+# PostgreSQL type OIDs with a matching Arrow type, anything else is written as text
+PARQUET_TYPES = {
+    16: "bool",
+    17: "binary",
+    20: "int64",
+    21: "int16",
+    23: "int32",
+    26: "int64",
+    700: "float32",
+    701: "float64",
+    1082: "date",
+    1083: "time",
+    1114: "timestamp",
+    1184: "timestamptz",
+    1186: "interval",
+}
+NUMERIC_OID = 1700
+
+
+def output_format(output: Optional[Path], fmt: Optional[str] = None) -> str:
+    """Format given explicitly, or guessed from the output file's extension"""
+    if fmt:
+        if fmt not in FORMATS.values():
+            raise ValueError(f"Unknown format: {fmt}, use one of csv, jsonl, parquet")
+        return fmt
+    if output is None:
+        return "csv"
+    if output.suffix.lower() not in FORMATS:
+        raise ValueError(f"Can't guess the format of {output.name}, use --format")
+    return FORMATS[output.suffix.lower()]
+
+
+def unique_columns(names: list[str]) -> list[str]:
+    """Column names made unique, ``a.id, b.id`` becomes ``id, id_1``"""
+    seen = set()
+    columns = []
+    for name in names:
+        unique, index = name, 0
+        while unique in seen:
+            index += 1
+            unique = f"{name}_{index}"
+        seen.add(unique)
+        columns.append(unique)
+    return columns
+
+
+def _json_default(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, (bytes, memoryview)):
+        return bytes(value).hex()
+    return str(value)
+
+
+def _flat(value):
+    """Value as a CSV or Parquet cell: json and arrays become JSON text"""
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, default=_json_default)
+    return value
+
+
+class CsvWriter:
+    def __init__(self, file, columns: list[str]) -> None:
+        self.writer = csv.writer(file)
+        self.writer.writerow(columns)
+
+    def write(self, rows: list[tuple]) -> None:
+        self.writer.writerows([_flat(value) for value in row] for row in rows)
+
+    def close(self) -> None:
+        pass
+
+
+class JsonLinesWriter:
+    def __init__(self, file, columns: list[str]) -> None:
+        self.file = file
+        self.columns = columns
+
+    def write(self, rows: list[tuple]) -> None:
+        for row in rows:
+            self.file.write(json.dumps(dict(zip(self.columns, row)), default=_json_default))
+            self.file.write("\n")
+
+    def close(self) -> None:
+        pass
+
+
+class ParquetWriter:
+    """Write each batch as a row group, the schema comes from the column types"""
+
+    def __init__(self, path: Path, columns: list[str], description: list) -> None:
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise RuntimeError(
+                "pyarrow is required for Parquet. Install it with: pip install pyarrow"
+            )
+        self.pa = pyarrow
+        types = {
+            "bool": pyarrow.bool_(),
+            "binary": pyarrow.binary(),
+            "int16": pyarrow.int16(),
+            "int32": pyarrow.int32(),
+            "int64": pyarrow.int64(),
+            "float32": pyarrow.float32(),
+            "float64": pyarrow.float64(),
+            "date": pyarrow.date32(),
+            "time": pyarrow.time64("us"),
+            "timestamp": pyarrow.timestamp("us"),
+            "timestamptz": pyarrow.timestamp("us", tz="UTC"),
+            "interval": pyarrow.duration("us"),
+        }
+        self.schema = pyarrow.schema(
+            (name, self._arrow_type(column, types)) for name, column in zip(columns, description)
+        )
+        # Opened right away so that an empty result still gives a file with the schema
+        self.writer = pyarrow.parquet.ParquetWriter(str(path), self.schema)
+
+    def _arrow_type(self, column, types: dict):
+        if column.type_code == NUMERIC_OID:
+            # Exact as declared, an unconstrained numeric has no fixed scale and stays text
+            if column.precision is None or column.scale is None or column.precision > 76:
+                return self.pa.string()
+            if column.precision > 38:
+                return self.pa.decimal256(column.precision, column.scale)
+            return self.pa.decimal128(column.precision, column.scale)
+        return types.get(PARQUET_TYPES.get(column.type_code), self.pa.string())
+
+    def _cell(self, value, type_):
+        if value is None:
+            return None
+        if self.pa.types.is_string(type_) and not isinstance(value, str):
+            value = _flat(value)
+            return value if isinstance(value, str) else str(value)
+        if isinstance(value, memoryview):
+            return bytes(value)
+        return value
+
+    def write(self, rows: list[tuple]) -> None:
+        arrays = [
+            self.pa.array([self._cell(row[index], field.type) for row in rows], type=field.type)
+            for index, field in enumerate(self.schema)
+        ]
+        self.writer.write_batch(self.pa.RecordBatch.from_arrays(arrays, schema=self.schema))
+
+    def close(self) -> None:
+        self.writer.close()
+
+
+def export_query(
+    connection, query: str, output: Optional[Path], fmt: str, batch_size: int = 10000
+) -> int:
+    """Stream the rows of a query to a file, or CSV/JSON Lines to stdout
+
+    Rows come from a server-side cursor batch by batch, so memory use does not
+    depend on the size of the result. Returns the number of rows written.
+    """
+    if fmt == "parquet" and output is None:
+        raise ValueError("Parquet needs an output file")
+
+    count = 0
+    with connection.cursor(name=CURSOR_NAME) as cursor:
+        cursor.itersize = batch_size
+        cursor.execute(query)
+        columns = unique_columns([column.name for column in cursor.description])
+
+        file = None
+        if fmt == "parquet":
+            writer = ParquetWriter(output, columns, cursor.description)
+        else:
+            file = open(output, "w", newline="") if output else sys.stdout
+            writer = (CsvWriter if fmt == "csv" else JsonLinesWriter)(file, columns)
+        try:
+            while rows := cursor.fetchmany(batch_size):
+                writer.write(rows)
+                count += len(rows)
+        finally:
+            writer.close()
+            if file is not None and file is not sys.stdout:
+                file.close()
+    return count
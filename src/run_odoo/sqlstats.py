@@ -0,0 +1,154 @@
+import json
+import re
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterable, Optional
+
+from run_odoo import odoo_log, stats
+from run_odoo.install_profile import SQL_LOGGER, SqlLogObserver
+
+STRING_RE = re.compile(r"(?:(?<!\w)[EeBbXxNn])?'(?:[^']|'')*'")
+NUMBER_RE = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?(?![\w.])")
+# "IN (?, ?, ?)" and "ARRAY[?, ?]" vary with the number of ids only
+LIST_RE = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+ARRAY_RE = re.compile(r"ARRAY\[\s*\?(?:\s*,\s*\?)*\s*\]", re.IGNORECASE)
+WHITESPACE_RE = re.compile(r"\s+")
+# werkzeug access line: 127.0.0.1 - - [date] "POST /web/dataset/call_kw HTTP/1.1" 200 - ...
+REQUEST_RE = re.compile(r'"(?P<method>[A-Z]+) (?P<path>\S+) HTTP/[\d.]+"')
+REQUEST_LOGGER = "werkzeug"
+
+
+def normalize(sql: str) -> str:
+    """Query shape: literals replaced by '?' and whitespace collapsed"""
+    shape = STRING_RE.sub("?", sql)
+    shape = NUMBER_RE.sub("?", shape)
+    shape = LIST_RE.sub("(?...)", shape)
+    shape = ARRAY_RE.sub("ARRAY[?...]", shape)
+    return WHITESPACE_RE.sub(" ", shape).strip()
+
+
+@dataclass
+class QueryShape:
+    shape: str
+    durations_ms: list[float] = field(default_factory=list)
+
+    @property
+    def count(self) -> int:
+        return len(self.durations_ms)
+
+    @property
+    def total_ms(self) -> float:
+        return sum(self.durations_ms)
+
+    @property
+    def p95_ms(self) -> float:
+        return stats.percentile(self.durations_ms, 95)
+
+
+@dataclass
+class Burst:
+    """Many queries of the same shape in one request, a probable N+1"""
+
+    request: str
+    shape: str
+    count: int
+
+
+class SqlReport(SqlLogObserver):
+    """Aggregate logged queries by shape and flag repeated shapes within a request
+
+    Queries are attributed to requests per process id, which is exact with
+    workers and an approximation in threaded mode.
+    """
+
+    log_handlers = (f"{SQL_LOGGER}:DEBUG", f"{REQUEST_LOGGER}:INFO")
+
+    def __init__(
+        self, output: Optional[Path] = None, burst_threshold: int = 10, show_sql: bool = False
+    ) -> None:
+        super().__init__()
+        self.output = output
+        self.burst_threshold = burst_threshold
+        self.show_sql = show_sql
+        self.shapes: dict[str, QueryShape] = {}
+        self.bursts: list[Burst] = []
+        # Shapes seen by each process since its last request ended
+        self._request_shapes: dict[int, Counter] = {}
+
+    def add_query(self, pid: int, sql: str, duration_ms: float) -> None:
+        shape = normalize(sql)
+        self.shapes.setdefault(shape, QueryShape(shape)).durations_ms.append(duration_ms)
+        self._request_shapes.setdefault(pid, Counter())[shape] += 1
+
+    def end_request(self, pid: int, request: str) -> None:
+        for shape, count in self._request_shapes.pop(pid, Counter()).items():
+            if count >= self.burst_threshold:
+                self.bursts.append(Burst(request, shape, count))
+
+    def sql_context(self, record: odoo_log.LogRecord) -> int:
+        return record.pid
+
+    def add_logged_query(self, context: int, sql: str, duration_ms: float) -> None:
+        self.add_query(context, sql, duration_ms)
+
+    def log_record(self, record: odoo_log.LogRecord) -> None:
+        if record.logger == REQUEST_LOGGER and (match := REQUEST_RE.search(record.message)):
+            self.end_request(record.pid, f"{match['method']} {match['path']}")
+
+    def read_log(self, lines: Iterable[str]) -> None:
+        """Aggregate the queries of a log written with SQL debug logging"""
+        for line in lines:
+            self.line(line)
+        self._flush_sql()
+
+    def finished(self, returncode: int | None) -> None:
+        self._flush_sql()
+        # Queries after the last request belong to startup, cron or shutdown
+        for pid in list(self._request_shapes):
+            self.end_request(pid, "(outside requests)")
+        self.report()
+        if self.output:
+            self.write(self.output)
+
+    def results(self) -> list[QueryShape]:
+        return sorted(self.shapes.values(), key=lambda shape: shape.total_ms, reverse=True)
+
+    def report(self, limit: int = 20) -> None:
+        results = self.results()
+        if not results:
+            print("No SQL queries were logged")
+            return
+
+        print()
+        print(f"{'Count':>8}{'Total':>12}{'p95':>10}  Query shape")
+        for shape in results[:limit]:
+            print(
+                f"{shape.count:>8}{shape.total_ms:>10.1f}ms{shape.p95_ms:>8.2f}ms  "
+                f"{shape.shape[:120]}"
+            )
+
+        if self.bursts:
+            print("\nProbable N+1 patterns:")
+            for burst in sorted(self.bursts, key=lambda burst: burst.count, reverse=True)[:limit]:
+                print(f"{burst.count:>8}x  {burst.request}  {burst.shape[:100]}")
+
+    def write(self, output: Path) -> None:
+        data = {
+            "shapes": [
+                {
+                    "shape": shape.shape,
+                    "count": shape.count,
+                    "total_ms": shape.total_ms,
+                    "p95_ms": shape.p95_ms,
+                }
+                for shape in self.results()
+            ],
+            "bursts": [
+                {"request": burst.request, "shape": burst.shape, "count": burst.count}
+                for burst in self.bursts
+            ],
+        }
+        with open(output, "w") as f:
+            json.dump(data, f, indent=2)
+        print(f"SQL report written to {output}")
@@ -0,0 +1,195 @@
+import socket
+import subprocess
+import time
+import urllib.error
+import urllib.request
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+from run_odoo import utils
+from run_odoo.runner import Runner
+
+STARTING = "starting"
+HEALTHY = "healthy"
+UNHEALTHY = "unhealthy"
+CRASHED = "crashed"
+FAILED = "failed"
+STOPPED = "stopped"
+
+
+def port_available(port: int, host: str = "127.0.0.1") -> bool:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        try:
+            sock.bind((host, port))
+        except OSError:
+            return False
+    return True
+
+
+def allocate_ports(runners: list[Runner]) -> None:
+    """Give every runner an HTTP port nobody uses, and a gevent port when it has workers
+
+    A profile keeps its configured HTTP port when it is free.
+    """
+    taken: set[int] = set()
+
+    def free_port(preferred: Optional[int] = None) -> int:
+        if preferred and preferred not in taken and port_available(preferred):
+            port = preferred
+        else:
+            port = utils.find_free_port()
+            while port in taken:
+                port = utils.find_free_port()
+        taken.add(port)
+        return port
+
+    for runner in runners:
+        runner.http_port = free_port(runner.http_port)
+        if runner.workers > 0:
+            runner.gevent_port = free_port(runner.gevent_port)
+
+
+def health_url(runner: Runner) -> str:
+    # /web/health exists since Odoo 16
+    path = "/web/health" if runner.version >= 16.0 else "/web/login"
+    return f"http://{runner.http_host}:{runner.http_port}{path}"
+
+
+def health_check(url: str, timeout: float = 5) -> bool:
+    try:
+        with urllib.request.urlopen(url, timeout=timeout) as response:
+            return response.status == 200
+    except (urllib.error.URLError, OSError):
+        return False
+
+
+@dataclass
+class Instance:
+    name: str
+    runner: Runner
+    logfile: Path
+    proc: Optional[subprocess.Popen] = None
+    state: str = STOPPED
+    restarts: int = 0
+    started_at: float = 0.0
+
+    def start(self) -> None:
+        self.runner.logfile = self.logfile
+        self.proc = self.runner.start(stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        self.state = STARTING
+        self.started_at = time.monotonic()
+
+    def stop(self) -> None:
+        if self.proc is not None and self.proc.poll() is None:
+            self.proc.terminate()
+            try:
+                self.proc.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                self.proc.kill()
+                self.proc.wait()
+        self.state = STOPPED
+
+
+class Supervisor:
+    """Keep several Odoo instances running, restarting those that crash"""
+
+    def __init__(
+        self,
+        instances: list[Instance],
+        interval: float = 2.0,
+        max_restarts: int = 5,
+        start_timeout: float = 300,
+    ) -> None:
+        self.instances = instances
+        self.interval = interval
+        self.max_restarts = max_restarts
+        # Registry loading can take minutes on big databases
+        self.start_timeout = start_timeout
+
+    def check(self, instance: Instance) -> str:
+        """Update and return the state of one instance"""
+        if instance.state in (FAILED, STOPPED):
+            return instance.state
+
+        if instance.proc.poll() is not None:
+            if instance.restarts >= self.max_restarts:
+                instance.state = FAILED
+                return instance.state
+            instance.state = CRASHED
+            instance.restarts += 1
+            instance.start()
+            return CRASHED
+
+        if health_check(health_url(instance.runner), timeout=min(5, self.interval * 2)):
+            instance.state = HEALTHY
+        elif instance.state == STARTING:
+            if time.monotonic() - instance.started_at > self.start_timeout:
+                instance.state = UNHEALTHY
+        else:
+            instance.state = UNHEALTHY
+        return instance.state
+
+    def check_all(self) -> bool:
+        """Check every instance, True if any state changed"""
+        changed = False
+        for instance in self.instances:
+            before = instance.state
+            if self.check(instance) != before:
+                changed = True
+        return changed
+
+    def run(self) -> None:
+        for instance in self.instances:
+            instance.start()
+        print_status(self.instances)
+        try:
+            while True:
+                time.sleep(self.interval)
+                if self.check_all():
+                    print_status(self.instances)
+                if all(instance.state == FAILED for instance in self.instances):
+                    print("Every instance failed, see their log files")
+                    return
+        except KeyboardInterrupt:
+            print("\nStopping instances...")
+        finally:
+            for instance in self.instances:
+                instance.stop()
+
+
+def prepare_instances(runners: dict[str, Runner]) -> list[Instance]:
+    """Instances for named runners, each with its own database, ports and log file"""
+    databases: dict[str, str] = {}
+    for name, runner in runners.items():
+        runner._set_default_db()
+        if runner.db in databases:
+            raise ValueError(
+                f"Profiles '{databases[runner.db]}' and '{name}' would share database "
+                f"'{runner.db}', set db in one of them"
+            )
+        databases[runner.db] = name
+
+    allocate_ports(list(runners.values()))
+    instances = []
+    for name, runner in runners.items():
+        log_dir = runner.app_dir / "up"
+        log_dir.mkdir(parents=True, exist_ok=True)
+        instances.append(Instance(name=name, runner=runner, logfile=log_dir / f"{name}.log"))
+    return instances
+
+
+def print_status(instances: list[Instance]) -> None:
+    print()
+    print(
+        f"{'Profile':<16}{'Version':>8}  {'Database':<24}{'HTTP':>6}{'Gevent':>8}{'PID':>9}"
+        f"  {'State':<11}{'Restarts':>8}  Log"
+    )
+    for instance in instances:
+        runner = instance.runner
+        pid = instance.proc.pid if instance.proc else "-"
+        print(
+            f"{instance.name:<16}{runner.version:>8}  {runner.db or '-':<24}{runner.http_port:>6}"
+            f"{runner.gevent_port or '-':>8}{pid:>9}  {instance.state:<11}{instance.restarts:>8}"
+            f"  {instance.logfile}"
+        )
@@ -0,0 +1,78 @@
+import re
+import subprocess
+import threading
+import time
+from typing import Optional
+
+from run_odoo import odoo_log, utils
+from run_odoo.observers import RunObserver
+
+# First occurrence of each of these log messages marks a startup phase
+LOG_MARKERS = [
+    ("odoo.service.server", re.compile(r"^HTTP service \(\w+\) running"), "HTTP service started"),
+    ("odoo.modules.loading", re.compile(r"^loading \d+ modules"), "module loading started"),
+    ("odoo.modules.loading", re.compile(r"^Modules loaded\."), "modules loaded"),
+    ("odoo.modules.registry", re.compile(r"^Registry loaded in"), "registry loaded"),
+]
+
+
+class PhaseTimer(RunObserver):
+    """Timestamp run-odoo phases and Odoo startup milestones"""
+
+    log_handlers = (
+        "odoo.service.server:INFO",
+        "odoo.modules.loading:INFO",
+        "odoo.modules.registry:INFO",
+    )
+
+    def __init__(self, host: str = "127.0.0.1", port: Optional[int] = None) -> None:
+        self.host = host
+        self.port = port
+        self.start = time.monotonic()
+        self.marks: list[tuple[str, float]] = []
+        self.reported = False
+        self._seen: set[str] = set()
+        self._lock = threading.Lock()
+
+    def mark(self, label: str) -> None:
+        with self._lock:
+            self.marks.append((label, time.monotonic()))
+
+    def started(self, proc: subprocess.Popen) -> None:
+        self.mark("odoo-bin spawned")
+        if self.port:
+            threading.Thread(target=self._probe, args=(proc,), daemon=True).start()
+
+    def _probe(self, proc: subprocess.Popen) -> None:
+        if utils.wait_for_port(self.host, self.port, timeout=None, proc=proc):
+            self.mark("HTTP port accepting connections")
+            self.report()
+
+    def line(self, line: str) -> bool:
+        if "first output" not in self._seen:
+            self._seen.add("first output")
+            self.mark("first output")
+        record = odoo_log.parse_line(line)
+        if record is None:
+            return False
+        for logger, pattern, label in LOG_MARKERS:
+            if label not in self._seen and record.logger == logger and pattern.match(record.message):
+                self._seen.add(label)
+                self.mark(label)
+        return False
+
+    def finished(self, returncode: int | None) -> None:
+        self.mark("odoo-bin exited")
+        if not self.reported:
+            self.report()
+
+    def report(self) -> None:
+        with self._lock:
+            self.reported = True
+            marks = sorted(self.marks, key=lambda mark: mark[1])
+        print()
+        print(f"{'Phase':<36}{'Duration':>10}{'At':>10}")
+        previous = self.start
+        for label, timestamp in marks:
+            print(f"{label:<36}{timestamp - previous:>9.2f}s{timestamp - self.start:>9.2f}s")
+            previous = timestamp
@@ -1,5 +1,9 @@
+import os
+import socket
 import subprocess
+import time
 from pathlib import Path
+from typing import Optional
 
 
 # FIXME: enhance this - add error handling and logging
@@ -53,3 +57,64 @@ def clone_or_update_repo(repo_url: str, target_path: Path, branch: str = "master
         subprocess.run(
             ["git", "clone", repo_url, "-b", branch, str(target_path)], check=True
         )
+
+
+def find_free_port(host: str = "127.0.0.1") -> int:
+    """Ask the OS for a TCP port that is currently unused"""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind((host, 0))
+        return sock.getsockname()[1]
+
+
+def run_with_rusage(cmd: list[str], **popen_kwargs) -> tuple[int, float, int]:
+    """Run a command and return its exit code, wall time in seconds and peak RSS in KiB"""
+    start = time.monotonic()
+    proc = subprocess.Popen(cmd, **popen_kwargs)
+    _, status, rusage = os.wait4(proc.pid, 0)
+    # os.wait4 reaped the child, tell Popen so it doesn't try again
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    return proc.returncode, time.monotonic() - start, rusage.ru_maxrss
+
+
+def wait_for_port(
+    host: str,
+    port: int,
+    timeout: Optional[float] = 120,
+    proc: Optional[subprocess.Popen] = None,
+    interval: float = 0.1,
+) -> bool:
+    """Wait until host:port accepts TCP connections
+
+    Gives up after timeout seconds (never if None) or once proc has exited.
+    """
+    deadline = None if timeout is None else time.monotonic() + timeout
+    while deadline is None or time.monotonic() < deadline:
+        if proc is not None and proc.poll() is not None:
+            return False
+        try:
+            with socket.create_connection((host, port), timeout=1):
+                return True
+        except OSError:
+            time.sleep(interval)
+    return False
+
+
+def child_pids(pid: int) -> list[int]:
+    """All descendants of a process, found by scanning /proc"""
+    parents: dict[int, list[int]] = {}
+    for stat_file in Path("/proc").glob("[0-9]*/stat"):
+        try:
+            stat = stat_file.read_text()
+        except OSError:
+            continue  # process exited meanwhile
+        # The command name is in parentheses and may contain spaces
+        fields = stat[stat.rindex(")") + 2 :].split()
+        parents.setdefault(int(fields[1]), []).append(int(stat_file.parent.name))
+
+    descendants = []
+    stack = [pid]
+    while stack:
+        for child in parents.get(stack.pop(), []):
+            descendants.append(child)
+            stack.append(child)
+    return sorted(descendants)
@@ -1,8 +1,22 @@
 import pytest
 from pathlib import Path
+from unittest.mock import patch
 
 
 @pytest.fixture
 def data_dir() -> Path:
     cwd = Path(__file__)
     return cwd.parent / "data"
+
+
+@pytest.fixture
+def prepared_env(tmp_path):
+    """Skip Odoo source and virtualenv setup when building a Runner"""
+
+    def fake_prepare_env(self):
+        self.app_dir = tmp_path
+        self.odoo_root_dir = tmp_path / str(self.version)
+        self.venv = f"venv-odoo{self.version}"
+
+    with patch("run_odoo.runner.Runner._prepare_env", fake_prepare_env):
+        yield tmp_path
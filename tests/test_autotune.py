@@ -0,0 +1,120 @@
+import pytest
+
+from run_odoo import autotune
+from run_odoo.autotune import MB, Resources
+
+GB = 1024 * MB
+
+
+@pytest.mark.unit
+class TestResources:
+    """Test reading CPU and memory limits"""
+
+    def test_cgroup_v2(self, tmp_path):
+        (tmp_path / "cpu.max").write_text("200000 100000\n")
+        (tmp_path / "memory.max").write_text(f"{4 * GB}\n")
+
+        assert autotune.cgroup_limits(tmp_path) == (2.0, 4 * GB, "cgroup v2")
+
+    def test_cgroup_v2_unlimited(self, tmp_path):
+        (tmp_path / "cpu.max").write_text("max 100000\n")
+        (tmp_path / "memory.max").write_text("max\n")
+
+        assert autotune.cgroup_limits(tmp_path) == (None, None, "cgroup v2")
+
+    def test_cgroup_v1(self, tmp_path):
+        (tmp_path / "cpu").mkdir()
+        (tmp_path / "cpu" / "cpu.cfs_quota_us").write_text("150000\n")
+        (tmp_path / "cpu" / "cpu.cfs_period_us").write_text("100000\n")
+        (tmp_path / "memory").mkdir()
+        (tmp_path / "memory" / "memory.limit_in_bytes").write_text("9223372036854771712\n")
+
+        assert autotune.cgroup_limits(tmp_path) == (1.5, None, "cgroup v1")
+
+    def test_total_memory(self, tmp_path):
+        meminfo = tmp_path / "meminfo"
+        meminfo.write_text("MemTotal:       16303984 kB\nMemFree:         1000 kB\n")
+
+        assert autotune.total_memory(meminfo) == 16303984 * 1024
+
+
+@pytest.mark.unit
+class TestComputeTuning:
+    """Test Odoo's sizing rules on common machine sizes"""
+
+    def assert_sane(self, tuning, memory, max_connections=autotune.DEFAULT_MAX_CONNECTIONS):
+        # Odoo's per-worker limits are never cut
+        assert tuning.limit_memory_soft == 2048 * MB
+        assert tuning.limit_memory_hard == 2560 * MB
+        assert tuning.workers >= 1
+        processes = tuning.workers + tuning.max_cron_threads
+        if processes > 2:
+            assert processes * tuning.limit_memory_hard <= memory
+        # Each process, and the gevent one, gets a usable pool within the budget
+        assert tuning.db_maxconn >= autotune.MIN_DB_MAXCONN
+        assert (processes + 1) * tuning.db_maxconn <= (
+            max_connections - autotune.RESERVED_CONNECTIONS
+        )
+
+    def test_small_vm(self):
+        tuning = autotune.compute_tuning(Resources(cpus=1, memory=1 * GB))
+
+        self.assert_sane(tuning, 1 * GB)
+        assert (tuning.workers, tuning.max_cron_threads) == (1, 1)
+
+    def test_4_cpus_4_gb(self):
+        tuning = autotune.compute_tuning(Resources(cpus=4, memory=4 * GB))
+
+        self.assert_sane(tuning, 4 * GB)
+        assert (tuning.workers, tuning.max_cron_threads) == (1, 1)
+
+    def test_8_cpus_16_gb(self):
+        tuning = autotune.compute_tuning(Resources(cpus=8, memory=16 * GB))
+
+        self.assert_sane(tuning, 16 * GB)
+        assert (tuning.workers, tuning.max_cron_threads) == (4, 2)
+        assert tuning.db_maxconn == 12
+
+    def test_16_cpus_64_gb_limited_by_connections(self):
+        tuning = autotune.compute_tuning(Resources(cpus=16, memory=64 * GB))
+
+        self.assert_sane(tuning, 64 * GB)
+        # 90 connections allow 11 pools of 8: memory alone would allow 23 workers
+        assert (tuning.workers, tuning.max_cron_threads) == (8, 2)
+        assert tuning.db_maxconn == 8
+
+    def test_16_cpus_64_gb_with_connections(self):
+        tuning = autotune.compute_tuning(Resources(cpus=16, memory=64 * GB), max_connections=500)
+
+        self.assert_sane(tuning, 64 * GB, max_connections=500)
+        assert (tuning.workers, tuning.max_cron_threads) == (23, 2)
+        assert tuning.db_maxconn == 18
+
+    def test_cpu_bound(self):
+        tuning = autotune.compute_tuning(Resources(cpus=2, memory=64 * GB))
+
+        self.assert_sane(tuning, 64 * GB)
+        assert (tuning.workers, tuning.max_cron_threads) == (5, 1)
+
+
+@pytest.mark.unit
+class TestAutoTune:
+    """Test applying the tuning to a runner"""
+
+    def test_profile_overrides(self, prepared_env, monkeypatch, capsys):
+        from run_odoo.runner import Runner
+
+        monkeypatch.setattr(autotune, "detect_resources", lambda: Resources(cpus=2, memory=8 * GB))
+        monkeypatch.setattr(autotune.pg, "show_setting", lambda name, env: "100")
+        runner = Runner(version=17.0, workers=3)
+
+        sources = autotune.auto_tune(runner, overrides={"workers": 3})
+
+        assert runner.workers == 3
+        assert sources["workers"] == "profile"
+        assert runner.max_cron_threads == 1
+        assert sources["limit_request"] == "auto"
+        options = runner._prepare_params()
+        assert options[options.index("--limit-request") + 1] == "8192"
+        assert "--db_maxconn" in options
+        assert "--db-maxconn" not in options
@@ -0,0 +1,51 @@
+import json
+import pytest
+from unittest.mock import patch
+
+from run_odoo import bench
+from run_odoo.runner import Runner
+
+
+@pytest.mark.unit
+@pytest.mark.subprocess
+class TestBenchStartup:
+    """Test the repeated startup benchmark"""
+
+    @patch('run_odoo.bench.utils.run_with_rusage')
+    def test_bench_startup(self, mock_run, prepared_env):
+        mock_run.side_effect = [(0, 9.0, 1000), (0, 2.0, 2048), (0, 4.0, 4096)]
+        runner = Runner(version=17.0, db="bench", install_modules=False, stop_after_init=True)
+
+        results = bench.bench_startup(runner, runs=2, warmup=1)
+
+        assert [r.wall_time for r in results] == [2.0, 4.0]
+        cmd = mock_run.call_args[0][0]
+        assert "--no-http" in cmd
+        assert cmd.count("--stop-after-init") == 1
+
+    @patch('run_odoo.bench.utils.run_with_rusage', return_value=(1, 1.0, 1000))
+    def test_bench_startup_failure(self, mock_run, prepared_env):
+        runner = Runner(version=17.0, db="bench", install_modules=False)
+
+        with pytest.raises(RuntimeError, match="exited with code 1"):
+            bench.bench_startup(runner, runs=1, warmup=0)
+
+    @patch('run_odoo.bench.subprocess.run')
+    @patch('run_odoo.bench.utils.run_with_rusage', return_value=(0, 1.0, 1000))
+    def test_bench_startup_drop_caches(self, mock_run, mock_subprocess, prepared_env):
+        runner = Runner(version=17.0, db="bench", install_modules=False)
+
+        bench.bench_startup(runner, runs=2, warmup=0, drop_caches=True)
+
+        assert mock_subprocess.call_count == 4
+
+    def test_write_startup_report(self, prepared_env, tmp_path):
+        runner = Runner(version=17.0, workers=2)
+        results = [bench.StartupRun(2.0, 2048), bench.StartupRun(4.0, 4096)]
+
+        setup = bench.describe_setup(runner, drop_caches=False)
+        bench.write_startup_report(results, setup, tmp_path / "report.json")
+
+        report = json.loads((tmp_path / "report.json").read_text())
+        assert report["setup"]["workers"] == 2
+        assert report["wall_time"]["median"] == 3.0
@@ -75,6 +75,26 @@ class TestTryModule:
         assert result.exit_code == 0
         mock_runner.run.assert_called_once()
 
+    @patch('run_odoo.cli.autotune.auto_tune')
+    def test_try_module_auto_tune_keeps_workers(self, mock_auto_tune, cli_runner, mock_runner):
+        """Test --workers given with --auto-tune is not replaced by the tuning"""
+        result = cli_runner.invoke(
+            app, ["try-module", "test_module", "--workers", "3", "--auto-tune"]
+        )
+
+        assert result.exit_code == 0
+        assert mock_auto_tune.call_args[1]["overrides"]["workers"] == 3
+
+    @patch('run_odoo.cli.shelld.stop_daemon')
+    def test_try_module_stops_shell_daemon(self, mock_stop_daemon, cli_runner, mock_runner):
+        """Test the shell daemon is stopped before modules are installed"""
+        mock_runner.install_modules = True
+
+        result = cli_runner.invoke(app, ["try-module", "test_module"])
+
+        assert result.exit_code == 0
+        mock_stop_daemon.assert_called_once_with(mock_runner.shell_socket.return_value)
+
     def test_try_module_with_log_level(self, cli_runner, mock_runner):
         """Test try_module with custom log level"""
         result = cli_runner.invoke(app, ["try-module", "test_module", "--log-level", "debug"])
@@ -169,6 +189,37 @@ class TestTestModule:
         mock_get_config.assert_called_once_with(config_path=None, profile_name="test_profile")
         mock_runner.run_tests.assert_called_once()
 
+    def test_test_module_reuse_db(self, cli_runner, mock_runner):
+        """Test test_module against a template database copy"""
+        result = cli_runner.invoke(app, ["test-module", "test_module", "--reuse-db", "--update", "a,b"])
+
+        assert result.exit_code == 0
+        mock_runner.run_tests.assert_called_once_with(
+            reuse_db=True, update_modules=["a", "b"], rebuild_template=False, erase_coverage=False
+        )
+
+
+@pytest.mark.cli
+@pytest.mark.unit
+class TestTestMatrix:
+    """Test the test_matrix command"""
+
+    @patch('run_odoo.cli.matrix.run_test_matrix')
+    def test_test_matrix_versions(self, mock_run_matrix, cli_runner):
+        """Test test_matrix passes the parsed versions"""
+        mock_run_matrix.return_value = []
+
+        result = cli_runner.invoke(app, ["test-matrix", "test_module", "--versions", "16.0,18.0"])
+
+        assert result.exit_code == 0
+        assert mock_run_matrix.call_args[1]["versions"] == [16.0, 18.0]
+
+    def test_test_matrix_invalid_version(self, cli_runner):
+        """Test test_matrix rejects unsupported versions"""
+        result = cli_runner.invoke(app, ["test-matrix", "test_module", "--versions", "99.0"])
+
+        assert result.exit_code != 0
+
 
 @pytest.mark.cli
 @pytest.mark.unit
@@ -279,6 +330,30 @@ class TestShell:
         mock_runner.run_shell.assert_called_once()
 
 
+@pytest.mark.cli
+@pytest.mark.unit
+class TestTimings:
+    """Test --timings on commands starting Odoo"""
+
+    def test_exec_timings(self, cli_runner, tmp_path):
+        script = tmp_path / "fix.py"
+        script.write_text("pass\n")
+        with patch('run_odoo.cli.Runner') as runner_class:
+            result = cli_runner.invoke(app, ["exec", "test_db", str(script), "--timings"])
+
+        assert result.exit_code == 0
+        assert runner_class.call_args.kwargs["timings"] is True
+
+    def test_profile_timings(self, cli_runner):
+        with patch('run_odoo.cli._profile_runner') as profile_runner, patch(
+            'run_odoo.cli.sampling'
+        ):
+            result = cli_runner.invoke(app, ["profile", "staging", "--timings"])
+
+        assert result.exit_code == 0
+        assert profile_runner.call_args.kwargs["timings"] is True
+
+
 @pytest.mark.cli
 @pytest.mark.unit
 @pytest.mark.subprocess
@@ -370,6 +445,25 @@ class TestHarlequin:
         assert "Error starting Harlequin" in result.stdout
 
 
+@pytest.mark.cli
+@pytest.mark.unit
+class TestWaitReady:
+    """Test the wait_ready command"""
+
+    @patch('run_odoo.cli.utils.wait_for_port', return_value=True)
+    def test_wait_ready(self, mock_wait, cli_runner):
+        result = cli_runner.invoke(app, ["wait-ready", "--port", "8070"])
+
+        assert result.exit_code == 0
+        mock_wait.assert_called_once_with("127.0.0.1", 8070, timeout=120)
+
+    @patch('run_odoo.cli.utils.wait_for_port', return_value=False)
+    def test_wait_ready_timeout(self, mock_wait, cli_runner):
+        result = cli_runner.invoke(app, ["wait-ready", "--timeout", "1"])
+
+        assert result.exit_code == 1
+
+
 @pytest.mark.cli
 @pytest.mark.error
 class TestCLIErrorHandling:
@@ -0,0 +1,224 @@
+import subprocess
+
+import pytest
+from unittest.mock import patch, MagicMock
+
+from run_odoo import db
+
+
+def fail_reflink(cmd, **kwargs):
+    """subprocess.run stand-in for a file system without copy-on-write"""
+    if cmd[0] == "cp":
+        raise subprocess.CalledProcessError(1, cmd)
+    return MagicMock(returncode=0, stdout="")
+
+
+@pytest.mark.unit
+@pytest.mark.subprocess
+class TestDatabaseHelpers:
+    """Test PostgreSQL client tool helpers"""
+
+    @patch('run_odoo.db.subprocess.run')
+    def test_database_exists(self, mock_subprocess):
+        """Test database lookup in pg_database"""
+        mock_subprocess.return_value = MagicMock(stdout="postgres\nv17c_sale\n")
+
+        assert db.database_exists("v17c_sale", {}) is True
+        assert db.database_exists("missing", {}) is False
+
+    @patch('run_odoo.db.subprocess.run', side_effect=fail_reflink)
+    def test_clone_database(self, mock_subprocess, tmp_path):
+        """Test cloning a database and its filestore from a template"""
+        (tmp_path / "filestore" / "tmpl" / "ab").mkdir(parents=True)
+        (tmp_path / "filestore" / "tmpl" / "ab" / "file").write_text("data")
+        (tmp_path / "filestore" / "copy").mkdir(parents=True)
+
+        db.clone_database("tmpl", "copy", {}, data_dir=tmp_path)
+
+        commands = [call[0][0] for call in mock_subprocess.call_args_list]
+        assert commands[:2] == [
+            ["dropdb", "--if-exists", "copy"],
+            ["createdb", "-T", "tmpl", "copy"],
+        ]
+        assert (tmp_path / "filestore" / "copy" / "ab" / "file").read_text() == "data"
+
+    @patch('run_odoo.db.subprocess.run')
+    def test_rename_database(self, mock_subprocess, tmp_path):
+        """Test names are passed as psql variables and the filestore follows"""
+        mock_subprocess.return_value = MagicMock(returncode=0)
+        (tmp_path / "filestore" / "it's").mkdir(parents=True)
+
+        db.rename_database("it's", "tmpl", {}, data_dir=tmp_path)
+
+        cmd = mock_subprocess.call_args[0][0]
+        assert "old=it's" in cmd
+        assert mock_subprocess.call_args[1]["input"] == 'ALTER DATABASE :"old" RENAME TO :"new";'
+        assert (tmp_path / "filestore" / "tmpl").is_dir()
+
+    @patch('run_odoo.db.subprocess.run')
+    def test_rename_database_failure(self, mock_subprocess):
+        """Test a failed rename is reported"""
+        mock_subprocess.return_value = MagicMock(returncode=1, stderr="already exists")
+
+        with pytest.raises(RuntimeError, match="already exists"):
+            db.rename_database("a", "b", {})
+
+    def test_filestore_path_default(self):
+        """Test default filestore location"""
+        path = db.filestore_path("test_db")
+
+        assert path == db.DEFAULT_DATA_DIR / "filestore" / "test_db"
+
+
+@pytest.mark.unit
+@pytest.mark.subprocess
+class TestMaintenance:
+    """Test VACUUM (ANALYZE) and rebuilding bloated indexes"""
+
+    @patch('run_odoo.db.subprocess.run')
+    def test_vacuum_analyze(self, mock_subprocess):
+        """Test vacuumdb runs over a bounded number of connections"""
+        db.vacuum_analyze("test_db", {"PGHOST": "localhost"}, jobs=3)
+
+        assert mock_subprocess.call_args[0][0] == [
+            "vacuumdb", "--analyze", "--jobs", "3", "--dbname", "test_db"
+        ]
+        assert mock_subprocess.call_args[1]["env"] == {"PGHOST": "localhost"}
+
+    def test_default_jobs_bounded(self):
+        """Test the default number of connections stays between 1 and 4"""
+        with patch('run_odoo.db.os.cpu_count', return_value=64):
+            assert db.default_jobs() == 4
+        with patch('run_odoo.db.os.cpu_count', return_value=1):
+            assert db.default_jobs() == 1
+
+    @patch('run_odoo.db.subprocess.run')
+    def test_bloated_indexes(self, mock_subprocess):
+        """Test reading bloated index names"""
+        mock_subprocess.side_effect = [
+            MagicMock(returncode=0, stdout="1\n"),
+            MagicMock(stdout="mail_message_pkey\nres_partner_name_index\n"),
+        ]
+
+        assert db.bloated_indexes("test_db", {}) == ["mail_message_pkey", "res_partner_name_index"]
+        assert "pg_extension" in mock_subprocess.call_args_list[0][0][0][-1]
+        assert "pgstatindex" in mock_subprocess.call_args[0][0][-1]
+
+    @patch('run_odoo.db.subprocess.run')
+    def test_bloated_indexes_without_pgstattuple(self, mock_subprocess):
+        """Test None is returned when pgstattuple is not installed, without creating it"""
+        mock_subprocess.return_value = MagicMock(returncode=0, stdout="")
+
+        assert db.bloated_indexes("test_db", {}) is None
+        mock_subprocess.assert_called_once()
+        assert "CREATE EXTENSION" not in mock_subprocess.call_args[0][0][-1]
+
+    @patch('run_odoo.db.subprocess.run')
+    def test_bloated_indexes_install_pgstattuple(self, mock_subprocess):
+        """Test pgstattuple is only created when asked, None if that fails"""
+        mock_subprocess.return_value = MagicMock(returncode=1)
+
+        assert db.bloated_indexes("test_db", {}, install=True) is None
+        assert "CREATE EXTENSION" in mock_subprocess.call_args[0][0][-1]
+
+    @patch('run_odoo.db.subprocess.run')
+    def test_reindex(self, mock_subprocess):
+        """Test each index is rebuilt with reindexdb"""
+        db.reindex("test_db", ["a_index", "b_index"], {}, jobs=2)
+
+        commands = sorted(call[0][0] for call in mock_subprocess.call_args_list)
+        assert commands == [
+            ["reindexdb", "--concurrently", "--dbname", "test_db", "--index", "a_index"],
+            ["reindexdb", "--concurrently", "--dbname", "test_db", "--index", "b_index"],
+        ]
+
+
+@pytest.mark.unit
+@pytest.mark.subprocess
+class TestSnapshots:
+    """Test snapshotting a database before an upgrade and swapping it back"""
+
+    @patch('run_odoo.db.subprocess.run', side_effect=fail_reflink)
+    def test_copy_filestore_hardlinks(self, mock_subprocess, tmp_path):
+        """Test files are hardlinked when reflinks are not supported"""
+        (tmp_path / "source" / "ab").mkdir(parents=True)
+        (tmp_path / "source" / "ab" / "file").write_text("data")
+
+        method = db.copy_filestore(tmp_path / "source", tmp_path / "target")
+
+        assert method == "hardlink"
+        source, target = tmp_path / "source" / "ab" / "file", tmp_path / "target" / "ab" / "file"
+        assert source.stat().st_ino == target.stat().st_ino
+
+    @patch('run_odoo.db.subprocess.run', side_effect=fail_reflink)
+    def test_snapshot_database(self, mock_subprocess, tmp_path):
+        """Test the snapshot is a template copy of the database"""
+        (tmp_path / "filestore" / "prod").mkdir(parents=True)
+
+        method = db.snapshot_database("prod", "prod_snapshot", {}, data_dir=tmp_path)
+
+        commands = [call[0][0] for call in mock_subprocess.call_args_list]
+        assert ["createdb", "-T", "prod", "prod_snapshot"] in commands
+        assert method == "hardlink"
+        assert (tmp_path / "filestore" / "prod_snapshot").is_dir()
+
+    @patch('run_odoo.db.subprocess.run')
+    def test_snapshot_refuses_other_database(self, mock_subprocess):
+        """Test a database that no snapshot created is not dropped"""
+        mock_subprocess.return_value = MagicMock(
+            returncode=0, stdout="prod\nprod_snapshot\n", stderr=""
+        )
+
+        with pytest.raises(RuntimeError, match="not a snapshot of 'prod'"):
+            db.snapshot_database("prod", "prod_snapshot", {})
+
+        commands = [call[0][0][0] for call in mock_subprocess.call_args_list]
+        assert "dropdb" not in commands
+
+    @patch('run_odoo.db.subprocess.run')
+    def test_snapshot_replaces_previous_snapshot(self, mock_subprocess):
+        """Test a database marked by a previous snapshot is replaced"""
+
+        def run(cmd, **kwargs):
+            if "datname = :'name'" in kwargs.get("input", ""):
+                return MagicMock(returncode=0, stdout="run-odoo snapshot of prod\n")
+            return MagicMock(returncode=0, stdout="prod\nprod_snapshot\n")
+
+        mock_subprocess.side_effect = run
+
+        db.snapshot_database("prod", "prod_snapshot", {})
+
+        commands = [call[0][0] for call in mock_subprocess.call_args_list]
+        assert ["dropdb", "--if-exists", "prod_snapshot"] in commands
+        assert ["createdb", "-T", "prod", "prod_snapshot"] in commands
+
+    @patch('run_odoo.db.subprocess.run')
+    def test_swap_databases(self, mock_subprocess, tmp_path):
+        """Test databases are renamed in one statement and filestores follow"""
+        mock_subprocess.return_value = MagicMock(returncode=0)
+        (tmp_path / "filestore" / "prod").mkdir(parents=True)
+        (tmp_path / "filestore" / "prod" / "upgraded").touch()
+        (tmp_path / "filestore" / "prod_snapshot").mkdir(parents=True)
+        (tmp_path / "filestore" / "prod_snapshot" / "original").touch()
+
+        db.swap_databases("prod", "prod_snapshot", {}, data_dir=tmp_path)
+
+        rename = mock_subprocess.call_args_list[-1]
+        assert "--single-transaction" in rename[0][0]
+        assert "first=prod" in rename[0][0]
+        assert rename[1]["input"] == (
+            'ALTER DATABASE :"first" RENAME TO :"swap";\n'
+            'ALTER DATABASE :"second" RENAME TO :"first";\n'
+            'ALTER DATABASE :"swap" RENAME TO :"second";\n'
+        )
+        assert (tmp_path / "filestore" / "prod" / "original").exists()
+        assert (tmp_path / "filestore" / "prod_snapshot" / "upgraded").exists()
+
+    @patch('run_odoo.db.time.sleep')
+    @patch('run_odoo.db.subprocess.run')
+    def test_swap_databases_in_use(self, mock_subprocess, mock_sleep):
+        """Test giving up when the databases stay in use"""
+        mock_subprocess.return_value = MagicMock(returncode=1, stderr="being accessed by other users")
+
+        with pytest.raises(RuntimeError, match="being accessed"):
+            db.swap_databases("prod", "prod_snapshot", {}, attempts=2)
@@ -0,0 +1,124 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+from typer.testing import CliRunner
+
+from run_odoo import dbstats
+from run_odoo.cli import app
+from run_odoo.dbstats import DatabaseStats, IndexStats, TableStats
+
+
+def table(name, live=100000, dead=0, seq_scans=0, seq_read=0, idx_scans=100, size=1024**2):
+    return TableStats(name, live, dead, seq_scans, seq_read, idx_scans, size, size * 2)
+
+
+@pytest.mark.unit
+class TestAnalysis:
+    """Test spotting bloat, sequential scans and unused indexes"""
+
+    def test_bloated_tables(self):
+        tables = [
+            table("mail_message", live=100000, dead=50000),
+            table("res_partner", live=100000, dead=5000),
+            table("tiny", live=10, dead=900),
+        ]
+
+        assert [t.name for t in dbstats.bloated_tables(tables)] == ["mail_message"]
+
+    def test_seq_scan_heavy(self):
+        tables = [
+            table("account_move_line", seq_scans=500, seq_read=10**9, idx_scans=20),
+            table("sale_order", seq_scans=100, seq_read=10**7, idx_scans=10),
+            table("res_partner", seq_scans=5, idx_scans=5000),
+            table("res_country", live=250, seq_scans=10**6, idx_scans=0),
+        ]
+
+        assert [t.name for t in dbstats.seq_scan_heavy(tables)] == [
+            "account_move_line",
+            "sale_order",
+        ]
+
+    def test_unused_indexes(self):
+        indexes = [
+            IndexStats("res_partner", "res_partner_ref_index", 0, 8192),
+            IndexStats("res_partner", "res_partner_pkey", 0, 16384, unique=True),
+            IndexStats("res_partner", "res_partner_name_index", 12, 32768),
+            IndexStats("sale_order", "sale_order_origin_index", 0, 65536),
+        ]
+
+        assert [index.name for index in dbstats.unused_indexes(indexes)] == [
+            "sale_order_origin_index",
+            "res_partner_ref_index",
+        ]
+
+    def test_cache_hit_ratio(self):
+        stats = table("res_partner")
+        assert stats.cache_hit_ratio is None
+        stats.blocks_read, stats.blocks_hit = 10, 90
+        assert stats.cache_hit_ratio == 0.9
+
+
+@pytest.mark.unit
+class TestCollect:
+    """Test gathering the numbers"""
+
+    def test_directory_size(self, tmp_path):
+        assert dbstats.directory_size(tmp_path / "missing") is None
+        (tmp_path / "ab").mkdir()
+        (tmp_path / "ab" / "file").write_bytes(b"x" * 100)
+        (tmp_path / "other").write_bytes(b"x" * 20)
+
+        assert dbstats.directory_size(tmp_path) == 120
+
+    def test_collect(self, tmp_path):
+        filestore = tmp_path / "filestore" / "v17c_sale"
+        filestore.mkdir(parents=True)
+        (filestore / "file").write_bytes(b"x" * 10)
+        cursor = MagicMock()
+        cursor.fetchone.return_value = ("v17c_sale", 50 * 1024**2)
+        cursor.fetchall.side_effect = [
+            [("res_partner", 10, 1, 2, 20, 5, 8192, 16384, 1, 9, None, None)],
+            [("res_partner", "res_partner_pkey", 5, 8192, True)],
+        ]
+        connection = MagicMock()
+        connection.cursor.return_value.__enter__.return_value = cursor
+
+        stats = dbstats.collect(connection, data_dir=tmp_path)
+
+        assert stats.name == "v17c_sale"
+        assert stats.filestore_size == 10
+        assert stats.tables[0].total_size == 16384
+        assert stats.indexes[0].unique
+
+    def test_report(self, capsys):
+        stats = DatabaseStats(
+            name="v17c_sale",
+            size=3 * 1024**3,
+            tables=[table("mail_message", dead=60000, seq_scans=10, seq_read=10**6, idx_scans=1)],
+            indexes=[IndexStats("mail_message", "mail_message_model_index", 0, 1024**2)],
+        )
+
+        dbstats.print_report(stats)
+
+        output = capsys.readouterr().out
+        assert "Database 'v17c_sale': 3GB, filestore -" in output
+        assert "Dead tuples" in output
+        assert "Sequential scans on big tables" in output
+        assert "mail_message_model_index" in output
+
+
+@pytest.mark.cli
+@pytest.mark.unit
+class TestDbStatsCommand:
+    """Test the db stats command"""
+
+    def test_db_stats(self):
+        stats = DatabaseStats(name="test_db", size=1024)
+        with patch("run_odoo.cli.pg.ConnectionParams.connect") as connect, patch(
+            "run_odoo.cli.dbstats.collect", return_value=stats
+        ):
+            result = CliRunner().invoke(app, ["db", "stats", "test_db", "--port", "5433"])
+
+        assert result.exit_code == 0
+        assert "Database 'test_db': 1kB" in result.stdout
+        connect.assert_called_once()
@@ -0,0 +1,167 @@
+import json
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import pytest
+
+from run_odoo import explain
+
+PLAN = {
+    "Plan": {
+        "Node Type": "Limit",
+        "Actual Total Time": 12.0,
+        "Actual Rows": 80,
+        "Actual Loops": 1,
+        "Plans": [
+            {
+                "Node Type": "Sort",
+                "Actual Total Time": 11.5,
+                "Actual Rows": 80,
+                "Actual Loops": 1,
+                "Sort Key": ["account_move_line.date DESC", "account_move_line.id"],
+                "Plans": [
+                    {
+                        "Node Type": "Seq Scan",
+                        "Relation Name": "account_move_line",
+                        "Actual Total Time": 9.0,
+                        "Actual Rows": 5000,
+                        "Actual Loops": 1,
+                        "Filter": "((name)::text ~~* '%rent%'::text)",
+                        "Rows Removed by Filter": 95000,
+                        "Shared Hit Blocks": 120,
+                        "Shared Read Blocks": 30,
+                    }
+                ],
+            }
+        ],
+    },
+    "Planning Time": 0.4,
+    "Execution Time": 12.1,
+}
+
+
+def column(name, operator, table="account_move_line"):
+    return {
+        "table": table,
+        "column": name,
+        "model": "account.move.line",
+        "field": name,
+        "operator": operator,
+        "index": False,
+    }
+
+
+@pytest.mark.unit
+class TestPlan:
+    """Test reading EXPLAIN plans"""
+
+    def test_flatten(self):
+        nodes = explain.flatten(PLAN["Plan"])
+
+        assert [(node.node_type, node.depth) for node in nodes] == [
+            ("Limit", 0),
+            ("Sort", 1),
+            ("Seq Scan", 2),
+        ]
+        assert nodes[1].self_time == pytest.approx(2.5)
+        assert nodes[2].self_time == pytest.approx(9.0)
+        assert "Sort Key: account_move_line.date DESC, account_move_line.id" in nodes[1].details
+        assert "Buffers: shared hit=120 read=30" in nodes[2].details
+
+    def test_loops_multiply_time(self):
+        nodes = explain.flatten(
+            {"Node Type": "Index Scan", "Actual Total Time": 0.5, "Actual Loops": 10}
+        )
+        assert nodes[0].total_time == pytest.approx(5.0)
+
+    def test_index_columns(self):
+        indexdefs = [
+            "CREATE UNIQUE INDEX account_move_line_pkey ON public.account_move_line USING btree (id)",
+            "CREATE INDEX aml_date ON public.account_move_line USING btree (date DESC, id)",
+            'CREATE INDEX aml_name ON public.account_move_line USING gin ("name" gin_trgm_ops)',
+            "CREATE INDEX aml_partial ON public.account_move_line USING btree (partner_id) "
+            "WHERE (partner_id IS NOT NULL)",
+        ]
+
+        assert explain.index_columns(indexdefs) == {
+            ("id", "btree"),
+            ("date", "btree"),
+            ("name", "trigram"),
+            ("partner_id", "btree"),
+        }
+
+
+@pytest.mark.unit
+class TestSuggestions:
+    """Test suggesting indexes for sequentially scanned columns"""
+
+    def test_suggestions(self):
+        result = {
+            "columns": [
+                column("name", "ilike"),
+                column("parent_state", "="),
+                column("date", "order"),
+                column("name", "order", table="res_partner"),
+            ],
+            "indexes": {"account_move_line": ["CREATE INDEX x ON account_move_line USING btree (parent_state)"]},
+        }
+
+        suggestions = explain.suggest_indexes(result, explain.flatten(PLAN["Plan"]))
+
+        assert [(s.column, s.kind) for s in suggestions] == [("name", "trigram"), ("date", "btree")]
+        assert suggestions[0].field_option == "index='trigram'"
+        assert suggestions[0].statement == (
+            "CREATE INDEX account_move_line__name_trgm ON account_move_line "
+            "USING gin (name gin_trgm_ops)"
+        )
+
+    def test_no_seq_scan_no_suggestion(self):
+        plan = {"Node Type": "Index Scan", "Relation Name": "account_move_line"}
+        result = {"columns": [column("name", "=")], "indexes": {}}
+
+        assert explain.suggest_indexes(result, explain.flatten(plan)) == []
+
+
+@pytest.mark.unit
+class TestExplainDomain:
+    """Test running the explain bootstrap"""
+
+    def test_result_is_read_back(self):
+        runner = MagicMock()
+
+        def run_shell(script, env_vars):
+            assert script == explain.EXPLAIN_SCRIPT.read_bytes()
+            assert env_vars["RUN_ODOO_EXPLAIN_LIMIT"] == "80"
+            Path(env_vars["RUN_ODOO_EXPLAIN_OUTPUT"]).write_text(json.dumps({"model": "res.partner"}))
+            return 0
+
+        runner.run_shell.side_effect = run_shell
+
+        result = explain.explain_domain(runner, "res.partner", "[]", limit=80)
+
+        assert result == {"model": "res.partner"}
+
+    def test_shell_failure(self):
+        runner = MagicMock()
+        runner.run_shell.return_value = 1
+
+        with pytest.raises(RuntimeError, match="exited with 1"):
+            explain.explain_domain(runner, "res.partner", "[]")
+
+    def test_report(self, capsys):
+        result = {
+            "model": "account.move.line",
+            "domain": "[('name', 'ilike', 'rent')]",
+            "sql": "SELECT ...",
+            "plan": PLAN,
+            "columns": [column("name", "ilike")],
+            "indexes": {},
+        }
+
+        suggestions = explain.print_report(result, highlight=1)
+
+        output = capsys.readouterr().out
+        assert ">>    Seq Scan on account_move_line" in output
+        assert "  Limit" in output
+        assert "account.move.line.name: index='trigram'" in output
+        assert len(suggestions) == 1
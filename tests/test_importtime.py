@@ -0,0 +1,56 @@
+import pytest
+
+from run_odoo import importtime
+
+OUTPUT = """\
+import time: self [us] | cumulative | imported package
+import time:       300 |        300 |       pandas.core
+import time:      1000 |       1300 |     pandas
+import time:       200 |       1500 |   odoo.addons.my_report.models
+import time:       100 |       1600 | odoo.addons.my_report
+import time:        50 |         50 |   json.decoder
+import time:        20 |         70 | json
+import time:        40 |         40 | odoo.addons.sale
+"""
+
+
+@pytest.mark.unit
+class TestImportTime:
+    """Test parsing and aggregating -X importtime output"""
+
+    def test_parse_line(self):
+        entry = importtime.parse_line("import time:       300 |        300 |       pandas.core\n")
+
+        assert entry.name == "pandas.core"
+        assert entry.self_us == 300
+        assert entry.level == 3
+
+    def test_build_tree(self):
+        entries = [importtime.parse_line(line) for line in OUTPUT.splitlines()[1:]]
+
+        roots = importtime.build_tree(entries)
+
+        assert [root.name for root in roots] == ["odoo.addons.my_report", "json", "odoo.addons.sale"]
+        models = roots[0].children[0]
+        assert models.name == "odoo.addons.my_report.models"
+        assert models.children[0].children[0].name == "pandas.core"
+
+    def test_aggregate(self):
+        entries = [importtime.parse_line(line) for line in OUTPUT.splitlines()[1:]]
+
+        report = importtime.aggregate(importtime.build_tree(entries))
+
+        assert report.addon_self_us == {"my_report": 300, "sale": 40}
+        assert report.addon_inclusive_us == {"my_report": 1600, "sale": 40}
+        assert report.package_self_us == {"pandas": 1300}
+        assert report.total_us == 1710
+
+    def test_profiler_hides_import_lines(self, capsys):
+        profiler = importtime.ImportTimeProfiler()
+
+        hidden = [profiler.line(line) for line in OUTPUT.splitlines(keepends=True)]
+        hidden.append(profiler.line("2024-05-01 10:00:00,000 1 INFO db odoo: hello\n"))
+        profiler.finished(0)
+
+        assert hidden == [True] * 8 + [False]
+        assert "my_report" in capsys.readouterr().out
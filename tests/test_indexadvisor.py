@@ -0,0 +1,123 @@
+import json
+
+import pytest
+
+from run_odoo import indexadvisor
+from run_odoo.indexadvisor import ColumnUse, Statement
+
+ODOO_SEARCH = (
+    'SELECT "account_move_line"."id" FROM "account_move_line" '
+    'LEFT JOIN "res_partner" AS "account_move_line__partner_id" '
+    'ON ("account_move_line"."partner_id" = "account_move_line__partner_id"."id") '
+    'WHERE (("account_move_line"."parent_state" = $1) '
+    'AND ("account_move_line__partner_id"."name"::text ILIKE $2)) '
+    'ORDER BY "account_move_line"."date" DESC, "account_move_line"."id" LIMIT $3'
+)
+
+
+@pytest.mark.unit
+class TestExtractColumns:
+    """Test finding the filtered and sorted columns of a query"""
+
+    def test_odoo_search(self):
+        assert indexadvisor.extract_columns(ODOO_SEARCH) == [
+            ColumnUse("account_move_line", "parent_state", "btree", "where"),
+            ColumnUse("res_partner", "name", "trigram", "where"),
+            ColumnUse("account_move_line", "date", "btree", "order"),
+            ColumnUse("account_move_line", "id", "btree", "order"),
+        ]
+
+    def test_in_list_from_log_shape(self):
+        sql = 'SELECT "sale_order".id FROM "sale_order" WHERE "sale_order"."partner_id" IN (?...)'
+
+        assert indexadvisor.extract_columns(sql) == [
+            ColumnUse("sale_order", "partner_id", "btree", "where")
+        ]
+
+    def test_unknown_aliases_are_ignored(self):
+        assert indexadvisor.extract_columns("SELECT 1 WHERE 1.5 > 1") == []
+
+
+@pytest.mark.unit
+class TestAdvise:
+    """Test ranking missing indexes"""
+
+    def test_advise(self):
+        statements = [
+            Statement(ODOO_SEARCH, calls=1000, total_ms=60000.0),
+            Statement(
+                'SELECT id FROM "account_move_line" WHERE "account_move_line"."parent_state" = $1',
+                calls=10,
+                total_ms=1000.0,
+            ),
+        ]
+        indexes = {
+            "account_move_line": [
+                "CREATE UNIQUE INDEX account_move_line_pkey ON public.account_move_line USING btree (id)",
+                "CREATE INDEX aml_date ON public.account_move_line USING btree (date DESC, id)",
+            ],
+        }
+        rows = {"account_move_line": 5_000_000, "res_partner": 2000}
+        fields = {("account_move_line", "parent_state"): ("account.move.line", "parent_state")}
+
+        candidates = indexadvisor.advise(statements, indexes, rows, fields)
+
+        # res_partner is too small to matter, date and id are indexed
+        assert len(candidates) == 1
+        candidate = candidates[0]
+        assert (candidate.table, candidate.column, candidate.kind) == (
+            "account_move_line",
+            "parent_state",
+            "btree",
+        )
+        assert (candidate.model, candidate.field_name) == ("account.move.line", "parent_state")
+        assert candidate.calls == 1010
+        assert candidate.saved_ms == pytest.approx(61000.0)
+
+    def test_time_is_shared_between_missing_columns(self):
+        sql = 'SELECT id FROM "t" WHERE "t"."a" = $1 AND "t"."b" = $2'
+        candidates = indexadvisor.advise([Statement(sql, 1, 100.0)], {}, {"t": 10**6}, {})
+
+        assert [candidate.saved_ms for candidate in candidates] == [50.0, 50.0]
+
+    def test_report(self, capsys):
+        candidates = indexadvisor.advise(
+            [Statement(ODOO_SEARCH, 1000, 60000.0)],
+            {},
+            {"account_move_line": 10**6, "res_partner": 10**6},
+            {("res_partner", "name"): ("res.partner", "name")},
+        )
+
+        indexadvisor.print_report(candidates)
+
+        output = capsys.readouterr().out
+        assert "res.partner.name: index='trigram'" in output
+        assert "- (not a model field)" in output
+
+
+@pytest.mark.unit
+class TestSqlLog:
+    """Test reading statements from captured SQL"""
+
+    def test_sql_report_json(self, tmp_path):
+        report = tmp_path / "sql.json"
+        report.write_text(
+            json.dumps({"shapes": [{"shape": "SELECT ?", "count": 3, "total_ms": 1.5, "p95_ms": 1}]})
+        )
+
+        assert indexadvisor.from_sql_log(report) == [Statement("SELECT ?", 3, 1.5)]
+
+    def test_odoo_log(self, tmp_path):
+        log = tmp_path / "odoo.log"
+        log.write_text(
+            "2024-01-01 10:00:00,000 42 DEBUG db odoo.sql_db: [0.450 ms] query: "
+            'SELECT "res_partner".id FROM "res_partner" WHERE "res_partner"."ref" = \'A1\'\n'
+            "2024-01-01 10:00:00,001 42 DEBUG db odoo.sql_db: [0.550 ms] query: "
+            'SELECT "res_partner".id FROM "res_partner" WHERE "res_partner"."ref" = \'B2\'\n'
+        )
+
+        statements = indexadvisor.from_sql_log(log)
+
+        assert len(statements) == 1
+        assert statements[0].calls == 2
+        assert statements[0].total_ms == pytest.approx(1.0)
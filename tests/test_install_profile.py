@@ -0,0 +1,47 @@
+import pytest
+
+from run_odoo.install_profile import InstallProfiler
+
+LOG = """\
+2024-05-01 10:00:00,000 1 DEBUG db odoo.sql_db: [1.000 ms] query: SELECT 1
+2024-05-01 10:00:01,000 1 DEBUG db odoo.modules.loading: Loading module base (1/2)
+2024-05-01 10:00:01,100 1 DEBUG db odoo.sql_db: [2.500 ms] query: SELECT *
+FROM res_partner
+2024-05-01 10:00:01,200 1 DEBUG db odoo.sql_db: [0.500 ms] query: SELECT 2
+2024-05-01 10:00:02,000 1 DEBUG db odoo.modules.loading: Loading module sale (2/2)
+2024-05-01 10:00:02,500 1 DEBUG db odoo.sql_db: query: SELECT 3
+2024-05-01 10:00:05,000 1 INFO db odoo.modules.loading: Modules loaded.
+2024-05-01 10:00:05,100 1 INFO db odoo.service.server: HTTP service running
+"""
+
+
+@pytest.mark.unit
+class TestInstallProfiler:
+    """Test attributing install time and SQL queries to modules"""
+
+    def test_profiles(self, capsys):
+        profiler = InstallProfiler()
+        hidden = [profiler.line(line) for line in LOG.splitlines(keepends=True)]
+        profiler.finished(0)
+
+        profiles = {p.module: p for p in profiler.results()}
+        assert profiles["base"].wall_time == pytest.approx(1.0)
+        assert profiles["base"].query_count == 2
+        assert profiles["base"].sql_time_ms == pytest.approx(3.0)
+        assert profiles["base"].heaviest[0].sql in ("SELECT *\nFROM res_partner", "SELECT 2")
+        assert profiles["sale"].wall_time == pytest.approx(3.0)
+        assert profiles["sale"].query_count == 1
+        assert profiles["(startup)"].query_count == 1
+        # SQL lines, continuation included, are kept out of the terminal
+        assert hidden[:4] == [True, False, True, True]
+        assert hidden[-1] is False
+
+    def test_reports_once_modules_loaded(self, capsys):
+        profiler = InstallProfiler()
+        for line in LOG.splitlines(keepends=True):
+            profiler.line(line)
+
+        assert profiler.reported
+        out = capsys.readouterr().out
+        assert "Heaviest queries of base" in out
+        assert "SELECT * FROM res_partner" in out
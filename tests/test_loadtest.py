@@ -0,0 +1,125 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from run_odoo import loadtest
+
+
+class FakeOdooHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def _reply(self, status, body, headers=()):
+        self.send_response(status)
+        for name, value in headers:
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == "/missing":
+            self._reply(404, b"not found")
+        else:
+            self._reply(200, b"<html></html>")
+
+    def do_POST(self):
+        params = json.loads(self.rfile.read(int(self.headers["Content-Length"])))["params"]
+        if self.path == "/web/session/authenticate":
+            if params["password"] != "admin":
+                self._reply(200, json.dumps({"error": {"message": "Access Denied"}}).encode())
+                return
+            self._reply(200, b'{"result": {}}', [("Set-Cookie", "session_id=abc; Path=/")])
+        elif "session_id=abc" not in (self.headers["Cookie"] or ""):
+            self._reply(200, b'{"error": {"message": "Session expired"}}')
+        else:
+            self._reply(200, b'{"result": 42}')
+
+
+@pytest.fixture
+def fake_odoo():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeOdooHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server.server_address[1]
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.mark.unit
+class TestLoadMix:
+    """Test request mix definitions"""
+
+    def test_builtin_mix(self):
+        endpoints = loadtest.load_mix("rpc")
+
+        assert endpoints[0].path == "/web/dataset/call_kw/res.partner/search_read"
+        assert json.loads(endpoints[0].body)["params"]["model"] == "res.partner"
+
+    def test_mix_file(self, tmp_path):
+        mix_file = tmp_path / "mix.json"
+        mix_file.write_text(json.dumps([{"name": "home", "path": "/web", "weight": 2}]))
+
+        endpoints = loadtest.load_mix(str(mix_file))
+
+        assert endpoints == [loadtest.Endpoint("home", "/web", weight=2)]
+        assert endpoints[0].body is None
+
+    def test_unknown_mix(self):
+        with pytest.raises(ValueError, match="Unknown request mix"):
+            loadtest.load_mix("nope")
+
+
+@pytest.mark.unit
+class TestLoadGenerator:
+    """Test the asyncio load generator against a local HTTP server"""
+
+    def test_fixed_request_count(self, fake_odoo):
+        endpoints = [
+            loadtest.Endpoint("page", "/web/login"),
+            loadtest.call_kw("res.partner", "search_count", args=[[]]),
+            loadtest.Endpoint("missing", "/missing"),
+        ]
+        generator = loadtest.LoadGenerator(
+            "127.0.0.1", fake_odoo, endpoints, concurrency=3, db="test_db"
+        )
+
+        result = generator.run(requests=30, warmup=0)
+
+        assert result.requests == 30
+        assert result.endpoints["res.partner.search_count"].errors == 0
+        assert result.endpoints["missing"].latencies == []
+        summary = loadtest.summarize(result)
+        assert summary["endpoints"]["page"]["errors"] == 0
+        assert summary["endpoints"]["missing"]["errors"] > 0
+        assert summary["throughput"] > 0
+
+    def test_failed_login(self, fake_odoo):
+        generator = loadtest.LoadGenerator(
+            "127.0.0.1", fake_odoo, loadtest.MIXES["rpc"], db="test_db", password="wrong"
+        )
+
+        with pytest.raises(loadtest.HttpError, match="Could not log in"):
+            generator.run(requests=1, warmup=0)
+
+
+@pytest.mark.unit
+def test_print_log_profiles_report(capsys):
+    result = loadtest.LoadResult(
+        duration=2.0,
+        endpoints={
+            "a": loadtest.EndpointResult([0.010] * 3),
+            "b": loadtest.EndpointResult([0.030]),
+        },
+    )
+    summary = loadtest.summarize(result)
+    summary["log_bytes"] = 4096
+
+    loadtest.print_log_profiles_report({"bench": summary})
+
+    line = capsys.readouterr().out.splitlines()[-1]
+    assert line.split() == ["bench", "2.0", "15.0ms", "15.0ms", "4KB"]
@@ -0,0 +1,59 @@
+import pytest
+import subprocess
+from unittest.mock import patch
+
+from run_odoo import matrix
+from run_odoo.runner import Runner
+
+
+@pytest.mark.unit
+class TestVersionParsing:
+    """Test parsing of the --versions option"""
+
+    def test_parse_versions(self):
+        assert matrix.parse_versions("16.0, 17.0,18.0") == [16.0, 17.0, 18.0]
+
+    def test_parse_versions_unsupported(self):
+        with pytest.raises(ValueError, match="Unsupported Odoo version"):
+            matrix.parse_versions("16.0,99.0")
+
+    def test_parse_versions_invalid(self):
+        with pytest.raises(ValueError, match="Invalid Odoo version"):
+            matrix.parse_versions("latest")
+
+
+@pytest.mark.unit
+@pytest.mark.subprocess
+class TestRunTestMatrix:
+    """Test running a module's tests on several versions"""
+
+    def test_versions_are_isolated(self, prepared_env):
+        """Test each version gets its own database, port, data dir and log"""
+        def fake_run_tests(self):
+            if self.version == 17.0:
+                raise subprocess.CalledProcessError(1, "odoo-bin")
+            self.logfile.write_text("INFO odoo.tests.result: 0 failed, 0 error(s) of 12 tests\n")
+
+        with patch.object(Runner, "run_tests", fake_run_tests):
+            results = matrix.run_test_matrix(
+                addons=["sale"], versions=[16.0, 17.0], work_dir=prepared_env
+            )
+
+        assert [r.version for r in results] == [16.0, 17.0]
+        assert [r.success for r in results] == [True, False]
+        assert results[0].summary == "0 failed, 0 error(s) of 12 tests"
+        assert {r.db for r in results} == {"v16c_sale_matrix", "v17c_sale_matrix"}
+        assert results[0].logfile != results[1].logfile
+
+    def test_print_matrix_report(self, tmp_path, capsys):
+        results = [
+            matrix.MatrixResult(16.0, "db16", tmp_path / "16.log", True, 12.5, "0 failed"),
+            matrix.MatrixResult(17.0, "db17", tmp_path / "17.log", False, 3.0),
+        ]
+
+        matrix.print_matrix_report(results)
+
+        out = capsys.readouterr().out
+        assert "12.5s" in out
+        assert "FAILED" in out
+        assert "17.log" in out
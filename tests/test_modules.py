@@ -0,0 +1,30 @@
+import pytest
+
+from run_odoo import modules
+
+
+@pytest.mark.unit
+class TestModuleDiscovery:
+    """Test finding installable modules in addons paths"""
+
+    def test_find_modules(self, tmp_path):
+        first, second = tmp_path / "first", tmp_path / "second"
+        for path, name, manifest in [
+            (first, "sale", "{'name': 'Sales'}"),
+            (first, "old", "{'name': 'Old', 'installable': False}"),
+            (second, "sale", "{'name': 'Other Sales'}"),
+            (second, "stock", "{'name': 'Inventory'}"),
+        ]:
+            (path / name).mkdir(parents=True)
+            (path / name / "__manifest__.py").write_text(manifest)
+        (second / "not_a_module").mkdir()
+
+        found = modules.find_modules([first, second, tmp_path / "missing"])
+
+        assert found == {"sale": first / "sale", "stock": second / "stock"}
+
+    def test_read_manifest_invalid(self, tmp_path, capsys):
+        (tmp_path / "__manifest__.py").write_text("{'name': ")
+
+        assert modules.read_manifest(tmp_path) is None
+        assert "Could not parse" in capsys.readouterr().out
@@ -0,0 +1,38 @@
+import pytest
+
+from run_odoo import odoo_log
+
+LOG = """\
+2024-05-01 10:00:00,000 123 INFO db odoo.modules.loading: loading 3 modules...
+2024-05-01 10:00:01,000 123 DEBUG db odoo.modules.loading: Loading module base (1/3)
+2024-05-01 10:00:03,500 123 DEBUG db odoo.modules.loading: Loading module sale (2/3)
+2024-05-01 10:00:04,000 123 ERROR db odoo.sql_db: bad query: SELECT 1
+Traceback (most recent call last):
+2024-05-01 10:00:05,000 123 DEBUG db odoo.modules.loading: Loading module stock (3/3)
+2024-05-01 10:00:09,000 123 INFO db odoo.modules.loading: Modules loaded.
+""".splitlines()
+
+
+@pytest.mark.unit
+class TestLogParsing:
+    """Test parsing of Odoo log lines"""
+
+    def test_parse_line(self):
+        record = odoo_log.parse_line(LOG[1])
+
+        assert record.pid == 123
+        assert record.level == "DEBUG"
+        assert record.db == "db"
+        assert record.logger == "odoo.modules.loading"
+        assert record.message == "Loading module base (1/3)"
+
+    def test_parse_continuation_line(self):
+        assert odoo_log.parse_line("Traceback (most recent call last):") is None
+
+    def test_module_loads(self):
+        loads = odoo_log.module_loads(odoo_log.parse_lines(LOG))
+
+        assert loads["base"].duration == pytest.approx(2.5)
+        assert loads["sale"].duration == pytest.approx(1.5)
+        assert loads["sale"].errors == 1
+        assert loads["stock"].duration == pytest.approx(4.0)
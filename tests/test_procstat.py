@@ -0,0 +1,86 @@
+import subprocess
+import sys
+
+import pytest
+
+from run_odoo import procstat
+
+STATUS = """\
+Name:\tpython3
+Threads:\t4
+VmSize:\t 1048576 kB
+VmRSS:\t  204800 kB
+"""
+STAT = "1234 (odoo-bin: worker) S 1 1234 1234 0 -1 4194560 100 0 0 0 250 50 0 0 20 0 4 0\n"
+SMAPS_ROLLUP = """\
+Rss:              204800 kB
+Private_Clean:      1024 kB
+Private_Dirty:    100000 kB
+"""
+
+
+@pytest.mark.unit
+class TestProcStat:
+    """Test sampling process memory and CPU from /proc"""
+
+    def test_read_sample(self, tmp_path):
+        proc_dir = tmp_path / "1234"
+        proc_dir.mkdir()
+        (proc_dir / "status").write_text(STATUS)
+        (proc_dir / "stat").write_text(STAT)
+        (proc_dir / "smaps_rollup").write_text(SMAPS_ROLLUP)
+
+        sample = procstat.read_sample(1234, "worker", proc_root=tmp_path)
+
+        assert sample.rss_kb == 204800
+        assert sample.vms_kb == 1048576
+        assert sample.uss_kb == 101024
+        assert sample.threads == 4
+        assert sample.cpu_seconds == pytest.approx(300 / procstat.CLOCK_TICKS)
+
+    def test_read_sample_exited(self, tmp_path):
+        assert procstat.read_sample(1234, "worker", proc_root=tmp_path) is None
+
+    def test_summarize(self):
+        samples = [
+            procstat.ProcSample(1.0, 10, "main", 100, 50, 1.0, 2),
+            procstat.ProcSample(1.0, 11, "worker", 200, 150, 0.5, 4),
+            procstat.ProcSample(2.0, 11, "worker", 400, 350, 1.5, 6),
+        ]
+
+        summaries = procstat.summarize(samples)
+
+        worker = summaries[1]
+        assert worker.pid == 11
+        assert worker.peak_rss_kb == 400
+        assert worker.avg_rss_kb == 300
+        assert worker.cpu_seconds == 1.5
+        assert worker.max_threads == 6
+        assert worker.last_seen - worker.first_seen == 1.0
+
+    def test_sampler_observer(self, tmp_path, capsys):
+        output = tmp_path / "samples.csv"
+        sampler = procstat.ProcessSampler(output=output, interval=0.05)
+        proc = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(0.3)"])
+
+        sampler.started(proc)
+        proc.wait()
+        sampler.finished(proc.returncode)
+
+        assert sampler.samples
+        assert sampler.samples[0].role == "main"
+        lines = output.read_text().splitlines()
+        assert lines[0] == ",".join(procstat.CSV_FIELDS)
+        assert len(lines) > 1
+        assert "main" in capsys.readouterr().out
+
+    def test_limit_hint_uses_virtual_size(self, capsys):
+        samples = [
+            procstat.ProcSample(1.0, 11, "worker", 200 * 1024, 150, 0.5, 4, vms_kb=900 * 1024),
+        ]
+
+        procstat.print_report(procstat.summarize(samples))
+
+        output = capsys.readouterr().out
+        assert "highest worker peak virtual size 900MB" in output
+        assert "RSS 200MB" not in output
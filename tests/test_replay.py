@@ -0,0 +1,69 @@
+import json
+
+import pytest
+
+from run_odoo import replay
+from run_odoo.loadtest import EndpointResult, LoadResult, summarize
+
+CALLS = """\
+{"model":"res.partner","method":"search_read","args":[],"kwargs":{"limit":80},"time":105.0,"session":"b"}
+{"model":"res.partner","method":"read","args":[[1]],"kwargs":{},"time":100.0,"session":"a"}
+
+{"model":"sale.order","method":"action_confirm","args":[[7]],"kwargs":{},"time":101.5,"session":"a"}
+{"model":"res.users","method":"search","args":[[]],"kwargs":{},"time":102.0,"session":null}
+"""
+
+
+def report(latencies_ms, errors=0):
+    result = LoadResult(
+        duration=1.0,
+        endpoints={
+            name: EndpointResult([ms / 1000 for ms in values], errors)
+            for name, values in latencies_ms.items()
+        },
+    )
+    return json.loads(json.dumps(summarize(result)))
+
+
+@pytest.mark.unit
+class TestReplay:
+    """Test reading recorded calls and comparing runs"""
+
+    def test_read_calls(self):
+        calls = replay.read_calls(CALLS.splitlines())
+
+        assert [call.time for call in calls] == [100.0, 101.5, 102.0, 105.0]
+        assert calls[0].name == "res.partner.read"
+        endpoint = calls[-1].endpoint
+        assert endpoint.path == "/web/dataset/call_kw/res.partner/search_read"
+        assert json.loads(endpoint.body)["params"]["kwargs"] == {"limit": 80}
+
+    def test_assign_sessions(self):
+        calls = replay.read_calls(CALLS.splitlines())
+
+        queues = replay.assign_sessions(calls, 2)
+
+        # Both calls of session "a" stay in one replay session, in order
+        assert [call.name for call in queues[0] if call.session == "a"] == [
+            "res.partner.read",
+            "sale.order.action_confirm",
+        ]
+        assert [call.session for call in queues[1]] == ["b"]
+        assert sum(len(queue) for queue in queues) == 4
+
+    def test_compare(self, capsys):
+        baseline = report({"res.partner.read": [10, 10, 10], "res.users.search": [5, 5]})
+        candidate = report(
+            {"res.partner.read": [10, 10, 20], "res.users.search": [5, 5], "new.call": [1]}
+        )
+
+        comparisons = replay.compare(baseline, candidate)
+        regressions = replay.print_comparison(comparisons, baseline, candidate, tolerance=10)
+
+        assert [comparison.name for comparison in comparisons] == [
+            "res.partner.read",
+            "res.users.search",
+        ]
+        assert comparisons[0].p95_change == pytest.approx(90.0)
+        assert regressions == comparisons[:1]
+        assert "slower" in capsys.readouterr().out
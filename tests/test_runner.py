@@ -5,7 +5,7 @@ import tempfile
 import os
 import subprocess
 
-from run_odoo.runner import Runner, PYTHON_VERSIONS, ODOO_URL, ENT_ODOO_URL
+from run_odoo.runner import Runner, PYTHON_VERSIONS, ODOO_URL, ENT_ODOO_URL, _merge_log_handlers
 
 
 @pytest.fixture
@@ -123,8 +123,8 @@ class TestRunnerEnvironmentSetup:
         
         # Verify directories were created
         mock_mkdir.assert_called()
-        mock_chdir.assert_called()
         mock_subprocess.assert_called()
+        assert mock_subprocess.call_args_list[0][1]["cwd"] == Path('/tmp/run_odoo/16.0')
         
         # Verify git clone was called with correct parameters
         clone_call = mock_subprocess.call_args_list[0]
@@ -198,6 +198,37 @@ class TestRunnerEnvironmentSetup:
         # Should not create new virtual environment
         mock_check_call.assert_not_called()
 
+    @patch.object(Runner, '_install_python_dependencies')
+    @patch('run_odoo.runner.utils')
+    @patch('run_odoo.runner.subprocess.check_call')
+    def test_setup_virtual_environment_in_parallel(
+        self, mock_check_call, mock_utils, mock_dependencies, prepared_env
+    ):
+        """Test versions sharing a Python install it only once"""
+        import threading
+        import time
+
+        installed = []
+
+        def fake_run(cmd, **kwargs):
+            if cmd[:2] == ["pyenv", "install"]:
+                time.sleep(0.05)
+                installed.append(cmd[2])
+            return MagicMock(stdout="\n".join(installed))
+
+        runners = [Runner(version=17.0), Runner(version=18.0)]
+        assert PYTHON_VERSIONS[17.0] == PYTHON_VERSIONS[18.0]
+        with patch('run_odoo.runner.subprocess.run', side_effect=fake_run):
+            threads = [
+                threading.Thread(target=runner._setup_virtual_environment) for runner in runners
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        assert installed == [PYTHON_VERSIONS[17.0]]
+
     @patch('run_odoo.runner.subprocess.run')
     def test_install_python_dependencies(self, mock_subprocess, mock_paths):
         """Test installing Python dependencies"""
@@ -453,6 +484,68 @@ class TestRunnerExecution:
         assert "--stop-after-init" in cmd
         assert "--no-http" in cmd
 
+    @patch('run_odoo.runner.pg.vacuum_analyze')
+    @patch.object(Runner, '_execute')
+    def test_upgrade_modules_vacuum_analyze(self, mock_execute, mock_vacuum, prepared_env):
+        """Test statistics are refreshed after the upgrade when asked"""
+        Runner(version=16.0, db="test_db", addons=["test_module"]).upgrade_modules()
+        mock_vacuum.assert_not_called()
+
+        Runner(
+            version=16.0, db="test_db", addons=["test_module"], vacuum_analyze=True
+        ).upgrade_modules()
+        mock_vacuum.assert_called_once()
+        assert mock_vacuum.call_args[0][0] == "test_db"
+
+    @patch('run_odoo.runner.pg')
+    @patch.object(Runner, '_execute')
+    def test_upgrade_modules_snapshot(self, mock_execute, mock_pg, prepared_env):
+        """Test the snapshot is dropped after a successful upgrade"""
+        mock_pg.snapshot_database.return_value = "reflink"
+
+        Runner(version=16.0, db="prod", addons=["sale"]).upgrade_modules(snapshot=True)
+
+        mock_pg.snapshot_database.assert_called_once()
+        assert mock_pg.snapshot_database.call_args[0][:2] == ("prod", "prod_snapshot")
+        mock_pg.restore_snapshot.assert_not_called()
+        assert mock_pg.drop_database.call_args[0][0] == "prod_snapshot"
+
+    @patch('run_odoo.runner.pg')
+    @patch.object(Runner, '_execute')
+    def test_upgrade_modules_snapshot_restored_on_failure(
+        self, mock_execute, mock_pg, prepared_env
+    ):
+        """Test a failed upgrade swaps the snapshot back"""
+        mock_execute.side_effect = subprocess.CalledProcessError(1, ["odoo-bin"])
+
+        with pytest.raises(subprocess.CalledProcessError):
+            Runner(version=16.0, db="prod", addons=["sale"]).upgrade_modules(snapshot=True)
+
+        assert mock_pg.restore_snapshot.call_args[0][:2] == ("prod", "prod_snapshot")
+
+    @patch('run_odoo.runner.pg')
+    @patch.object(Runner, '_execute')
+    def test_upgrade_modules_rehearse(self, mock_execute, mock_pg, prepared_env):
+        """Test rehearsing puts the snapshot back after a successful upgrade"""
+        Runner(version=16.0, db="prod", addons=["sale"]).upgrade_modules(rehearse=True)
+
+        mock_execute.assert_called_once()
+        mock_pg.restore_snapshot.assert_called_once()
+
+    @patch('run_odoo.runner.pg.vacuum_analyze')
+    @patch.object(Runner, '_execute')
+    def test_run_vacuum_failure_is_not_an_odoo_failure(
+        self, mock_execute, mock_vacuum, prepared_env, capsys
+    ):
+        """Test a vacuumdb failure is not reported as Odoo failing"""
+        mock_vacuum.side_effect = subprocess.CalledProcessError(1, ["vacuumdb"])
+        runner = Runner(version=16.0, addons=["sale"], vacuum_analyze=True, stop_after_init=True)
+
+        with pytest.raises(subprocess.CalledProcessError):
+            runner.run()
+
+        assert "Error running Odoo" not in capsys.readouterr().out
+
     def test_upgrade_modules_no_addons(self, mock_paths):
         """Test upgrade_modules without addons"""
         runner = Runner(version=16.0)
@@ -590,4 +683,302 @@ class TestRunnerIntegration:
             assert "--http-interface" in options
             assert "127.0.0.1" in options
             assert "--dev=all" in options
-            assert "--test-enable" in options 
\ No newline at end of file
+            assert "--test-enable" in options 
+
+
+@pytest.mark.runner
+@pytest.mark.unit
+@pytest.mark.subprocess
+class TestRunnerTemplateTests:
+    """Test running tests against copies of a template database"""
+
+    @patch('run_odoo.runner.pg')
+    @patch('run_odoo.runner.subprocess.run')
+    def test_run_tests_creates_template(self, mock_subprocess, mock_pg, prepared_env):
+        """Test the template is installed once, then tests run on a copy"""
+        mock_pg.database_exists.return_value = False
+
+        runner = Runner(version=17.0, addons=["sale", "purchase"])
+        runner.run_tests(reuse_db=True)
+
+        template = runner._template_db_name()
+        install_cmd = mock_subprocess.call_args_list[0][0][0]
+        assert install_cmd[install_cmd.index("-d") + 1] == f"{template}_build"
+        assert mock_pg.rename_database.call_args[0][:2] == (f"{template}_build", template)
+        assert "--test-enable" not in install_cmd
+        mock_pg.clone_database.assert_called_once()
+        assert mock_pg.clone_database.call_args[0][:2] == (template, f"{template}_run")
+
+        test_cmd = mock_subprocess.call_args_list[1][0][0]
+        assert "-i" not in test_cmd
+        assert test_cmd[test_cmd.index("--test-tags") + 1] == "/sale,/purchase"
+        assert "--test-enable" in test_cmd
+
+    @patch('run_odoo.runner.pg')
+    @patch('run_odoo.runner.subprocess.run')
+    def test_failed_install_leaves_no_template(self, mock_subprocess, mock_pg, prepared_env):
+        """Test the template only gets its name once the install succeeded"""
+        mock_pg.database_exists.return_value = False
+        mock_subprocess.side_effect = subprocess.CalledProcessError(1, ["odoo-bin"])
+
+        runner = Runner(version=17.0, addons=["sale"])
+        with pytest.raises(subprocess.CalledProcessError):
+            runner.run_tests(reuse_db=True)
+
+        mock_pg.rename_database.assert_not_called()
+        mock_pg.clone_database.assert_not_called()
+
+    @patch('run_odoo.runner.pg')
+    @patch('run_odoo.runner.subprocess.run')
+    def test_run_tests_reuses_template(self, mock_subprocess, mock_pg, prepared_env):
+        """Test an existing template is not reinstalled and changed modules are updated"""
+        mock_pg.database_exists.return_value = True
+
+        runner = Runner(version=17.0, addons=["sale"])
+        runner.run_tests(reuse_db=True, update_modules=["sale"])
+
+        mock_subprocess.assert_called_once()
+        test_cmd = mock_subprocess.call_args[0][0]
+        assert test_cmd[test_cmd.index("-u") + 1] == "sale"
+
+    @patch('run_odoo.runner.pg')
+    @patch('run_odoo.runner.subprocess.run')
+    def test_user_database_left_alone(self, mock_subprocess, mock_pg, prepared_env):
+        """Test the tests never run on, nor drop, the database given with --db"""
+        mock_pg.database_exists.return_value = True
+
+        runner = Runner(version=17.0, addons=["sale"], db="client_db")
+        runner.run_tests(reuse_db=True)
+
+        dropped = [call[0][0] for call in mock_pg.drop_database.call_args_list]
+        cloned = [call[0][1] for call in mock_pg.clone_database.call_args_list]
+        assert "client_db" not in dropped + cloned
+        test_cmd = mock_subprocess.call_args[0][0]
+        assert test_cmd[test_cmd.index("-d") + 1] == f"{runner._template_db_name()}_run"
+
+    def test_template_name_ignores_module_order(self, prepared_env):
+        """Test the template is shared by the same module set"""
+        first = Runner(version=17.0, addons=["sale", "stock"])
+        second = Runner(version=17.0, addons=["stock", "sale"], db="other")
+
+        assert first._template_db_name() == second._template_db_name()
+
+
+@pytest.mark.runner
+@pytest.mark.unit
+@pytest.mark.subprocess
+class TestRunnerCoverage:
+    """Test running tests under coverage"""
+
+    @pytest.fixture
+    def addons_dir(self, prepared_env):
+        addons = prepared_env / "17.0" / "odoo" / "addons"
+        (addons / "sale").mkdir(parents=True)
+        (addons / "sale" / "__manifest__.py").write_text("{'name': 'Sales'}")
+        return addons
+
+    @patch('run_odoo.runner.subprocess.run')
+    def test_run_tests_with_coverage(self, mock_subprocess, addons_dir):
+        """Test odoo-bin runs under coverage scoped to the tested module"""
+        mock_subprocess.return_value = MagicMock(returncode=0)
+
+        runner = Runner(version=17.0, addons=["sale"], coverage=True)
+        runner.run_tests()
+
+        commands = [call[0][0] for call in mock_subprocess.call_args_list]
+        test_cmd = next(cmd for cmd in commands if "--test-enable" in cmd)
+        assert test_cmd[:5] == ["python", "-m", "coverage", "run", "--parallel-mode"]
+        assert test_cmd[5] == f"--source={addons_dir / 'sale'}"
+        assert "odoo-bin" in test_cmd[6]
+        assert ["python", "-m", "coverage", "combine", "--append"] in commands
+        env = mock_subprocess.call_args_list[-1][1]["env"]
+        assert env["COVERAGE_FILE"] == str(runner._coverage_dir() / ".coverage")
+
+    @patch('run_odoo.runner.subprocess.run')
+    def test_coverage_report_after_failure(self, mock_subprocess, addons_dir):
+        """Test data is combined even when tests fail"""
+        def fake_run(cmd, **kwargs):
+            if "--test-enable" in cmd:
+                raise subprocess.CalledProcessError(1, cmd)
+            return MagicMock(returncode=0)
+
+        mock_subprocess.side_effect = fake_run
+
+        runner = Runner(version=17.0, addons=["sale"], coverage=True)
+        with pytest.raises(subprocess.CalledProcessError):
+            runner.run_tests()
+
+        commands = [call[0][0] for call in mock_subprocess.call_args_list]
+        assert ["python", "-m", "coverage", "combine", "--append"] in commands
+
+
+@pytest.mark.runner
+@pytest.mark.unit
+@pytest.mark.subprocess
+class TestRunnerObservers:
+    """Test streaming Odoo output through observers"""
+
+    def test_observer_log_handlers(self, prepared_env):
+        """Test observers add the log handlers they need"""
+        from run_odoo.install_profile import InstallProfiler
+
+        runner = Runner(version=17.0, addons=["sale"], observers=[InstallProfiler()])
+        options = runner._prepare_params()
+
+        handlers = [options[i + 1] for i, opt in enumerate(options) if opt == "--log-handler"]
+        assert "odoo.modules.loading:DEBUG" in handlers
+        assert "odoo.sql_db:DEBUG" in handlers
+
+    def test_execute_streams_lines(self, prepared_env, capsys):
+        """Test lines reach observers and hidden ones are not printed"""
+        from run_odoo.observers import RunObserver
+
+        class Recorder(RunObserver):
+            def __init__(self):
+                self.lines, self.returncode = [], None
+
+            def line(self, line):
+                self.lines.append(line)
+                return line.startswith("hide")
+
+            def finished(self, returncode):
+                self.returncode = returncode
+
+        recorder = Recorder()
+        runner = Runner(version=17.0, observers=[recorder])
+        runner._execute(["python3", "-c", "print('show me'); print('hide me')"])
+
+        assert recorder.lines == ["show me\n", "hide me\n"]
+        assert recorder.returncode == 0
+        out = capsys.readouterr().out
+        assert "show me" in out
+        assert "hide me" not in out
+
+
+@pytest.mark.runner
+@pytest.mark.unit
+class TestRunnerTimings:
+    """Test startup phase timing"""
+
+    @patch.object(Runner, '_setup_virtual_environment')
+    @patch.object(Runner, '_setup_enterprise_source')
+    @patch.object(Runner, '_setup_odoo_source')
+    def test_timings_marks_env_phases(self, mock_odoo, mock_enterprise, mock_venv, tmp_path):
+        with patch('run_odoo.runner.user_config_path', return_value=tmp_path):
+            runner = Runner(version=17.0, timings=True)
+
+        assert runner.timer in runner.observers
+        assert [label for label, _ in runner.timer.marks] == [
+            "odoo source ready",
+            "enterprise source ready",
+            "virtualenv ready",
+        ]
+
+    @patch('run_odoo.runner.utils.wait_for_port', return_value=True)
+    @patch.object(Runner, 'start')
+    @patch.object(Runner, '_setup_virtual_environment')
+    @patch.object(Runner, '_setup_enterprise_source')
+    @patch.object(Runner, '_setup_odoo_source')
+    def test_timings_when_serving(
+        self, mock_odoo, mock_enterprise, mock_venv, mock_start, mock_wait, tmp_path, capsys
+    ):
+        """Test commands serving Odoo in the background report when the port opened"""
+        mock_start.return_value.wait.return_value = 0
+        with patch('run_odoo.runner.user_config_path', return_value=tmp_path):
+            runner = Runner(version=17.0, timings=True)
+
+        with runner.serving():
+            pass
+
+        labels = [label for label, _ in runner.timer.marks]
+        assert labels[-2:] == ["odoo-bin spawned", "HTTP port accepting connections"]
+        assert runner.timer.reported
+        assert "HTTP port accepting connections" in capsys.readouterr().out
+
+    def test_merge_log_handlers(self):
+        """Test the most verbose level wins when observers ask for the same logger"""
+        merged = _merge_log_handlers(
+            ["odoo.modules.loading:DEBUG", "odoo.modules.loading:INFO", ":WARNING"]
+        )
+
+        assert merged == ["odoo.modules.loading:DEBUG", ":WARNING"]
+
+
+@pytest.mark.runner
+@pytest.mark.unit
+class TestRunnerPythonOptions:
+    """Test observers requesting interpreter options"""
+
+    def test_build_command_with_importtime(self, prepared_env):
+        from run_odoo.importtime import ImportTimeProfiler
+
+        runner = Runner(version=17.0, observers=[ImportTimeProfiler()])
+        cmd = runner._build_command(["-d", "test_db"])
+
+        assert cmd[:3] == ["python", "-X", "importtime"]
+        assert cmd[3].endswith("odoo-bin")
+
+
+@pytest.mark.runner
+@pytest.mark.unit
+class TestRunnerTrace:
+    """Test loading the request tracing addon"""
+
+    def test_trace_disabled(self, prepared_env):
+        runner = Runner(version=17.0)
+        options = runner._prepare_params()
+
+        assert options[options.index("--load") + 1] == "web,base"
+        assert "RUN_ODOO_TRACE_LOG" not in runner._get_venv_env()
+
+    def test_trace_enabled(self, prepared_env):
+        from run_odoo.runner import ADDONS_DIR
+
+        runner = Runner(version=17.0, db="test_db", trace=True)
+        options = runner._prepare_params()
+
+        assert options[options.index("--load") + 1] == "web,base,run_odoo_trace"
+        assert str(ADDONS_DIR) in options[options.index("--addons-path") + 1]
+        assert (ADDONS_DIR / "run_odoo_trace" / "__manifest__.py").exists()
+        env = runner._get_venv_env()
+        assert env["RUN_ODOO_TRACE_LOG"].endswith("trace/test_db.jsonl")
+        assert env["RUN_ODOO_TRACE_TOKEN"] == runner.trace_token
+        assert runner.trace_token != Runner(version=17.0, trace=True).trace_token
+
+
+@pytest.mark.runner
+@pytest.mark.unit
+class TestRunnerLogProfiles:
+    """Test logging profiles and the default log handlers"""
+
+    @staticmethod
+    def _handlers(options):
+        return [options[i + 1] for i, opt in enumerate(options) if opt == "--log-handler"]
+
+    def test_default_honors_log_level(self, prepared_env):
+        runner = Runner(version=17.0, log_level="warn")
+        options = runner._prepare_params()
+
+        assert options[options.index("--log-level") + 1] == "warn"
+        assert self._handlers(options) == ["py.warnings:INFO"]
+
+    def test_debug_sql_profile(self, prepared_env):
+        runner = Runner(version=17.0, log_profile="debug-sql")
+        options = runner._prepare_params()
+
+        assert options[options.index("--log-level") + 1] == "info"
+        assert self._handlers(options) == ["py.warnings:INFO", "odoo.sql_db:DEBUG"]
+
+    def test_observer_handlers_win_over_profile(self, prepared_env):
+        from run_odoo.install_profile import InstallProfiler
+
+        runner = Runner(version=17.0, log_profile="bench", observers=[InstallProfiler()])
+        options = runner._prepare_params()
+
+        assert options[options.index("--log-level") + 1] == "error"
+        assert "odoo.sql_db:DEBUG" in self._handlers(options)
+        assert ":DEBUG" not in self._handlers(options)
+
+    def test_unknown_profile(self, prepared_env):
+        with pytest.raises(ValueError, match="Unknown log profile"):
+            Runner(version=17.0, log_profile="verbose")
@@ -0,0 +1,79 @@
+from collections import Counter
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import pytest
+
+from run_odoo import sampling
+
+COLLAPSED = """\
+<module> (odoo-bin);main (odoo/cli/command.py);run (odoo/service/server.py) 5
+<module> (odoo-bin);main (odoo/cli/command.py);execute (odoo/sql_db.py) 3
+<module> (odoo-bin);fib (x.py);fib (x.py) 2
+
+"""
+
+
+@pytest.mark.unit
+class TestSampling:
+    """Test collapsed stack parsing and conversion"""
+
+    def test_read_collapsed(self):
+        stacks = sampling.read_collapsed(COLLAPSED.splitlines(keepends=True))
+
+        assert sum(stacks.values()) == 10
+        assert stacks["<module> (odoo-bin);fib (x.py);fib (x.py)"] == 2
+
+    def test_top_functions(self):
+        stacks = sampling.read_collapsed(COLLAPSED.splitlines())
+
+        top = sampling.top_functions(stacks)
+
+        assert top[0] == ("run (odoo/service/server.py)", 5, 5)
+        assert ("fib (x.py)", 2, 2) in top
+        assert len(top) == 3
+
+    def test_to_speedscope(self):
+        stacks = Counter({"a;b": 3, "a;c": 1})
+
+        result = sampling.to_speedscope(stacks, "main 1")
+
+        frames = [frame["name"] for frame in result["shared"]["frames"]]
+        assert frames == ["a", "b", "c"]
+        profile = result["profiles"][0]
+        assert profile["samples"] == [[0, 1], [0, 2]]
+        assert profile["weights"] == [3, 1]
+        assert profile["endValue"] == 4
+
+    def test_process_role(self):
+        assert sampling.process_role(123, 123) == "main"
+        assert sampling.process_role(-1, 123) == "worker"
+
+    def test_sample_processes_picks_up_late_workers(self, tmp_path, monkeypatch):
+        clock = [0.0]
+
+        def sleep(seconds):
+            clock[0] += seconds
+
+        monkeypatch.setattr(sampling.time, "monotonic", lambda: clock[0])
+        monkeypatch.setattr(sampling.time, "sleep", sleep)
+        # No worker yet when the port opens, then one, then a recycled one
+        children = iter([[], [11], [11], [12]])
+        monkeypatch.setattr(sampling.utils, "child_pids", lambda pid: next(children, [12]))
+        started = []
+
+        def popen(cmd, **kwargs):
+            started.append((int(cmd[cmd.index("--pid") + 1]), cmd[cmd.index("--duration") + 1]))
+            output = Path(cmd[cmd.index("--output") + 1])
+            output.write_text("a;b 1\n")
+            proc = MagicMock(returncode=0)
+            proc.communicate.return_value = ("", "")
+            return proc
+
+        monkeypatch.setattr(sampling.subprocess, "Popen", popen)
+
+        results = sampling.sample_processes(Path("py-spy"), 10, 5, tmp_path)
+
+        assert started == [(10, "5"), (11, "4"), (12, "2")]
+        assert [sampled.role for sampled in results] == ["main", "worker", "worker"]
+        assert all(sampled.stacks for sampled in results)
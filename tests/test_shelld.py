@@ -0,0 +1,297 @@
+import contextlib
+import io
+import json
+import os
+import socketserver
+import threading
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import pytest
+
+from run_odoo import shelld
+from run_odoo.runner import EXEC_BATCH_SCRIPT, EXEC_LOOP_SCRIPT, SHELL_DAEMON_SCRIPT, Runner
+
+
+class FakeDaemon(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Speaks the shell daemon protocol, running code in this process"""
+
+    daemon_threads = True
+
+    def __init__(self, path):
+        self.actions = []
+        self.savepoints = []
+        self.stale = False
+        super().__init__(str(path), self.Handler)
+
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            namespace = {}
+            for line in self.rfile:
+                request = json.loads(line)
+                self.server.actions.append(request["action"])
+                self.server.savepoints.append(request.get("savepoint"))
+                response = {}
+                if request["action"] == "exec":
+                    output = io.StringIO()
+                    error = None
+                    with contextlib.redirect_stdout(output):
+                        try:
+                            exec(compile(request["code"], request["filename"], request["mode"]), namespace)
+                        except Exception as e:
+                            error = f"Traceback\n{e!r}\n"
+                    response = {"output": output.getvalue(), "error": error, "duration": 0.01}
+                elif request["action"] == "ping":
+                    response = {"stale": self.server.stale}
+                elif request["action"] == "stop":
+                    # What the real daemon does on its way out
+                    os.unlink(self.server.server_address)
+                self.wfile.write(json.dumps(response).encode() + b"\n")
+
+
+@pytest.fixture
+def daemon(tmp_path):
+    server = FakeDaemon(tmp_path / "db.sock")
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.mark.unit
+class TestShellConnection:
+    """Test talking to a shell daemon"""
+
+    def test_not_running(self, tmp_path):
+        assert not shelld.is_running(tmp_path / "missing.sock")
+        assert not shelld.stop_daemon(tmp_path / "missing.sock")
+
+    def test_running(self, daemon):
+        assert shelld.is_running(daemon.server_address)
+
+    def test_running_daemon_is_reused(self, daemon):
+        runner = MagicMock()
+        runner.shell_socket.return_value = Path(daemon.server_address)
+
+        assert shelld.ensure_daemon(runner) == Path(daemon.server_address)
+        runner.start_shell_daemon.assert_not_called()
+
+    def test_stale_daemon_is_restarted(self, daemon):
+        daemon.stale = True
+        runner = MagicMock()
+        runner.shell_socket.return_value = Path(daemon.server_address)
+        restarted = []
+
+        def start_shell_daemon():
+            server = FakeDaemon(daemon.server_address)
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+            restarted.append(server)
+            return MagicMock(**{"poll.return_value": None})
+
+        runner.start_shell_daemon.side_effect = start_shell_daemon
+        try:
+            path = shelld.ensure_daemon(runner, interval=0.01)
+
+            assert daemon.actions[-1] == "stop"
+            assert shelld.daemon_status(path) == {"stale": False}
+        finally:
+            for server in restarted:
+                server.shutdown()
+                server.server_close()
+
+    def test_namespace_is_kept_per_connection(self, daemon):
+        with shelld.ShellConnection(daemon.server_address) as connection:
+            connection.execute("answer = 42")
+            result = connection.execute("print(answer)")
+
+        assert result == {"output": "42\n", "error": None, "duration": 0.01}
+
+
+@pytest.mark.unit
+class TestRunScripts:
+    """Test running scripts in one transaction"""
+
+    def test_commit(self, daemon, tmp_path, capsys):
+        first = tmp_path / "first.py"
+        first.write_text("print('first ran')")
+        second = tmp_path / "second.py"
+        second.write_text("print('second ran')")
+
+        assert shelld.run_scripts(daemon.server_address, [first, second], commit=True)
+
+        assert daemon.actions == ["exec", "exec", "commit"]
+        assert daemon.savepoints == [True, True, None]
+        output = capsys.readouterr().out
+        assert "first ran" in output
+        assert f"<== {second} done in" in output
+
+    def test_rolled_back_by_default(self, daemon, tmp_path):
+        script = tmp_path / "script.py"
+        script.write_text("pass")
+
+        assert shelld.run_scripts(daemon.server_address, [script])
+        assert daemon.actions == ["exec", "rollback"]
+
+    def test_failure_stops_and_rolls_back(self, daemon, tmp_path, capsys):
+        failing = tmp_path / "failing.py"
+        failing.write_text("raise ValueError('bad data')")
+        never = tmp_path / "never.py"
+        never.write_text("pass")
+
+        assert not shelld.run_scripts(daemon.server_address, [failing, never], commit=True)
+
+        assert daemon.actions == ["exec", "rollback"]
+        assert "bad data" in capsys.readouterr().err
+
+    def test_keep_going_commits_the_others(self, daemon, tmp_path, capsys):
+        failing = tmp_path / "failing.py"
+        failing.write_text("raise ValueError('bad data')")
+        other = tmp_path / "other.py"
+        other.write_text("pass")
+
+        assert not shelld.run_scripts(
+            daemon.server_address, [failing, other], commit=True, keep_going=True
+        )
+
+        assert daemon.actions == ["exec", "exec", "commit"]
+        assert "without the changes of failed scripts" in capsys.readouterr().out
+
+
+@pytest.mark.unit
+class TestDaemonConsole:
+    """Test the interactive console"""
+
+    def test_incomplete_input_is_not_sent(self):
+        connection = MagicMock()
+        console = shelld.DaemonConsole(connection)
+
+        assert console.runsource("for i in range(3):") is True
+        connection.execute.assert_not_called()
+
+    def test_complete_input_is_sent(self):
+        connection = MagicMock()
+        connection.execute.return_value = {"output": "3\n", "error": None, "duration": 0}
+        console = shelld.DaemonConsole(connection)
+
+        assert console.runsource("1 + 2", "<console>") is False
+        connection.execute.assert_called_once_with("1 + 2", "<console>", "single")
+
+
+@pytest.mark.unit
+class TestDaemonStartup:
+    """Test starting the shell daemon"""
+
+    def test_start_shell_daemon(self, prepared_env, monkeypatch):
+        popen = MagicMock()
+        monkeypatch.setattr("run_odoo.runner.subprocess.Popen", popen)
+        runner = Runner(version=17.0, db="test_db", install_modules=False)
+
+        runner.start_shell_daemon()
+
+        cmd = popen.call_args.args[0]
+        assert cmd[cmd.index("shell") + 1] == "--no-http"
+        kwargs = popen.call_args.kwargs
+        assert kwargs["env"]["RUN_ODOO_SHELL_SOCKET"] == str(prepared_env / "shell" / "test_db.sock")
+        assert kwargs["start_new_session"]
+        popen.return_value.stdin.write.assert_called_once_with(SHELL_DAEMON_SCRIPT.read_bytes())
+
+    def test_daemon_exiting_is_reported(self, prepared_env, monkeypatch):
+        runner = Runner(version=17.0, db="test_db", install_modules=False)
+        proc = MagicMock()
+        proc.poll.return_value = 1
+        monkeypatch.setattr(runner, "start_shell_daemon", lambda: proc)
+
+        with pytest.raises(RuntimeError, match="test_db.log"):
+            shelld.ensure_daemon(runner)
+
+
+class FakeCursor:
+    def __init__(self):
+        self.events = []
+
+    @contextlib.contextmanager
+    def savepoint(self):
+        self.events.append("savepoint")
+        try:
+            yield
+        except Exception:
+            self.events.append("rollback to savepoint")
+            raise
+
+    def commit(self):
+        self.events.append("commit")
+
+    def rollback(self):
+        self.events.append("rollback")
+
+
+@pytest.mark.unit
+class TestExecBatch:
+    """Test the bootstrap running scripts in a one-off Odoo shell"""
+
+    @staticmethod
+    def _run(monkeypatch, scripts, commit=False, keep_going=False):
+        monkeypatch.setenv("RUN_ODOO_EXEC_SCRIPTS", json.dumps([str(script) for script in scripts]))
+        monkeypatch.setenv("RUN_ODOO_EXEC_COMMIT", "1" if commit else "")
+        monkeypatch.setenv("RUN_ODOO_EXEC_KEEP_GOING", "1" if keep_going else "")
+        cr = FakeCursor()
+        env = MagicMock(cr=cr)
+        source = EXEC_LOOP_SCRIPT.read_text() + "\n" + EXEC_BATCH_SCRIPT.read_text()
+        code = compile(source, str(EXEC_BATCH_SCRIPT), "exec")
+        try:
+            exec(code, {"env": env, "odoo": MagicMock()})
+        except SystemExit as e:
+            return cr, e.code
+        return cr, 0
+
+    def test_scripts_share_the_transaction(self, monkeypatch, tmp_path, capsys):
+        first = tmp_path / "first.py"
+        first.write_text("env.cr.events.append('first')")
+        second = tmp_path / "second.py"
+        second.write_text("env.cr.events.append('second')")
+
+        cr, code = self._run(monkeypatch, [first, second], commit=True)
+
+        assert code == 0
+        assert cr.events == ["savepoint", "first", "savepoint", "second", "commit"]
+        assert f"<== {second} done in" in capsys.readouterr().out
+
+    def test_failure_rolls_back_the_batch(self, monkeypatch, tmp_path):
+        failing = tmp_path / "failing.py"
+        failing.write_text("raise ValueError('bad data')")
+        never = tmp_path / "never.py"
+        never.write_text("env.cr.events.append('never')")
+
+        cr, code = self._run(monkeypatch, [failing, never], commit=True)
+
+        assert code == 1
+        assert cr.events == ["savepoint", "rollback to savepoint", "rollback"]
+
+    def test_keep_going(self, monkeypatch, tmp_path):
+        failing = tmp_path / "failing.py"
+        failing.write_text("raise ValueError('bad data')")
+        other = tmp_path / "other.py"
+        other.write_text("env.cr.events.append('other')")
+
+        cr, code = self._run(monkeypatch, [failing, other], commit=True, keep_going=True)
+
+        assert code == 1
+        assert cr.events == [
+            "savepoint", "rollback to savepoint", "savepoint", "other", "commit"
+        ]
+
+    def test_exec_scripts_pipes_the_bootstrap(self, prepared_env, monkeypatch, tmp_path):
+        run = MagicMock()
+        run.return_value.returncode = 0
+        monkeypatch.setattr("run_odoo.runner.subprocess.run", run)
+        script = tmp_path / "fix.py"
+        runner = Runner(version=17.0, db="test_db", install_modules=False)
+
+        assert runner.exec_scripts([script], commit=True)
+
+        kwargs = run.call_args.kwargs
+        assert kwargs["input"] == EXEC_LOOP_SCRIPT.read_bytes() + b"\n" + EXEC_BATCH_SCRIPT.read_bytes()
+        assert json.loads(kwargs["env"]["RUN_ODOO_EXEC_SCRIPTS"]) == [str(script)]
+        assert kwargs["env"]["RUN_ODOO_EXEC_COMMIT"] == "1"
+        assert "shell" in run.call_args.args[0]
@@ -0,0 +1,77 @@
+import subprocess
+
+import pytest
+from unittest.mock import patch
+from pathlib import Path
+
+from run_odoo import smoke
+
+LOG = """\
+2024-05-01 10:00:01,000 123 DEBUG db odoo.modules.loading: Loading module sale (1/2)
+2024-05-01 10:00:04,000 123 DEBUG db odoo.modules.loading: Loading module stock (2/2)
+2024-05-01 10:00:05,000 123 ERROR db odoo.modules.registry: Failed to load registry
+2024-05-01 10:00:06,000 123 INFO db odoo.modules.loading: Modules loaded.
+"""
+
+
+@pytest.mark.unit
+class TestSmokeInstall:
+    """Test batch installation of every module"""
+
+    def test_select_modules(self):
+        available = {name: Path(name) for name in ["base", "sale", "test_mail", "account"]}
+
+        selected = smoke.select_modules(available, ["test_*"], installed=["base"])
+
+        assert selected == ["account", "sale"]
+
+    @patch('run_odoo.smoke.pg')
+    @patch('run_odoo.smoke.utils.run_with_rusage')
+    def test_install_batch(self, mock_run, mock_pg, tmp_path):
+        """Test per-module results are read from the batch log"""
+        logfile = tmp_path / "batch.log"
+
+        def fake_run(cmd, **kwargs):
+            logfile.write_text(LOG)
+            return 0, 5.0, 204800
+
+        mock_run.side_effect = fake_run
+        job = smoke.BatchJob(
+            index=0, modules=["sale", "stock"], db="smoke_0", template="smoke_base",
+            cmd=["odoo-bin"], env={}, pg_env={}, logfile=logfile,
+        )
+
+        results = smoke.install_batch(job)
+
+        mock_pg.clone_database.assert_called_once_with("smoke_base", "smoke_0", {}, None)
+        mock_pg.drop_database.assert_called_once()
+        assert [r.module for r in results] == ["sale", "stock"]
+        assert results[0].success is True
+        assert results[0].duration == pytest.approx(3.0)
+        assert results[0].peak_rss_kb == 204800
+        assert results[1].success is False
+        assert results[1].errors == 1
+
+    @patch('run_odoo.smoke.pg')
+    @patch('run_odoo.smoke.subprocess.run')
+    def test_prepare_template_renamed_once_installed(self, mock_run, mock_pg, prepared_env):
+        """Test base is installed under a temporary name, renamed on success only"""
+        from run_odoo.runner import Runner
+
+        mock_pg.database_exists.return_value = False
+        smoke_test = smoke.SmokeInstall(Runner(version=17.0), work_dir=prepared_env)
+
+        smoke_test.prepare_template()
+
+        cmd = mock_run.call_args[0][0]
+        assert cmd[cmd.index("-d") + 1] == "v17c_smoke_base_build"
+        assert mock_pg.rename_database.call_args[0][:2] == (
+            "v17c_smoke_base_build",
+            "v17c_smoke_base",
+        )
+
+        mock_pg.rename_database.reset_mock()
+        mock_run.side_effect = subprocess.CalledProcessError(1, cmd)
+        with pytest.raises(subprocess.CalledProcessError):
+            smoke_test.prepare_template()
+        mock_pg.rename_database.assert_not_called()
@@ -0,0 +1,196 @@
+import datetime
+import json
+from collections import namedtuple
+from decimal import Decimal
+from unittest.mock import patch
+
+import pytest
+from typer.testing import CliRunner
+
+from run_odoo import sqlexport
+from run_odoo.cli import app
+
+Column = namedtuple("Column", "name type_code precision scale", defaults=(None, None))
+
+
+class FakeCursor:
+    def __init__(self, columns, rows, type_codes=None):
+        type_codes = type_codes or [25] * len(columns)
+        self.description = [
+            code if isinstance(code, Column) else Column(name, code)
+            for name, code in zip(columns, type_codes)
+        ]
+        self.rows = list(rows)
+        self.fetches = []
+        self.query = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+    def execute(self, query):
+        self.query = query
+
+    def fetchmany(self, size):
+        batch, self.rows = self.rows[:size], self.rows[size:]
+        self.fetches.append(len(batch))
+        return batch
+
+
+class FakeConnection:
+    def __init__(self, columns, rows, type_codes=None):
+        self.cursor_obj = FakeCursor(columns, rows, type_codes)
+        self.cursor_name = None
+        self.read_only = False
+
+    def cursor(self, name=None):
+        self.cursor_name = name
+        return self.cursor_obj
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+
+@pytest.mark.unit
+class TestOutputFormat:
+    """Test choosing the export format"""
+
+    def test_from_extension(self, tmp_path):
+        assert sqlexport.output_format(tmp_path / "lines.jsonl") == "jsonl"
+        assert sqlexport.output_format(tmp_path / "lines.PARQUET") == "parquet"
+        assert sqlexport.output_format(None) == "csv"
+
+    def test_explicit_format_wins(self, tmp_path):
+        assert sqlexport.output_format(tmp_path / "lines.txt", "jsonl") == "jsonl"
+
+    def test_unknown(self, tmp_path):
+        with pytest.raises(ValueError, match="use --format"):
+            sqlexport.output_format(tmp_path / "lines.txt")
+        with pytest.raises(ValueError, match="Unknown format"):
+            sqlexport.output_format(None, "xlsx")
+
+
+@pytest.mark.unit
+class TestExportQuery:
+    """Test streaming query results from a server-side cursor"""
+
+    def test_csv_in_batches(self, tmp_path):
+        connection = FakeConnection(["id", "name"], [(i, f"line {i}") for i in range(5)])
+        output = tmp_path / "lines.csv"
+
+        count = sqlexport.export_query(connection, "SELECT 1", output, "csv", batch_size=2)
+
+        assert count == 5
+        assert connection.cursor_name == sqlexport.CURSOR_NAME
+        assert connection.cursor_obj.fetches == [2, 2, 1, 0]
+        lines = output.read_text().splitlines()
+        assert lines[0] == "id,name"
+        assert lines[-1] == "4,line 4"
+
+    def test_jsonl_values(self, tmp_path):
+        row = (Decimal("12.50"), datetime.date(2024, 1, 31), {"en_US": "Sale"}, None)
+        connection = FakeConnection(["amount", "date", "name", "note"], [row])
+        output = tmp_path / "lines.jsonl"
+
+        sqlexport.export_query(connection, "SELECT 1", output, "jsonl")
+
+        assert json.loads(output.read_text()) == {
+            "amount": 12.5,
+            "date": "2024-01-31",
+            "name": {"en_US": "Sale"},
+            "note": None,
+        }
+
+    def test_csv_json_cells(self, tmp_path):
+        connection = FakeConnection(["name"], [({"en_US": "Sale"},)])
+        output = tmp_path / "lines.csv"
+
+        sqlexport.export_query(connection, "SELECT 1", output, "csv")
+
+        assert output.read_text().splitlines()[1] == '"{""en_US"": ""Sale""}"'
+
+    def test_parquet_needs_a_file(self):
+        with pytest.raises(ValueError, match="output file"):
+            sqlexport.export_query(FakeConnection(["id"], []), "SELECT 1", None, "parquet")
+
+    def test_duplicate_columns(self, tmp_path):
+        connection = FakeConnection(["id", "id", "id_1"], [(1, 2, 3)])
+        output = tmp_path / "lines.jsonl"
+
+        sqlexport.export_query(connection, "SELECT 1", output, "jsonl")
+
+        assert json.loads(output.read_text()) == {"id": 1, "id_1": 2, "id_1_1": 3}
+
+    def test_parquet(self, tmp_path):
+        pq = pytest.importorskip("pyarrow.parquet")
+        rows = [(1, None), (2, None), (3, "late text")]
+        connection = FakeConnection(["id", "note"], rows, [23, 25])
+        output = tmp_path / "lines.parquet"
+
+        sqlexport.export_query(connection, "SELECT 1", output, "parquet", batch_size=2)
+
+        table = pq.read_table(output)
+        assert table.column("note").to_pylist() == [None, None, "late text"]
+
+    def test_parquet_types_from_description(self, tmp_path):
+        pa = pytest.importorskip("pyarrow")
+        pq = pytest.importorskip("pyarrow.parquet")
+        rows = [
+            (None, None, None, None, None),
+            (
+                7,
+                datetime.date(2024, 1, 31),
+                Decimal("1234567890123.45"),
+                Decimal("0.123456789012345678"),
+                {"en_US": "Sale"},
+            ),
+        ]
+        type_codes = [23, 1082, Column("amount", 1700, 16, 2), Column("rate", 1700), 3802]
+        connection = FakeConnection(["qty", "date", "amount", "rate", "name"], rows, type_codes)
+        output = tmp_path / "lines.parquet"
+
+        sqlexport.export_query(connection, "SELECT 1", output, "parquet", batch_size=1)
+
+        table = pq.read_table(output)
+        assert table.schema.field("qty").type == pa.int32()
+        assert table.schema.field("date").type == pa.date32()
+        # Numerics keep every digit
+        assert table.schema.field("amount").type == pa.decimal128(16, 2)
+        assert table.column("amount").to_pylist() == [None, Decimal("1234567890123.45")]
+        assert table.column("rate").to_pylist() == [None, "0.123456789012345678"]
+        assert table.column("name").to_pylist() == [None, '{"en_US": "Sale"}']
+
+    def test_parquet_empty_result(self, tmp_path):
+        pa = pytest.importorskip("pyarrow")
+        pq = pytest.importorskip("pyarrow.parquet")
+        connection = FakeConnection(["id", "id"], [], [23, 20])
+        output = tmp_path / "lines.parquet"
+
+        assert sqlexport.export_query(connection, "SELECT 1", output, "parquet") == 0
+
+        table = pq.read_table(output)
+        assert table.num_rows == 0
+        assert table.schema.names == ["id", "id_1"]
+        assert table.schema.field("id_1").type == pa.int64()
+
+
+@pytest.mark.cli
+@pytest.mark.unit
+class TestSqlCommand:
+    """Test the sql command"""
+
+    def test_sql_to_stdout(self):
+        connection = FakeConnection(["id"], [(1,), (2,)])
+        with patch("run_odoo.cli.pg.ConnectionParams.connect", return_value=connection) as connect:
+            result = CliRunner().invoke(app, ["sql", "test_db", "SELECT id FROM res_partner"])
+
+        assert result.exit_code == 0
+        assert "id\n1\n2\n" in result.stdout
+        assert connection.read_only
+        assert connection.cursor_obj.query == "SELECT id FROM res_partner"
+        connect.assert_called_once()
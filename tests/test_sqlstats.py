@@ -0,0 +1,92 @@
+import json
+
+import pytest
+
+from run_odoo.sqlstats import SqlReport, normalize
+
+def query_line(pid, sql, ms=1.0):
+    return f"2024-05-01 10:00:01,000 {pid} DEBUG db odoo.sql_db: [{ms:.3f} ms] query: {sql}\n"
+
+
+def request_line(pid, path):
+    return (
+        f"2024-05-01 10:00:02,000 {pid} INFO db werkzeug: 127.0.0.1 - - [01/May/2024 10:00:02] "
+        f'"POST {path} HTTP/1.1" 200 - 3 0.001 0.010\n'
+    )
+
+
+@pytest.mark.unit
+class TestNormalize:
+    """Test reducing queries to their shape"""
+
+    def test_literals(self):
+        sql = """SELECT * FROM "res_partner" WHERE "name" = 'O''Brien' AND "id" = 42"""
+        assert normalize(sql) == """SELECT * FROM "res_partner" WHERE "name" = ? AND "id" = ?"""
+
+    def test_lists_and_whitespace(self):
+        assert normalize("SELECT id\n  FROM t1 WHERE id IN (1, 2, 3)") == (
+            "SELECT id FROM t1 WHERE id IN (?...)"
+        )
+        assert normalize("WHERE id = ANY(ARRAY[4,5])") == "WHERE id = ANY(ARRAY[?...])"
+
+    def test_string_prefixes(self):
+        assert normalize("WHERE a = E'\\n' AND b = X'1F'") == "WHERE a = ? AND b = ?"
+        # A quote right after an identifier keeps the identifier's last letter
+        assert normalize("SELECT 1 FROM t WHERE name'x'") == "SELECT ? FROM t WHERE name?"
+
+    def test_same_shape(self):
+        assert normalize("SELECT a FROM t WHERE id = 1.5") == normalize(
+            "SELECT a FROM t WHERE id = 20"
+        )
+
+
+@pytest.mark.unit
+class TestSqlReport:
+    """Test aggregating SQL log lines by shape and per request"""
+
+    def test_aggregates_shapes(self, capsys):
+        report = SqlReport()
+        lines = [query_line(1, f"SELECT name FROM t WHERE id = {i}", ms=i + 1) for i in range(4)]
+        lines.append(query_line(1, "SELECT 1"))
+        lines.append("FROM dual\n")
+        hidden = [report.line(line) for line in lines]
+        report.finished(0)
+
+        results = report.results()
+        assert results[0].shape == "SELECT name FROM t WHERE id = ?"
+        assert results[0].count == 4
+        assert results[0].total_ms == pytest.approx(10.0)
+        assert results[1].shape == "SELECT ? FROM dual"
+        assert all(hidden)
+
+    def test_detects_bursts_per_request(self, capsys):
+        report = SqlReport(burst_threshold=3)
+        lines = []
+        for i in range(3):
+            lines.append(query_line(8, f"SELECT name FROM t WHERE id = {i}"))
+            lines.append(query_line(9, f"SELECT name FROM t WHERE id = {i}"))
+        lines.append(request_line(8, "/web/dataset/call_kw"))
+        lines.append(query_line(9, "SELECT 1"))
+        lines.append(request_line(9, "/other"))
+        lines.append(query_line(9, "SELECT name FROM t WHERE id = 9"))
+        lines.append(request_line(9, "/last"))
+        for line in lines:
+            report.line(line)
+        report.finished(0)
+
+        assert [(burst.request, burst.count) for burst in report.bursts] == [
+            ("POST /web/dataset/call_kw", 3),
+            ("POST /other", 3),
+        ]
+        assert "Probable N+1 patterns" in capsys.readouterr().out
+
+    def test_writes_report(self, tmp_path, capsys):
+        output = tmp_path / "sql.json"
+        report = SqlReport(output=output)
+        report.line(query_line(1, "SELECT 1", ms=2.0))
+        report.finished(0)
+
+        data = json.loads(output.read_text())
+        assert data["shapes"][0]["count"] == 1
+        assert data["shapes"][0]["total_ms"] == pytest.approx(2.0)
+        assert data["bursts"] == []
@@ -0,0 +1,24 @@
+import pytest
+
+from run_odoo import stats
+
+
+@pytest.mark.unit
+class TestStats:
+    """Test summary statistics"""
+
+    def test_percentile(self):
+        values = [float(v) for v in range(1, 101)]
+
+        assert stats.percentile(values, 50) == pytest.approx(50.5)
+        assert stats.percentile(values, 95) == pytest.approx(95.05)
+        assert stats.percentile([3.0], 95) == 3.0
+        assert stats.percentile([], 95) == 0.0
+
+    def test_summarize(self):
+        summary = stats.summarize([4.0, 1.0, 2.0, 3.0])
+
+        assert summary["count"] == 4
+        assert summary["min"] == 1.0
+        assert summary["median"] == 2.5
+        assert summary["max"] == 4.0
@@ -0,0 +1,104 @@
+import socket
+import time
+from unittest.mock import MagicMock
+
+import pytest
+
+from run_odoo import supervisor
+from run_odoo.runner import Runner
+
+
+@pytest.fixture
+def runners(prepared_env):
+    return {
+        "first": Runner(version=17.0, addons=["sale"], http_port=8069, workers=2),
+        "second": Runner(version=15.0, addons=["stock"], http_port=8069),
+    }
+
+
+@pytest.mark.unit
+class TestPorts:
+    """Test port allocation for side by side instances"""
+
+    def test_allocate_ports(self, runners, monkeypatch):
+        monkeypatch.setattr(supervisor, "port_available", lambda port, host="127.0.0.1": True)
+        first, second = runners.values()
+
+        supervisor.allocate_ports([first, second])
+
+        assert first.http_port == 8069
+        assert second.http_port not in (8069, first.gevent_port)
+        assert first.gevent_port is not None
+        assert second.gevent_port is None
+
+    def test_busy_port_is_replaced(self, runners):
+        with socket.socket() as busy:
+            busy.bind(("127.0.0.1", 0))
+            busy.listen()
+            runner = runners["second"]
+            runner.http_port = busy.getsockname()[1]
+
+            supervisor.allocate_ports([runner])
+
+            assert runner.http_port != busy.getsockname()[1]
+
+    def test_gevent_option(self, runners):
+        first, second = runners.values()
+        first.gevent_port = 9001
+        second.gevent_port = 9002
+
+        options = first._prepare_params()
+        assert options[options.index("--gevent-port") + 1] == "9001"
+        assert "--longpolling-port" in second._prepare_params()
+
+
+@pytest.mark.unit
+class TestSupervisor:
+    """Test instance states, restarts and database conflicts"""
+
+    def test_prepare_instances(self, runners):
+        instances = supervisor.prepare_instances(runners)
+
+        assert [instance.name for instance in instances] == ["first", "second"]
+        assert instances[0].runner.db == "v17c_sale"
+        assert instances[1].logfile.name == "second.log"
+
+    def test_shared_database(self, runners):
+        runners["second"].db = "v17c_sale"
+
+        with pytest.raises(ValueError, match="would share database"):
+            supervisor.prepare_instances(runners)
+
+    def test_restart_on_crash(self, runners, tmp_path, monkeypatch):
+        instance = supervisor.Instance("first", runners["first"], tmp_path / "first.log")
+        instance.start = MagicMock()
+        instance.proc = MagicMock()
+        instance.proc.poll.return_value = 1
+        instance.state = supervisor.STARTING
+        monitor = supervisor.Supervisor([instance], max_restarts=1)
+
+        assert monitor.check(instance) == supervisor.CRASHED
+        assert instance.restarts == 1
+        instance.start.assert_called_once()
+
+        assert monitor.check(instance) == supervisor.FAILED
+
+    def test_health(self, runners, tmp_path, monkeypatch):
+        instance = supervisor.Instance("first", runners["first"], tmp_path / "first.log")
+        instance.proc = MagicMock()
+        instance.proc.poll.return_value = None
+        instance.state = supervisor.STARTING
+        instance.started_at = time.monotonic()
+        monitor = supervisor.Supervisor([instance])
+
+        monkeypatch.setattr(supervisor, "health_check", lambda url, timeout: False)
+        assert monitor.check(instance) == supervisor.STARTING
+        monkeypatch.setattr(supervisor, "health_check", lambda url, timeout: True)
+        assert monitor.check_all() is True
+        assert instance.state == supervisor.HEALTHY
+        monkeypatch.setattr(supervisor, "health_check", lambda url, timeout: False)
+        assert monitor.check(instance) == supervisor.UNHEALTHY
+
+    def test_health_url(self, runners):
+        assert supervisor.health_url(runners["first"]).endswith(":8069/web/health")
+        assert supervisor.health_url(runners["second"]).endswith("/web/login")
@@ -0,0 +1,58 @@
+import pytest
+import socket
+import subprocess
+import time
+
+from run_odoo.timings import PhaseTimer
+
+LOG = """\
+Some banner
+2024-05-01 10:00:00,000 1 INFO db odoo.service.server: HTTP service (werkzeug) running on host:8069
+2024-05-01 10:00:01,000 1 INFO db odoo.modules.loading: loading 1 modules...
+2024-05-01 10:00:02,000 1 INFO db odoo.modules.loading: loading 42 modules...
+2024-05-01 10:00:03,000 1 INFO db odoo.modules.loading: Modules loaded.
+2024-05-01 10:00:03,100 1 INFO db odoo.modules.registry: Registry loaded in 3.100s
+"""
+
+
+@pytest.mark.unit
+class TestPhaseTimer:
+    """Test startup phase timing"""
+
+    def test_log_markers(self, capsys):
+        timer = PhaseTimer()
+        timer.mark("virtualenv ready")
+        for line in LOG.splitlines(keepends=True):
+            assert timer.line(line) is False
+        timer.finished(0)
+
+        labels = [label for label, _ in timer.marks]
+        assert labels == [
+            "virtualenv ready",
+            "first output",
+            "HTTP service started",
+            "module loading started",
+            "modules loaded",
+            "registry loaded",
+            "odoo-bin exited",
+        ]
+        out = capsys.readouterr().out
+        assert "registry loaded" in out
+
+    def test_port_probe(self, capsys):
+        """Test the breakdown is printed once the port accepts connections"""
+        with socket.socket() as server:
+            server.bind(("127.0.0.1", 0))
+            server.listen()
+            timer = PhaseTimer(port=server.getsockname()[1])
+            proc = subprocess.Popen(["python3", "-c", "import time; time.sleep(5)"])
+            try:
+                timer.started(proc)
+                deadline = time.monotonic() + 5
+                while not timer.reported and time.monotonic() < deadline:
+                    time.sleep(0.05)
+            finally:
+                proc.kill()
+                proc.wait()
+
+        assert "HTTP port accepting connections" in [label for label, _ in timer.marks]
@@ -0,0 +1,145 @@
+import io
+import json
+import threading
+
+import pytest
+
+from run_odoo.addons.run_odoo_trace import tracing
+
+
+def make_environ(path, body=b"", remote_addr="127.0.0.1"):
+    return {
+        "PATH_INFO": path,
+        "REQUEST_METHOD": "POST" if body else "GET",
+        "CONTENT_LENGTH": str(len(body)),
+        "wsgi.input": io.BytesIO(body),
+        "REMOTE_ADDR": remote_addr,
+    }
+
+
+def fake_odoo_app(environ, start_response):
+    # What Odoo's cursor does for every query
+    thread = threading.current_thread()
+    thread.query_count += 2
+    thread.query_time += 0.004
+    environ["wsgi.input"].read()
+    start_response("200 OK", [])
+    return [b"ok"]
+
+
+@pytest.mark.unit
+class TestTracer:
+    """Test the request tracing middleware"""
+
+    def test_rpc_call(self):
+        call = tracing.rpc_call(make_environ("/web/dataset/call_kw/res.partner/read"))
+        assert call == {"model": "res.partner", "method": "read"}
+
+        params = {"model": "sale.order", "method": "action_confirm", "args": [[7]], "kwargs": {}}
+        body = json.dumps({"params": params}).encode()
+        environ = make_environ("/web/dataset/call_button", body)
+        assert tracing.rpc_call(environ) == params
+        # The body is still readable by Odoo
+        assert environ["wsgi.input"].read() == body
+
+        args = ["db", 2, "pw", "res.users", "search", [[]]]
+        body = json.dumps({"params": {"service": "object", "method": "execute_kw", "args": args}})
+        assert tracing.rpc_call(make_environ("/jsonrpc", body.encode())) == {
+            "model": "res.users",
+            "method": "search",
+            "args": [[]],
+            "kwargs": {},
+        }
+        assert tracing.rpc_call(make_environ("/web/login")) is None
+
+    def test_records_calls(self, tmp_path):
+        calls_path = tmp_path / "calls.jsonl"
+        tracer = tracing.Tracer(calls_path=str(calls_path))
+        params = {"model": "res.partner", "method": "search_read", "args": [], "kwargs": {}}
+        environ = make_environ(
+            "/web/dataset/call_kw/res.partner/search_read", json.dumps({"params": params}).encode()
+        )
+        environ["HTTP_COOKIE"] = "session_id=secret; frontend_lang=en_US"
+
+        tracer(fake_odoo_app, environ, lambda *a: None)
+        tracer(fake_odoo_app, make_environ("/web/login"), lambda *a: None)
+
+        calls = [json.loads(line) for line in calls_path.read_text().splitlines()]
+        assert len(calls) == 1
+        assert calls[0]["model"] == "res.partner"
+        assert calls[0]["args"] == []
+        assert len(calls[0]["session"]) == 12
+        assert "secret" not in calls_path.read_text()
+
+    def test_records_requests(self, tmp_path):
+        log_path = tmp_path / "trace.jsonl"
+        tracer = tracing.Tracer(size=2, log_path=str(log_path))
+
+        for _ in range(3):
+            response = tracer(
+                fake_odoo_app, make_environ("/web/dataset/call_kw/res.partner/read"), lambda *a: None
+            )
+            assert response == [b"ok"]
+
+        assert len(tracer.records) == 2
+        record = tracer.records[-1]
+        assert record["status"] == 200
+        assert record["sql_count"] == 2
+        assert record["sql_ms"] == pytest.approx(4.0)
+        assert record["model"] == "res.partner"
+        assert len(log_path.read_text().splitlines()) == 3
+
+    def test_serves_records_locally_only(self):
+        tracer = tracing.Tracer()
+        tracer(fake_odoo_app, make_environ("/web/webclient/version_info"), lambda *a: None)
+        statuses = []
+
+        body = tracer(
+            fake_odoo_app,
+            make_environ(tracing.TRACE_PATH),
+            lambda status, headers: statuses.append(status),
+        )
+        tracer(
+            fake_odoo_app,
+            make_environ(tracing.TRACE_PATH, remote_addr="10.0.0.5"),
+            lambda status, headers: statuses.append(status),
+        )
+
+        assert json.loads(body[0])[0]["path"] == "/web/webclient/version_info"
+        assert statuses == ["200 OK", "403 Forbidden"]
+
+    def test_serve_records_refuses_proxied_requests(self):
+        tracer = tracing.Tracer()
+        statuses = []
+        environ = make_environ(tracing.TRACE_PATH)
+        environ["HTTP_X_FORWARDED_FOR"] = "203.0.113.9"
+
+        tracer(fake_odoo_app, environ, lambda status, headers: statuses.append(status))
+
+        assert statuses == ["403 Forbidden"]
+
+    def test_serve_records_requires_token(self):
+        tracer = tracing.Tracer(token="s3cret")
+        statuses = []
+
+        for query in ("", "token=wrong", "token=s3cret"):
+            environ = make_environ(tracing.TRACE_PATH)
+            environ["QUERY_STRING"] = query
+            tracer(fake_odoo_app, environ, lambda status, headers: statuses.append(status))
+        environ = make_environ(tracing.TRACE_PATH)
+        environ["HTTP_X_RUN_ODOO_TOKEN"] = "s3cret"
+        tracer(fake_odoo_app, environ, lambda status, headers: statuses.append(status))
+
+        assert statuses == ["403 Forbidden", "403 Forbidden", "200 OK", "200 OK"]
+
+    def test_install(self):
+        class Application:
+            def __call__(self, environ, start_response):
+                return fake_odoo_app(environ, start_response)
+
+        tracer = tracing.Tracer()
+        tracing.install(Application, tracer)
+        tracing.install(Application, tracer)
+
+        Application()(make_environ("/web"), lambda *a: None)
+        assert len(tracer.records) == 1
@@ -8,7 +8,11 @@ import os
 from run_odoo.utils import (
     install_dependecies_fedora,
     install_dependencies_debian,
-    clone_or_update_repo
+    clone_or_update_repo,
+    child_pids,
+    find_free_port,
+    run_with_rusage,
+    wait_for_port,
 )
 
 
@@ -445,4 +449,43 @@ class TestUtilsEdgeCases:
             # Convert string to Path for consistency
             path_from_string = Path(string_path)
             assert isinstance(path_from_string, Path)
-            assert str(path_from_string) == string_path 
\ No newline at end of file
+            assert str(path_from_string) == string_path 
+
+
+@pytest.mark.utils
+@pytest.mark.subprocess
+class TestProcessHelpers:
+    """Test port allocation and resource usage helpers"""
+
+    def test_find_free_port(self):
+        port = find_free_port()
+        assert 0 < port < 65536
+
+    def test_run_with_rusage(self):
+        returncode, elapsed, peak_rss_kb = run_with_rusage(["python3", "-c", "import sys; sys.exit(3)"])
+
+        assert returncode == 3
+        assert elapsed > 0
+        assert peak_rss_kb > 0
+
+    def test_wait_for_port(self):
+        import socket
+
+        with socket.socket() as server:
+            server.bind(("127.0.0.1", 0))
+            server.listen()
+            assert wait_for_port("127.0.0.1", server.getsockname()[1], timeout=2) is True
+
+    def test_wait_for_port_timeout(self):
+        port = find_free_port()
+        assert wait_for_port("127.0.0.1", port, timeout=0.3) is False
+
+    def test_child_pids(self):
+        import subprocess
+
+        proc = subprocess.Popen(["sleep", "5"])
+        try:
+            assert proc.pid in child_pids(os.getpid())
+        finally:
+            proc.kill()
+            proc.wait()